@@ -4,12 +4,155 @@
 # ディレクトリ内のすべてのファイル名を一度に置換しよう！
 #
 import traceback
-import enum
+import itertools
 import os
-import glob
 import re
 
 
+########################################
+# 置換の計画
+########################################
+class RenamePlan():
+    """ディレクトリーの中のファイル名の置換の計画
+
+    ファイル名は os.scandir() で１度だけ読みます。
+    正規表現に合うかは match() で１度だけ調べて、結果を覚えておきます。
+    置換後のファイル名も set_replacement() で、合ったファイル名ごとに１度だけ求めて、 execute() はそれを使います。
+    ファイルが百万個あっても、ディレクトリーを読み直したり、同じファイル名を何度も照合したりしません"""
+
+
+    def __init__(self, directory):
+        """ディレクトリーを読みます
+
+        Parameters
+        ----------
+        directory : str
+            ディレクトリーのパス
+        """
+        self._directory = directory
+
+        # glob.glob("./*") と同じく、 . で始まる名前は除きます
+        with os.scandir(directory) as entries:
+            self._basename_list = [entry.name for entry in entries if not entry.name.startswith('.')]
+
+        # 正規表現に合ったものの、 (ファイル名の番号, 照合の結果) のリスト
+        self._matched_list = []
+
+        # 正規表現に合ったものの、置換後のファイル名のリスト。 _matched_list と同じ順
+        self._converted_list = []
+
+        # コンパイル済みの正規表現
+        self._pattern = None
+
+
+    @property
+    def basename_list(self):
+        return self._basename_list
+
+
+    @property
+    def len_matched(self):
+        return len(self._matched_list)
+
+
+    def match(self, pattern):
+        """ファイル名を正規表現と照合して、結果を覚えます。置換後のファイル名は忘れます
+
+        Parameters
+        ----------
+        pattern : re.Pattern
+            コンパイル済みの正規表現
+        """
+        self._pattern = pattern
+        self._matched_list = []
+        self._converted_list = []
+
+        for i, basename in enumerate(self._basename_list):
+            result = pattern.match(basename)
+            if result:
+                self._matched_list.append((i, result))
+
+
+    def set_replacement(self, replacement):
+        """正規表現に合ったファイル名だけ、置換後のファイル名を求めます。
+        re.sub() と同じく、ファイル名の中で合う部分は全て置換します
+
+        Parameters
+        ----------
+        replacement : str
+            置換後のパターン。例： example-\\2-\\1.txt
+        """
+        self._converted_list = [self._pattern.sub(replacement, result.string) for _, result in self._matched_list]
+
+
+    def iter_match_lines(self):
+        """照合の結果を１行ずつ返します"""
+
+        matched_iterator = iter(self._matched_list)
+        next_matched = next(matched_iterator, None)
+
+        for i, basename in enumerate(self._basename_list):
+            if next_matched is not None and next_matched[0] == i:
+                # Matched
+                result = next_matched[1]
+                buf = f"({i+1}) {basename}"
+                for j, group in enumerate(result.groups()):
+                    buf += f" \\{j+1}=[{group}]"
+
+                yield buf
+                next_matched = next(matched_iterator, None)
+
+            else:
+                # Unmatched
+                yield f"( ) {basename}"
+
+
+    def iter_simulation_lines(self):
+        """置換後のファイル名を１行ずつ返します"""
+        for (i, result), converted in zip(self._matched_list, self._converted_list):
+            yield f"({i+1}) {result.string} --> {converted}"
+
+
+    def execute(self):
+        """計画どおりにファイル名を変えて、１件ずつ行を返します"""
+        for (i, result), converted in zip(self._matched_list, self._converted_list):
+            oldPath = os.path.join(self._directory, result.string)
+            newPath = os.path.join(self._directory, converted)
+            os.rename(oldPath, newPath)
+            yield f"({i+1})Rename {oldPath} --> {newPath}"
+
+
+def print_in_pages(lines, page_size=20):
+    """page_size 行ずつ表示します。続きを見るか、都度聞きます"""
+
+    lines = iter(lines)
+
+    while True:
+        page = list(itertools.islice(lines, page_size))
+
+        for line in page:
+            print(line)
+
+        if len(page) < page_size:
+            return
+
+        # 次の行が無ければ聞かない
+        next_line = next(lines, None)
+        if next_line is None:
+            return
+
+        prompt = """\
+| 続きを表示しますか？
+| Show more?
+(Enter/q)> """
+        answer = input(prompt)
+
+        if answer == "q":
+            return
+
+        lines = itertools.chain([next_line], lines)
+
+
 ########################################
 # コマンドから実行時
 ########################################
@@ -39,13 +182,12 @@ if __name__ == '__main__':
 Files
 -----""")
 
-            files = glob.glob("./*")
+            # ディレクトリーを読むのは、ここの１度だけです
+            plan = RenamePlan(os.getcwd())
 
             # とりあえず一覧します
-            for file in files:
-                # `file` - Example: `.\20210815shogi67.png`
-                basename = os.path.basename(file)
-                print(basename)
+            print_in_pages(plan.basename_list)
+            print(f"{len(plan.basename_list)} files")
 
             prompt = """\
 
@@ -71,22 +213,12 @@ Files
             patternText = input(prompt)
             pattern = re.compile(patternText)
 
+            # 照合は、パターンごとに１度だけです
+            plan.match(pattern)
+
             # とりあえず一覧します
-            for i, file in enumerate(files):
-                basename = os.path.basename(file)
-                result = pattern.match(basename)
-                if result:
-                    # Matched
-                    # グループ数
-                    groupCount = len(result.groups())
-                    buf = f"({i+1}) {basename}"
-                    for j in range(0, groupCount):
-                        buf += f" \\{j+1}=[{result.group(j+1)}]"
-
-                    print(buf)
-                else:
-                    # Unmatched
-                    print(f"( ) {basename}")
+            print_in_pages(plan.iter_match_lines())
+            print(f"{plan.len_matched} / {len(plan.basename_list)} files matched")
 
             prompt = """\
 
@@ -111,16 +243,13 @@ Files
 > """
             replacement = input(prompt)
 
+            # 置換後のファイル名は、ここで求めたものを実行でも使います
+            plan.set_replacement(replacement)
+
             print("""
 Simulation
 ----------""")
-            for i, file in enumerate(files):
-                basename = os.path.basename(file)
-                result = pattern.match(basename)
-                if result:
-                    # Matched
-                    converted = re.sub(patternText, replacement, basename)
-                    print(f"({i+1}) {basename} --> {converted}")
+            print_in_pages(plan.iter_simulation_lines())
 
             prompt = """\
 
@@ -135,16 +264,8 @@ Simulation
             print("Canceld")
 
         # 置換実行
-        for i, file in enumerate(files):
-            basename = os.path.basename(file)
-            result = pattern.match(basename)
-            if result:
-                # Matched
-                converted = re.sub(patternText, replacement, basename)
-                oldPath = os.path.join(os.getcwd(), basename)
-                newPath = os.path.join(os.getcwd(), converted)
-                print(f"({i})Rename {oldPath} --> {newPath}")
-                os.rename(oldPath, newPath)
+        for line in plan.execute():
+            print(line)
 
 
         print("でーきたっ！")
@@ -0,0 +1,3 @@
+from benchmarks.generator import TreeCsvGenerator
+from benchmarks.startup import StartupBenchmark
+from benchmarks.suite import BenchmarkSuite
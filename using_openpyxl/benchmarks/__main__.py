@@ -0,0 +1,112 @@
+#
+# cd using_openpyxl
+# python -m benchmarks --output ../temp/benchmark_baseline.json
+# python -m benchmarks --baseline ../temp/benchmark_baseline.json
+# python -m benchmarks --startup --output ../temp/startup_baseline.json
+# python -m benchmarks --startup --baseline ../temp/startup_baseline.json
+#
+# xltree の速さを測ろう
+#
+
+import argparse
+import json
+import sys
+
+from benchmarks.generator import TreeCsvGenerator
+from benchmarks.startup import StartupBenchmark
+from benchmarks.suite import BenchmarkSuite
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='xltree の処理を段階ごとに測ります')
+
+    # 入力のCSVの作り方
+    parser.add_argument('--rows', type=int, default=1000, help='件数')
+    parser.add_argument('--depth', type=int, default=5, help='根を除いた層の数')
+    parser.add_argument('--fan-out', choices=TreeCsvGenerator.FAN_OUT_DISTRIBUTION_LIST, default=TreeCsvGenerator.FAN_OUT_UNIFORM, help='子の数の分布')
+    parser.add_argument('--max-fan-out', type=int, default=4, help='子の数の上限')
+    parser.add_argument('--text-length', type=int, default=8, help='ノードのテキストの文字数')
+    parser.add_argument('--seed', type=int, default=0, help='乱数の種')
+
+    # 測り方
+    parser.add_argument('--repeat', type=int, default=3, help='時間を測る回数。一番速いものを採ります')
+    parser.add_argument('--startup', action='store_true', help='処理の代わりに、 xltree を読み込むまでの時間を python -X importtime で測ります。 pandas などを読み込んではいけない場面で読み込んでいれば、 --baseline が無くても終了コード 1 で終わります')
+
+    # 結果
+    parser.add_argument('--output', help='結果の JSON を書き出すファイルパス。基準にするなら、これを --baseline に渡します')
+    parser.add_argument('--baseline', help='比べる基準の JSON のファイルパス。後退があれば終了コード 1 で終わります')
+    parser.add_argument('--threshold', type=float, default=0.2, help='基準からこの割合より悪くなったら後退とみなします')
+
+    args = parser.parse_args()
+
+    if args.startup:
+        return _run_startup(args=args)
+
+    generator = TreeCsvGenerator(
+            length_of_records=args.rows,
+            depth=args.depth,
+            fan_out_distribution=args.fan_out,
+            max_fan_out=args.max_fan_out,
+            text_length=args.text_length,
+            seed=args.seed)
+
+    result = BenchmarkSuite(generator=generator, repeat=args.repeat).run()
+
+    for phase_name, phase in result['phases'].items():
+        print(f"{phase_name:<10} {phase['seconds']:>10.3f} s {phase['peak_bytes'] / 1024 / 1024:>10.1f} MiB")
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf8') as f:
+            json.dump(result, f, indent=4)
+
+    if args.baseline is not None:
+        with open(args.baseline, encoding='utf8') as f:
+            baseline_result = json.load(f)
+
+        regression_list = BenchmarkSuite.compare(baseline_result=baseline_result, current_result=result, threshold=args.threshold)
+
+        if 0 < len(regression_list):
+            print("Regression:")
+            for regression in regression_list:
+                print(f"    {regression}")
+            return 1
+
+        print("No regression")
+
+    return 0
+
+
+def _run_startup(args):
+    """起動時間を測ります"""
+
+    result = StartupBenchmark(repeat=args.repeat).run()
+
+    for scenario_name, scenario in result['scenarios'].items():
+        print(f"{scenario_name:<10} {scenario['seconds']:>10.3f} s {scenario['len_modules']:>6} modules")
+
+        for module_name, seconds in scenario['slowest_modules'].items():
+            print(f"    {module_name:<40} {seconds:>10.3f} s")
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf8') as f:
+            json.dump(result, f, indent=4)
+
+    baseline_result = None
+    if args.baseline is not None:
+        with open(args.baseline, encoding='utf8') as f:
+            baseline_result = json.load(f)
+
+    regression_list = StartupBenchmark.compare(baseline_result=baseline_result, current_result=result, threshold=args.threshold)
+
+    if 0 < len(regression_list):
+        print("Regression:")
+        for regression in regression_list:
+            print(f"    {regression}")
+        return 1
+
+    print("No regression")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
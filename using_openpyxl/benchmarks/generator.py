@@ -0,0 +1,139 @@
+import csv
+import random
+import string
+
+from xltree.database import TreeTable
+
+
+class TreeCsvGenerator():
+    """ベンチマーク用の樹形図のCSVを作ります
+
+    乱数の種が同じなら、何度作っても同じCSVになります。
+    根は１つで、根の子（第1層のノード）は件数に達するまで増やします"""
+
+
+    # 子の数の分布
+    FAN_OUT_FIXED = 'fixed'             # いつも max_fan_out
+    FAN_OUT_UNIFORM = 'uniform'         # 1 ～ max_fan_out が同じ確率
+    FAN_OUT_GEOMETRIC = 'geometric'     # 1 が多く、大きい数ほど少ない。上限は max_fan_out
+
+    FAN_OUT_DISTRIBUTION_LIST = [FAN_OUT_FIXED, FAN_OUT_UNIFORM, FAN_OUT_GEOMETRIC]
+
+
+    def __init__(self, length_of_records=1000, depth=5, fan_out_distribution=FAN_OUT_UNIFORM, max_fan_out=4, text_length=8, leaf_rate=0.1, edge_text_rate=0.3, seed=0):
+        """初期化
+
+        Parameters
+        ----------
+        length_of_records : int
+            件数。葉の数と同じです
+        depth : int
+            根を除いた層の数
+        fan_out_distribution : str
+            子の数の分布。 TreeCsvGenerator.FAN_OUT_DISTRIBUTION_LIST のいずれか
+        max_fan_out : int
+            子の数の上限
+        text_length : int
+            ノードのテキストの文字数
+        leaf_rate : float
+            最深層より手前で葉にする確率
+        edge_text_rate : float
+            辺にテキストを付ける確率
+        seed : int
+            乱数の種
+        """
+
+        if fan_out_distribution not in TreeCsvGenerator.FAN_OUT_DISTRIBUTION_LIST:
+            raise ValueError(f"{fan_out_distribution=} must be one of {TreeCsvGenerator.FAN_OUT_DISTRIBUTION_LIST}")
+
+        if depth < 1 or max_fan_out < 1:
+            raise ValueError(f"{depth=} and {max_fan_out=} must be 1 or more")
+
+        self._length_of_records = length_of_records
+        self._depth = depth
+        self._fan_out_distribution = fan_out_distribution
+        self._max_fan_out = max_fan_out
+        self._text_length = text_length
+        self._leaf_rate = leaf_rate
+        self._edge_text_rate = edge_text_rate
+        self._seed = seed
+
+
+    @property
+    def parameters(self):
+        """作り方。ベンチマークの結果に書き残して、比べるときに同じ作り方か確かめます"""
+        return {
+            'length_of_records': self._length_of_records,
+            'depth': self._depth,
+            'fan_out_distribution': self._fan_out_distribution,
+            'max_fan_out': self._max_fan_out,
+            'text_length': self._text_length,
+            'leaf_rate': self._leaf_rate,
+            'edge_text_rate': self._edge_text_rate,
+            'seed': self._seed,
+        }
+
+
+    def iter_rows(self):
+        """CSVの行を先頭から順に返すジェネレーター。１行は no, node0, edge1, node1, ... のリストです"""
+
+        rng = random.Random(self._seed)
+
+        def new_text():
+            return ''.join(rng.choices(string.ascii_lowercase, k=self._text_length))
+
+        def new_edge_text():
+            if rng.random() < self._edge_text_rate:
+                return ''.join(rng.choices(string.ascii_lowercase, k=3))
+            return ''
+
+        def draw_fan_out():
+            if self._fan_out_distribution == TreeCsvGenerator.FAN_OUT_FIXED:
+                return self._max_fan_out
+
+            if self._fan_out_distribution == TreeCsvGenerator.FAN_OUT_UNIFORM:
+                return rng.randint(1, self._max_fan_out)
+
+            # 幾何分布。半分の確率で 1、その半分で 2 ...
+            fan_out = 1
+            while fan_out < self._max_fan_out and rng.random() < 0.5:
+                fan_out += 1
+            return fan_out
+
+        def iter_paths(path):
+            """path の下の葉までのパスを、深さ優先で返します"""
+            depth_th = len(path) // 2
+
+            if depth_th == self._depth or rng.random() < self._leaf_rate:
+                yield path
+                return
+
+            for _ in range(draw_fan_out()):
+                yield from iter_paths(path + [new_edge_text(), new_text()])
+
+        # 根の子は件数に達するまで増やす
+        no = 0
+        root = new_text()
+        while True:
+            for path in iter_paths([root, new_edge_text(), new_text()]):
+                no += 1
+                if self._length_of_records < no:
+                    return
+
+                # 浅い葉は、残りの列を空にする
+                yield [no] + path + [''] * (self._depth * 2 + 1 - len(path))
+
+
+    def write(self, file_path):
+        """CSVファイル書出し
+
+        Parameters
+        ----------
+        file_path : str
+            CSVファイルパス
+        """
+
+        with open(file_path, 'w', encoding='utf8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(TreeTable.create_column_name_list(specified_length_of_nodes=self._depth + 1, include_index=True))
+            writer.writerows(self.iter_rows())
@@ -0,0 +1,181 @@
+import os
+import platform
+import re
+import subprocess
+import sys
+
+
+class StartupBenchmark():
+    """xltree を読み込むまでの時間を、 `python -X importtime` で測ります
+
+    場面ごとに、新しい Python のプロセスでインポート文を実行して、インタープリターの起動で読み込むモジュールを除いた累計時間を測ります。
+    時間は repeat 回測って一番速いものを採ります。
+    場面ごとに読み込んではいけないモジュール（例えば、 `import xltree` での pandas）を決めておき、読み込んでいたら後退とみなします"""
+
+
+    # 場面の名前 → インポート文と、読み込んではいけないモジュール
+    SCENARIO_DICT = {
+        # パッケージだけ
+        'import': {
+            'statement': 'import xltree',
+            'forbidden_module_list': ['pandas', 'openpyxl', 'numpy'],
+        },
+        # テキストの文書を書き出すまで。 pandas を使わない道
+        'text': {
+            'statement': 'import xltree; from xltree.database import TreeCsvReader; from xltree.documents import TextTreeDrawer',
+            'forbidden_module_list': ['pandas', 'openpyxl'],
+        },
+        # ワークブックを書き出すまで
+        'workbook': {
+            'statement': 'import xltree; from xltree.database import TreeTable; from xltree.workbooks import TreeDrawer',
+            'forbidden_module_list': [],
+        },
+    }
+
+    # 結果の JSON の形式の版
+    FORMAT_VERSION = 1
+
+    # 結果に載せる、自分の時間が長いモジュールの数
+    _LEN_SLOWEST_MODULES = 10
+
+    # `-X importtime` の１行。 import time: 自分の時間 | 累計時間 | 字下げしたモジュール名
+    _IMPORT_TIME_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+    def __init__(self, repeat=5):
+        """初期化
+
+        Parameters
+        ----------
+        repeat : int
+            時間を測る回数
+        """
+        self._repeat = repeat
+
+
+    def run(self):
+        """測ります
+
+        Returns
+        -------
+        result : dict
+            JSON にそのまま書き出せる結果。 compare() に渡せます
+        """
+
+        # インタープリターの起動で読み込むモジュールは、どの場面でも読み込むので除く
+        startup_module_name_set = {module_name for module_name, _, _, _ in StartupBenchmark._import_time('pass')}
+
+        scenario_result_dict = {}
+
+        for scenario_name, scenario in StartupBenchmark.SCENARIO_DICT.items():
+            best_microseconds = None
+            best_entry_list = None
+
+            for _ in range(self._repeat):
+                entry_list = [entry for entry in StartupBenchmark._import_time(scenario['statement']) if entry[0] not in startup_module_name_set]
+
+                # 字下げの無い行の累計が、そのインポート文で読み込んだ時間
+                microseconds = sum([cumulative_microseconds for _, _, cumulative_microseconds, depth in entry_list if depth == 0])
+
+                if best_microseconds is None or microseconds < best_microseconds:
+                    best_microseconds = microseconds
+                    best_entry_list = entry_list
+
+            module_name_set = {module_name for module_name, _, _, _ in best_entry_list}
+
+            scenario_result_dict[scenario_name] = {
+                'statement': scenario['statement'],
+                'seconds': best_microseconds / 1000000,
+                'len_modules': len(best_entry_list),
+                'forbidden_modules': [module_name for module_name in scenario['forbidden_module_list'] if module_name in module_name_set],
+                'slowest_modules': {
+                    module_name: self_microseconds / 1000000 for module_name, self_microseconds, _, _ in sorted(best_entry_list, key=lambda entry: entry[1], reverse=True)[:StartupBenchmark._LEN_SLOWEST_MODULES]
+                },
+            }
+
+        return {
+            'format_version': StartupBenchmark.FORMAT_VERSION,
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+            },
+            'scenarios': scenario_result_dict,
+        }
+
+
+    @staticmethod
+    def _import_time(statement):
+        """新しいプロセスで statement を実行して、 `-X importtime` の出力を読みます
+
+        Returns
+        -------
+        entry_list : list<tuple>
+            読み込んだモジュールごとの、名前、自分の時間（マイクロ秒）、累計時間（マイクロ秒）、字下げの深さ
+        """
+
+        # xltree はこのディレクトリーにある
+        package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        completed_process = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', statement],
+                cwd=package_dir,
+                capture_output=True,
+                text=True)
+
+        if completed_process.returncode != 0:
+            raise RuntimeError(f"{statement=} failed\n{completed_process.stderr}")
+
+        entry_list = []
+
+        for line in completed_process.stderr.splitlines():
+            result = StartupBenchmark._IMPORT_TIME_PATTERN.match(line)
+            if result is None:
+                continue
+
+            # 字下げは２文字ずつ
+            entry_list.append((result.group(4), int(result.group(1)), int(result.group(2)), len(result.group(3)) // 2))
+
+        return entry_list
+
+
+    @staticmethod
+    def compare(baseline_result, current_result, threshold=0.2):
+        """前に測った結果と比べて、遅くなった場面を挙げます。読み込んではいけないモジュールを読み込んだ場面は、基準によらず挙げます
+
+        Parameters
+        ----------
+        baseline_result : dict
+            基準にする結果。省略すると、読み込んではいけないモジュールだけ調べます
+        current_result : dict
+            今回の結果
+        threshold : float
+            基準からこの割合より悪くなったら後退とみなします。 0.2 なら 20%
+
+        Returns
+        -------
+        regression_list : list<str>
+            後退した場面の説明。無ければ空のリスト
+        """
+
+        if baseline_result is not None and baseline_result.get('format_version') != current_result.get('format_version'):
+            raise ValueError(f"format versions differ. {baseline_result.get('format_version')=} {current_result.get('format_version')=}")
+
+        regression_list = []
+
+        for scenario_name, current_scenario in current_result['scenarios'].items():
+            if 0 < len(current_scenario['forbidden_modules']):
+                regression_list.append(f"{scenario_name} imports {', '.join(current_scenario['forbidden_modules'])}")
+
+            if baseline_result is None or scenario_name not in baseline_result['scenarios']:
+                continue
+
+            baseline_seconds = baseline_result['scenarios'][scenario_name]['seconds']
+            current_seconds = current_scenario['seconds']
+
+            if baseline_seconds * (1 + threshold) < current_seconds:
+                if 0 < baseline_seconds:
+                    regression_list.append(f"{scenario_name} seconds: {baseline_seconds} -> {current_seconds} ({current_seconds / baseline_seconds - 1:+.1%})")
+                else:
+                    regression_list.append(f"{scenario_name} seconds: {baseline_seconds} -> {current_seconds}")
+
+        return regression_list
@@ -0,0 +1,182 @@
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl as xl
+import pandas as pd
+
+from xltree import Config
+from xltree.database import TreeTable
+from xltree.workbooks import TreeDrawer, TreeEraser
+
+
+class BenchmarkSuite():
+    """xltree の処理を段階ごとに測ります
+
+    段階は CSV読込（from_csv）、全件走査（for_each）、描画（TreeDrawer）、消しゴム（TreeEraser）、保存（wb.save）です。
+    時間は repeat 回測って一番速いものを採ります。
+    メモリーは tracemalloc を有効にした別の１回で、段階ごとのピークを測ります。 tracemalloc は処理を遅くするので、時間とは別に測ります"""
+
+
+    PHASE_NAME_LIST = ['from_csv', 'for_each', 'draw', 'erase', 'save']
+
+    # 結果の JSON の形式の版
+    FORMAT_VERSION = 1
+
+
+    def __init__(self, generator, repeat=3):
+        """初期化
+
+        Parameters
+        ----------
+        generator : TreeCsvGenerator
+            入力のCSVを作るもの
+        repeat : int
+            時間を測る回数
+        """
+        self._generator = generator
+        self._repeat = repeat
+
+
+    def run(self):
+        """測ります
+
+        Returns
+        -------
+        result : dict
+            JSON にそのまま書き出せる結果。 compare() に渡せます
+        """
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_file_path = os.path.join(temp_dir, 'tree.csv')
+            wb_file_path = os.path.join(temp_dir, 'tree.xlsx')
+
+            self._generator.write(file_path=csv_file_path)
+
+            # 時間
+            seconds_dict = {phase_name: None for phase_name in BenchmarkSuite.PHASE_NAME_LIST}
+            for _ in range(self._repeat):
+                for phase_name, seconds in BenchmarkSuite._run_phases(csv_file_path=csv_file_path, wb_file_path=wb_file_path, on_phase=None).items():
+                    if seconds_dict[phase_name] is None or seconds < seconds_dict[phase_name]:
+                        seconds_dict[phase_name] = seconds
+
+            # メモリー
+            peak_bytes_dict = {}
+
+            def on_phase(phase_name):
+                peak_bytes_dict[phase_name] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.reset_peak()
+
+            tracemalloc.start()
+            try:
+                tracemalloc.reset_peak()
+                BenchmarkSuite._run_phases(csv_file_path=csv_file_path, wb_file_path=wb_file_path, on_phase=on_phase)
+            finally:
+                tracemalloc.stop()
+
+        return {
+            'format_version': BenchmarkSuite.FORMAT_VERSION,
+            'generator': self._generator.parameters,
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'pandas': pd.__version__,
+                'openpyxl': xl.__version__,
+            },
+            'phases': {
+                phase_name: {
+                    'seconds': seconds_dict[phase_name],
+                    'peak_bytes': peak_bytes_dict[phase_name],
+                } for phase_name in BenchmarkSuite.PHASE_NAME_LIST
+            },
+        }
+
+
+    @staticmethod
+    def _run_phases(csv_file_path, wb_file_path, on_phase):
+        """全段階を１回通します
+
+        Parameters
+        ----------
+        on_phase : func
+            段階が終わるたびに、段階の名前を受け取る関数。省略可
+
+        Returns
+        -------
+        seconds_dict : dict
+            段階の名前 → 掛かった秒数
+        """
+
+        seconds_dict = {}
+        start = time.perf_counter()
+
+        def end_phase(phase_name):
+            nonlocal start
+            seconds_dict[phase_name] = time.perf_counter() - start
+
+            if on_phase is not None:
+                on_phase(phase_name)
+
+            start = time.perf_counter()
+
+        tree_table = TreeTable.from_csv(file_path=csv_file_path)
+        end_phase('from_csv')
+
+        tree_table.for_each(on_each=lambda row_number, record: None)
+        end_phase('for_each')
+
+        wb = xl.Workbook()
+        ws = wb.active
+        TreeDrawer(tree_table=tree_table, ws=ws, config=Config()).render()
+        end_phase('draw')
+
+        TreeEraser(tree_table=tree_table, ws=ws).render()
+        end_phase('erase')
+
+        wb.save(wb_file_path)
+        end_phase('save')
+
+        return seconds_dict
+
+
+    @staticmethod
+    def compare(baseline_result, current_result, threshold=0.2):
+        """前に測った結果と比べて、遅くなった段階、メモリーを多く使うようになった段階を挙げます
+
+        Parameters
+        ----------
+        baseline_result : dict
+            基準にする結果
+        current_result : dict
+            今回の結果
+        threshold : float
+            基準からこの割合より悪くなったら後退とみなします。 0.2 なら 20%
+
+        Returns
+        -------
+        regression_list : list<str>
+            後退した段階の説明。無ければ空のリスト
+        """
+
+        if baseline_result.get('format_version') != current_result.get('format_version'):
+            raise ValueError(f"format versions differ. {baseline_result.get('format_version')=} {current_result.get('format_version')=}")
+
+        if baseline_result['generator'] != current_result['generator']:
+            raise ValueError(f"inputs differ. compare results made with the same generator parameters. {baseline_result['generator']=} {current_result['generator']=}")
+
+        regression_list = []
+
+        for phase_name in BenchmarkSuite.PHASE_NAME_LIST:
+            baseline_phase = baseline_result['phases'][phase_name]
+            current_phase = current_result['phases'][phase_name]
+
+            for key in ['seconds', 'peak_bytes']:
+                if baseline_phase[key] * (1 + threshold) < current_phase[key]:
+                    if 0 < baseline_phase[key]:
+                        regression_list.append(f"{phase_name} {key}: {baseline_phase[key]} -> {current_phase[key]} ({current_phase[key] / baseline_phase[key] - 1:+.1%})")
+                    else:
+                        regression_list.append(f"{phase_name} {key}: {baseline_phase[key]} -> {current_phase[key]}")
+
+        return regression_list
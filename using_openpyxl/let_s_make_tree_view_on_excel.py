@@ -5,6 +5,7 @@
 # エクセルで樹形図を描こう
 #
 
+import os
 import traceback
 import datetime
 
@@ -12,6 +13,13 @@ from xltree import Config, Renderer
 
 SHEET_NAME = 'Tree'
 
+# 出力ファイルの拡張子 → 書き出し方
+BACKEND_BY_EXTENSION = {
+    '.txt': Renderer.BACKEND_TEXT,
+    '.html': Renderer.BACKEND_HTML,
+    '.svg': Renderer.BACKEND_SVG,
+}
+
 
 ########################################
 # コマンドから実行時
@@ -31,8 +39,10 @@ Enter the path to the CSV file
 
         wb_file_path = input(f"""\
 
-エクセルのワークブック・ファイルへのパスを入力してください
-Enter the path to the Excel workbook(.xlsx) file
+エクセルのワークブック・ファイルへのパスを入力してください。
+拡張子を .txt, .html, .svg にすると、ワークブックの代わりにその形式で書き出します
+Enter the path to the Excel workbook(.xlsx) file.
+With a .txt, .html or .svg extension, the tree is written in that format instead
 
     Example: ../temp/tree.xlsx
 
@@ -54,8 +64,11 @@ Enter the path to the Excel workbook(.xlsx) file
                     'column_header_separator_height':   13,     # 第２行。空行
                 })
 
+        # 書き出し方は拡張子で選ぶ
+        backend = BACKEND_BY_EXTENSION.get(os.path.splitext(wb_file_path)[1].lower(), Renderer.BACKEND_OPENPYXL)
+
         # レンダラー生成
-        renderer = Renderer(config=config)
+        renderer = Renderer(config=config, backend=backend)
         renderer.render(
                 csv_file_path=csv_file_path,
                 wb_file_path=wb_file_path,
@@ -0,0 +1,81 @@
+import contextlib
+import csv
+import io
+import os
+import tempfile
+import unittest
+
+import openpyxl as xl
+
+from xltree import Renderer
+from xltree.batch import BatchRenderer
+
+
+def _write_tree_csv(file_path, len_records):
+    """根の下に、葉が len_records 個並ぶ CSV を書き出します"""
+
+    with open(file_path, 'w', encoding='utf8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['no', 'node0', 'edge1', 'node1'])
+
+        for no in range(1, len_records + 1):
+            writer.writerow([no, 'Root', '', f'Leaf{no}'])
+
+
+class TestRenderToWorkbook(unittest.TestCase):
+
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+
+        self._small_csv_file_path = os.path.join(self._temp_dir.name, 'small.csv')
+        self._large_csv_file_path = os.path.join(self._temp_dir.name, 'large.csv')
+        self._wb_file_path = os.path.join(self._temp_dir.name, 'all.xlsx')
+
+        _write_tree_csv(file_path=self._small_csv_file_path, len_records=3)
+        _write_tree_csv(file_path=self._large_csv_file_path, len_records=8)
+
+
+    def _render_to_workbook(self, max_workers):
+        batch_renderer = BatchRenderer(renderer=Renderer(max_records_per_sheet=5), max_workers=max_workers)
+        return batch_renderer.render_to_workbook(csv_file_path_list=[self._small_csv_file_path, self._large_csv_file_path], wb_file_path=self._wb_file_path)
+
+
+    def test_oversized_input_is_an_error(self):
+        for max_workers in [None, 2]:
+            result_list = self._render_to_workbook(max_workers=max_workers)
+
+            self.assertIsNone(result_list[0]['error'])
+            self.assertIn('does not fit in one sheet', result_list[1]['error'])
+            self.assertNotIn('sheet_file_path', result_list[0])
+
+            # 収まるシートだけ書き出す
+            wb = xl.load_workbook(self._wb_file_path)
+            self.assertEqual(['small'], wb.sheetnames)
+            self.assertEqual('Leaf3', wb['small']['F9'].value)
+
+
+
+class TestRenderToStdout(unittest.TestCase):
+
+
+    def test_documents_in_order(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_file_path_list = [os.path.join(temp_dir, f'{name}.csv') for name in ['b', 'a']]
+            _write_tree_csv(file_path=csv_file_path_list[0], len_records=2)
+            _write_tree_csv(file_path=csv_file_path_list[1], len_records=1)
+
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                result_list = BatchRenderer(renderer=Renderer(backend=Renderer.BACKEND_TEXT), max_workers=2).render_to_stdout(csv_file_path_list=csv_file_path_list)
+
+            self.assertEqual([None, None], [result['error'] for result in result_list])
+            self.assertEqual(['-', '-'], [result['output_file_path'] for result in result_list])
+
+            # 渡した順に、続けて書き出す
+            self.assertEqual('Root\n├── Leaf1\n└── Leaf2\nRoot\n└── Leaf1\n', stdout.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
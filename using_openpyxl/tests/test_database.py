@@ -0,0 +1,72 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from xltree.database import TreeAdjacencyReader, TreeNode, TreeRecord, TreeTable
+
+
+class TestUpsertRecordOnEncodedTable(unittest.TestCase):
+
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+
+        csv_file_path = os.path.join(temp_dir.name, 't.csv')
+        with open(csv_file_path, 'w', encoding='utf8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['no', 'node0', 'edge1', 'node1', 'edge2', 'node2'])
+            writer.writerow([1, 'Root', '', 'A', '', 'B'])
+            writer.writerow([2, 'Root', '', 'A', 'yes', 'C'])
+
+        self._tree_table = TreeTable.from_csv(file_path=csv_file_path, shall_encode_text=True)
+        self.assertTrue(self._tree_table.is_text_encoded)
+
+
+    def test_insert_keeps_encoding(self):
+        self._tree_table.upsert_record(TreeRecord(no=3, node_list=[
+                TreeNode(edge_text=None, text='Root'),
+                TreeNode(edge_text='new', text='D'),
+                TreeNode(edge_text=None, text='E')]))
+
+        self.assertTrue(self._tree_table.is_text_encoded)
+        self.assertEqual([1, 2, 3], self._tree_table.df.index.tolist())
+
+        record = self._tree_table.record_at(2)
+        self.assertEqual(['Root', 'D', 'E'], [record.node_at(depth_th).text for depth_th in range(3)])
+        self.assertEqual('new', record.node_at(1).edge_text)
+
+
+    def test_update_keeps_encoding(self):
+        self._tree_table.upsert_record(TreeRecord(no=1, node_list=[
+                TreeNode(edge_text=None, text='Root'),
+                TreeNode(edge_text='changed', text='A'),
+                TreeNode(edge_text=None, text='B')]))
+
+        self.assertTrue(self._tree_table.is_text_encoded)
+        self.assertEqual('changed', self._tree_table.record_at(0).node_at(1).edge_text)
+
+
+class TestTreeAdjacencyReader(unittest.TestCase):
+
+
+    @staticmethod
+    def _to_path_list(tree_adjacency_reader):
+        return [[record.node_at(depth_th).text for depth_th in range(record.len_node_list) if record.node_at(depth_th).text is not None] for record in tree_adjacency_reader.iter_records()]
+
+
+    def test_falsy_text_is_kept(self):
+        tree_adjacency_reader = TreeAdjacencyReader([(1, None, None, 'root'), (2, 1, None, 0), (3, 2, 'e', 'child_of_zero'), (4, 1, None, 'b')])
+
+        self.assertEqual([['root', 0, 'child_of_zero'], ['root', 'b']], TestTreeAdjacencyReader._to_path_list(tree_adjacency_reader))
+
+
+    def test_blank_text_with_children_raises(self):
+        for blank_text in [None, '']:
+            with self.assertRaises(ValueError):
+                TreeAdjacencyReader([(1, None, None, 'root'), (2, 1, None, blank_text), (3, 2, None, 'child_of_blank')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import csv
+import os
+import random
+import tempfile
+import unittest
+
+from xltree.database import TreeCsvReader, TreeTable
+from xltree.models import TreeIndex, TreeLayout
+
+
+def _write_tree_csv(file_path, path_list, length_of_nodes):
+    """根からの道のリストを、 no, node0, edge1, node1 ... の CSV に書き出します。辺のテキストは e + ノードのテキスト"""
+
+    column_name_list = ['no', 'node0']
+    for node_th in range(1, length_of_nodes):
+        column_name_list += [f'edge{node_th}', f'node{node_th}']
+
+    with open(file_path, 'w', encoding='utf8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(column_name_list)
+
+        for no, path in enumerate(path_list, 1):
+            row = [no, path[0]]
+            for node_th in range(1, length_of_nodes):
+                if node_th < len(path):
+                    row += [f'e{path[node_th]}', path[node_th]]
+                else:
+                    row += ['', '']
+            writer.writerow(row)
+
+
+class TestTreeIndex(unittest.TestCase):
+
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._csv_file_path = os.path.join(self._temp_dir.name, 't.csv')
+
+
+    def test_links(self):
+        # Root ┬ A ┬ A1
+        #      │   └ A2
+        #      ├ B
+        #      └ C ─ C1
+        _write_tree_csv(
+                file_path=self._csv_file_path,
+                path_list=[['Root', 'A', 'A1'], ['Root', 'A', 'A2'], ['Root', 'B'], ['Root', 'C', 'C1']],
+                length_of_nodes=3)
+
+        tree_index = TreeIndex.from_tree_table(tree_table=TreeTable.from_csv(file_path=self._csv_file_path))
+
+        # 根から深さ優先の順
+        self.assertEqual(['Root', 'A', 'A1', 'A2', 'B', 'C', 'C1'], [tree_index.text_of(node_id) for node_id in range(tree_index.len_nodes)])
+        self.assertEqual([None, 'eA', 'eA1', 'eA2', 'eB', 'eC', 'eC1'], [tree_index.edge_text_of(node_id) for node_id in range(tree_index.len_nodes)])
+        self.assertEqual([0], tree_index.root_id_list)
+        self.assertEqual([[0, 1, 2], [0, 1, 3], [0, 4, -1], [0, 5, 6]], tree_index.node_id_matrix.tolist())
+
+        self.assertEqual([-1, 0, 1, 1, 0, 0, 5], [tree_index.parent_id_of(node_id) for node_id in range(7)])
+        self.assertEqual([1, 2, -1, -1, -1, 6, -1], [tree_index.first_child_id_of(node_id) for node_id in range(7)])
+        self.assertEqual([-1, 4, 3, -1, 5, -1, -1], [tree_index.younger_sibling_id_of(node_id) for node_id in range(7)])
+        self.assertEqual([-1, -1, -1, 2, 1, 4, -1], [tree_index.elder_sibling_id_of(node_id) for node_id in range(7)])
+        self.assertEqual([4, 2, 1, 1, 1, 1, 1], [tree_index.leaf_count_of(node_id) for node_id in range(7)])
+        self.assertEqual([(0, 3), (0, 1), (0, 0), (1, 1), (2, 2), (3, 3), (3, 3)], [tree_index.row_span_of(node_id) for node_id in range(7)])
+
+        self.assertTrue(tree_index.is_ancestor_of(ancestor_id=1, node_id=3))
+        self.assertFalse(tree_index.is_ancestor_of(ancestor_id=1, node_id=4))
+        self.assertFalse(tree_index.is_ancestor_of(ancestor_id=1, node_id=1))
+        self.assertEqual([0, 5, 6], tree_index.get_path_id_list(node_id=6))
+
+
+    def test_same_as_tree_layout(self):
+        generator = random.Random(0)
+        path_list = []
+
+        def append_leaf_paths(path):
+            # 根の子は３個、他の子は０～３個。深さは５層まで
+            if len(path) == 1:
+                len_children = 3
+            elif len(path) == 5:
+                len_children = 0
+            else:
+                len_children = generator.choice([0, 1, 2, 3])
+
+            if len_children == 0:
+                path_list.append(path)
+
+            for child_th in range(len_children):
+                append_leaf_paths(path + [f'n{child_th}'])
+
+        append_leaf_paths(['Root'])
+
+        _write_tree_csv(file_path=self._csv_file_path, path_list=path_list, length_of_nodes=5)
+
+        for shall_encode_text in [False, True]:
+            tree_table = TreeTable.from_csv(file_path=self._csv_file_path, shall_encode_text=shall_encode_text)
+            tree_layout = TreeLayout.from_tree_table(tree_table=tree_table)
+            tree_index = TreeIndex.from_tree_table(tree_table=tree_table)
+
+            self.assertEqual(tree_layout.len_nodes, tree_index.len_nodes)
+
+            for row_number in range(tree_layout.len_records):
+                for depth_th in range(5):
+                    self.assertEqual(
+                            tree_layout.get_kind_of_edge(row_number=row_number, depth_th=depth_th),
+                            tree_index.get_kind_of_edge(row_number=row_number, depth_th=depth_th),
+                            f"{shall_encode_text=}  {row_number=}  {depth_th=}")
+
+        # レコードから作っても同じ
+        tree_csv_reader = TreeCsvReader(file_path=self._csv_file_path)
+        tree_index_by_records = TreeIndex.from_records(records=tree_csv_reader.iter_records(), length_of_nodes=tree_csv_reader.actual_length_of_nodes)
+
+        self.assertEqual(tree_index.node_id_matrix.tolist(), tree_index_by_records.node_id_matrix.tolist())
+        for node_id in range(tree_index.len_nodes):
+            self.assertEqual(
+                    (tree_index.text_of(node_id), tree_index.edge_text_of(node_id), tree_index.leaf_count_of(node_id), tree_index.younger_sibling_id_of(node_id)),
+                    (tree_index_by_records.text_of(node_id), tree_index_by_records.edge_text_of(node_id), tree_index_by_records.leaf_count_of(node_id), tree_index_by_records.younger_sibling_id_of(node_id)))
+
+
+if __name__ == '__main__':
+    unittest.main()
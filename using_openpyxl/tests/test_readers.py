@@ -0,0 +1,63 @@
+import csv
+import os
+import tempfile
+import unittest
+
+import openpyxl as xl
+
+from xltree import Renderer
+from xltree.database import TreeCsvReader, TreeTable
+
+
+class TestCsvReaderParity(unittest.TestCase):
+    """pandas で読む TreeTable と、 pandas を使わない TreeCsvReader が、同じ CSV から同じ値を読むか"""
+
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+
+        # 'NA', 'null' は pandas の既定なら欠損値、全て数に見える node1 列は pandas の既定なら数の列
+        self._csv_file_path = os.path.join(self._temp_dir.name, 't.csv')
+        with open(self._csv_file_path, 'w', encoding='utf8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['no', 'node0', 'edge1', 'node1', 'edge2', 'node2'])
+            writer.writerow([1, 'Root', 'NA', '007', '', 'NA'])
+            writer.writerow([2, 'Root', '', '007', 'null', 'null'])
+            writer.writerow([3, 'Root', '1.50', '10', '', ''])
+            writer.writerow([4, 'Root', '', '2', ' x ', 'N/A'])
+
+
+    @staticmethod
+    def _to_value_list(records):
+        return [(record.no, [(record.node_at(depth_th).edge_text, record.node_at(depth_th).text) for depth_th in range(record.len_node_list)]) for record in records]
+
+
+    def test_same_records(self):
+        tree_table = TreeTable.from_csv(file_path=self._csv_file_path)
+        tree_csv_reader = TreeCsvReader(file_path=self._csv_file_path)
+
+        value_list = TestCsvReaderParity._to_value_list(tree_csv_reader.iter_records())
+        self.assertEqual(value_list, TestCsvReaderParity._to_value_list(tree_table.iter_records()))
+
+        # 書いてあるまま
+        self.assertEqual((1, [(None, 'Root'), ('NA', '007'), (None, 'NA')]), value_list[0])
+        self.assertEqual((3, [(None, 'Root'), ('1.50', '10'), (None, None)]), value_list[2])
+
+
+    def test_same_cells(self):
+        cell_value_list_list = []
+
+        for backend, write_only in [(Renderer.BACKEND_OPENPYXL, False), (Renderer.BACKEND_OPENPYXL, True), (Renderer.BACKEND_SPREADSHEETML, False)]:
+            wb_file_path = os.path.join(self._temp_dir.name, f'{backend}-{write_only}.xlsx')
+            Renderer(backend=backend, write_only=write_only).render(csv_file_path=self._csv_file_path, wb_file_path=wb_file_path, sheet_name='Tree')
+
+            ws = xl.load_workbook(wb_file_path)['Tree']
+            cell_value_list_list.append([row for row in ws.iter_rows(values_only=True)])
+
+        self.assertEqual(cell_value_list_list[0], cell_value_list_list[1])
+        self.assertEqual(cell_value_list_list[0], cell_value_list_list[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from xltree import Renderer
+
+
+def _write_tree_csv(file_path, path_list, length_of_nodes):
+    """根からの道のリストを、 no, node0, edge1, node1 ... の CSV に書き出します"""
+
+    column_name_list = ['no', 'node0']
+    for node_th in range(1, length_of_nodes):
+        column_name_list += [f'edge{node_th}', f'node{node_th}']
+
+    with open(file_path, 'w', encoding='utf8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(column_name_list)
+
+        for no, path in enumerate(path_list, 1):
+            row = [no, path[0]]
+            for node_th in range(1, length_of_nodes):
+                row += ['', path[node_th] if node_th < len(path) else '']
+            writer.writerow(row)
+
+
+class TestShardedWorkbooks(unittest.TestCase):
+
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+
+        self._csv_file_path = os.path.join(self._temp_dir.name, 't.csv')
+        self._wb_file_path = os.path.join(self._temp_dir.name, 't.xlsx')
+
+        # 第1層の部分木が３つ、それぞれ４件
+        _write_tree_csv(
+                file_path=self._csv_file_path,
+                path_list=[['Root', f'A{i}', f'B{i}{j}'] for i in range(3) for j in range(4)],
+                length_of_nodes=3)
+
+        self._renderer = Renderer(
+                backend=Renderer.BACKEND_SPREADSHEETML,
+                cache_dir=os.path.join(self._temp_dir.name, 'cache'),
+                shall_skip_unchanged=True,
+                shard_mode=Renderer.SHARD_WORKBOOKS,
+                max_records_per_sheet=5)
+
+
+    def test_skip_unchanged_checks_every_shard(self):
+        stats = self._renderer.render(csv_file_path=self._csv_file_path, wb_file_path=self._wb_file_path, sheet_name='Tree')
+        self.assertFalse(stats.is_skipped)
+        self.assertLess(1, len(stats.extra_file_path_list))
+
+        # 何も変わっていなければ省く
+        stats = self._renderer.render(csv_file_path=self._csv_file_path, wb_file_path=self._wb_file_path, sheet_name='Tree')
+        self.assertTrue(stats.is_skipped)
+
+        # シャードが１つ消えたら、描き直す
+        shard_file_path = os.path.join(self._temp_dir.name, 't-2.xlsx')
+        os.remove(shard_file_path)
+
+        stats = self._renderer.render(csv_file_path=self._csv_file_path, wb_file_path=self._wb_file_path, sheet_name='Tree')
+        self.assertFalse(stats.is_skipped)
+        self.assertTrue(os.path.exists(shard_file_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
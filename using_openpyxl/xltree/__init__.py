@@ -1,7 +1,48 @@
-import openpyxl as xl
+import importlib
+import os
+import sys
 
-from xltree.database import TreeTable
-from xltree.workbooks import TreeDrawer, TreeEraser
+from xltree.caches import TreeTableCache, RenderResultCache
+from xltree.stats import RenderStats, RenderCancelled
+
+
+# NOTE openpyxl, pandas, NumPy はインポートに時間が掛かるので、 `import xltree` では読み込まず、描画するときに要るものだけ読み込みます。
+#      以前はここでインポートしていた名前も `xltree.TreeTable` のように使えるように、使われたときにモジュールを読み込みます
+#
+# 名前 → 定義しているモジュール
+_LAZY_MODULE_NAME_DICT = {
+    'TreeTable': 'xltree.database',
+    'TreeCsvReader': 'xltree.database',
+    'TreeAdjacencyReader': 'xltree.database',
+    'TextTreeDrawer': 'xltree.documents',
+    'HtmlTreeDrawer': 'xltree.documents',
+    'SvgTreeDrawer': 'xltree.documents',
+    'TreeIndex': 'xltree.models',
+    'TreeLayout': 'xltree.models',
+    'ParallelTreeRenderer': 'xltree.parallel',
+    'SpreadsheetMlSheet': 'xltree.spreadsheetml',
+    'SpreadsheetMlWorkbook': 'xltree.spreadsheetml',
+    'ShardedTreeRenderer': 'xltree.shards',
+    'TreeCsvSorter': 'xltree.sorting',
+    'TreeDrawer': 'xltree.workbooks',
+    'TreeEraser': 'xltree.workbooks',
+    'WriteOnlyTreeDrawer': 'xltree.workbooks',
+    'SpreadsheetMlTreeDrawer': 'xltree.workbooks',
+    'ShardTreeDrawer': 'xltree.workbooks',
+}
+
+
+def __getattr__(name):
+    """まだ読み込んでいない名前を使われたら、定義しているモジュールを読み込みます"""
+
+    if name not in _LAZY_MODULE_NAME_DICT:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_LAZY_MODULE_NAME_DICT[name]), name)
+
+    # 次からはモジュールの属性として見つかる
+    globals()[name] = value
+    return value
 
 
 class Config():
@@ -59,39 +100,474 @@ class Renderer():
     """描画"""
 
 
-    def __init__(self, config=Config()):
-        """初期化"""
+    # 描画の版。同じ入力でも出力が変わるような変更をしたら上げます。 shall_skip_unchanged で、前回の出力を使えるか決めるのに使います
+    VERSION = 2
+
+    # ワークブックの書き出し方
+    BACKEND_OPENPYXL = 'openpyxl'              # openpyxl のセルのオブジェクトを通して書き出す
+    BACKEND_SPREADSHEETML = 'spreadsheetml'    # SpreadsheetML の文字列を直に書き出す
+    BACKEND_TEXT = 'text'                      # ワークブックではなく、 `tree` コマンドのような罫線素片のテキスト
+    BACKEND_HTML = 'html'                      # ワークブックではなく、入れ子のリストの HTML
+    BACKEND_SVG = 'svg'                        # ワークブックではなく、 SVG
+
+    BACKEND_LIST = [BACKEND_OPENPYXL, BACKEND_SPREADSHEETML, BACKEND_TEXT, BACKEND_HTML, BACKEND_SVG]
+
+    # シートに収まらない樹形図の、シャードの置き方。 ShardedTreeRenderer.SHARD_MODE_LIST と同じ
+    SHARD_SHEETS = 'sheets'
+    SHARD_WORKBOOKS = 'workbooks'
+
+    SHARD_MODE_LIST = [SHARD_SHEETS, SHARD_WORKBOOKS]
+
+    # 文書を書き出す backend → 描画するクラスの名前。クラスは xltree.documents にあり、描画するときに読み込みます
+    _DOCUMENT_DRAWER_CLASS_NAME_DICT = {
+        BACKEND_TEXT: 'TextTreeDrawer',
+        BACKEND_HTML: 'HtmlTreeDrawer',
+        BACKEND_SVG: 'SvgTreeDrawer',
+    }
+
+    # cache_dir で、罫線の最終形のスナップショットを、テーブルのスナップショットと区別する
+    _TREE_LAYOUT_VARIANT = 'TreeLayout'
+
+
+    def __init__(self, config=Config(), write_only=False, shall_encode_text=False, max_workers=None, shall_split_sheets=False, backend=BACKEND_OPENPYXL, cache_dir=None, shall_skip_unchanged=False, shard_mode=SHARD_SHEETS, max_records_per_sheet=None, max_depths_per_sheet=None):
+        """初期化
+
+        Parameters
+        ----------
+        config : Config
+            構成
+        write_only : bool
+            真なら、書込み専用のワークブックに上の行から順に書き出します。
+            CSVも TreeCsvReader で１件ずつ読むので、件数が多くてもメモリー使用量が増えません
+        shall_encode_text : bool
+            真なら、テーブルのテキストを共有の辞書の整数コードで持ちます。 TreeTable.from_csv() を参照
+        max_workers : int
+            指定すると、第1層の部分木の境目でテーブルを切り分けて、その数のプロセスで描画します。 ParallelTreeRenderer を参照
+        shall_split_sheets : bool
+            真なら、第1層の部分木ごとにシートを分けます。 max_workers を省略すると CPU の数のプロセスで描画します
+        backend : str
+            ワークブックの書き出し方。 Renderer.BACKEND_LIST のいずれか。
+            'spreadsheetml' なら openpyxl を通さずに、セルの書式を番号で指した SpreadsheetML を上の行から順に書き出します。
+            CSVも TreeCsvReader で１件ずつ読むので、 write_only の指定は要りません。
+            max_workers や shall_split_sheets を指定したときは、いつも 'spreadsheetml' で書き出します。
+            'text', 'html', 'svg' なら、ワークブックの代わりに文書を書き出します。 TreeDocumentDrawer を参照
+        cache_dir : str
+            指定すると、読み込んだテーブルのスナップショットをこのディレクトリーに置いて使い回します。 TreeTable.from_csv() を参照。
+            CSVを TreeCsvReader で１件ずつ読むとき（write_only, 'spreadsheetml', 'text', 'html', 'svg'）は、
+            テーブルの代わりに罫線の最終形（TreeLayout）を置いて、それを求めるための１周を省きます
+        shall_skip_unchanged : bool
+            真なら、CSVファイル、構成、シート名、 Renderer の版と設定が前回と同じで、出力ファイルも前回のままなら、描画を省きます。
+            前回の目録は cache_dir に置くので、 cache_dir も指定してください。 RenderResultCache を参照
+        shard_mode : str
+            樹形図がエクセルのシートの行数、列数に収まらないときの、シャードの置き方。
+            'sheets' なら１つのワークブックのシートに、 'workbooks' ならワークブックに分けます。 ShardedTreeRenderer を参照
+        max_records_per_sheet : int
+            １枚のシートの件数の上限。省略するとエクセルのシートに収まる件数
+        max_depths_per_sheet : int
+            １枚のシートの層の数の上限。省略するとエクセルのシートに収まる層の数
+        """
+
+        if backend not in Renderer.BACKEND_LIST:
+            raise ValueError(f"{backend=} must be one of {Renderer.BACKEND_LIST}")
+
+        if shall_skip_unchanged and cache_dir is None:
+            raise ValueError(f"{shall_skip_unchanged=} requires cache_dir")
+
+        if shard_mode not in Renderer.SHARD_MODE_LIST:
+            raise ValueError(f"{shard_mode=} must be one of {Renderer.SHARD_MODE_LIST}")
+
         self._config = config
+        self._write_only = write_only
+        self._shall_encode_text = shall_encode_text
+        self._max_workers = max_workers
+        self._shall_split_sheets = shall_split_sheets
+        self._backend = backend
+        self._cache_dir = cache_dir
+        self._shall_skip_unchanged = shall_skip_unchanged
+        self._shard_mode = shard_mode
+        self._max_records_per_sheet = max_records_per_sheet
+        self._max_depths_per_sheet = max_depths_per_sheet
+
+
+    @property
+    def config(self):
+        """構成"""
+        return self._config
+
+
+    def render(self, csv_file_path, wb_file_path, sheet_name, on_progress=None, progress_interval=1000):
+        """描画
+
+        Parameters
+        ----------
+        csv_file_path : str
+            CSVファイルパス
+        wb_file_path : str
+            ワークブックのファイルパス。 backend が 'text', 'html', 'svg' なら文書のファイルパスで、
+            None または '-' なら標準出力へ書き出します
+        sheet_name : str
+            シート名。文書なら題
+        on_progress : func
+            進捗のコールバック。 RenderStats を引数に受け取ります。
+            False を返すと描画を止めて RenderCancelled を送出します。ワークブックは保存しません
+        progress_interval : int
+            何件ごとにコールバックを呼び出すか
+
+        Returns
+        -------
+        stats : RenderStats
+            段階（parse, draw, save）ごとの時間、件数、セルの数など。
+            shall_skip_unchanged で描画を省いたときは is_skipped が真で、段階は前回の目録と比べた check だけです
+        """
+
+        stats = RenderStats(on_progress=on_progress, progress_interval=progress_interval)
 
+        # 標準出力へ書き出すときは、前回の出力と比べられない
+        if not self._shall_skip_unchanged or wb_file_path is None or wb_file_path == '-':
+            self._render(csv_file_path=csv_file_path, wb_file_path=wb_file_path, sheet_name=sheet_name, stats=stats)
+            return stats
 
-    def render(self, csv_file_path, wb_file_path, sheet_name):
-        """描画"""
+        render_result_cache = RenderResultCache(cache_dir=self._cache_dir)
+        fingerprint = self._create_fingerprint(sheet_name=sheet_name)
 
-        # ワークブックを生成
-        wb = xl.Workbook()
+        with stats.measure('check'):
+            is_up_to_date = render_result_cache.is_up_to_date(csv_file_path=csv_file_path, output_file_path=wb_file_path, fingerprint=fingerprint)
 
-        # シートを作成
-        wb.create_sheet(sheet_name)
+        if is_up_to_date:
+            stats.is_skipped = True
+            return stats
 
-        # 既存の Sheet シートを削除
-        wb.remove(wb['Sheet'])
+        # 描き直している途中で止まっても、古い目録が残らないようにしておく
+        render_result_cache.forget(output_file_path=wb_file_path)
+
+        self._render(csv_file_path=csv_file_path, wb_file_path=wb_file_path, sheet_name=sheet_name, stats=stats)
+
+        render_result_cache.record(csv_file_path=csv_file_path, output_file_path=wb_file_path, fingerprint=fingerprint, extra_output_file_path_list=stats.extra_file_path_list)
+
+        return stats
+
+
+    def _create_fingerprint(self, sheet_name):
+        """描画の指紋。CSVファイル以外で、出力を決めるもの"""
+        return {
+            'version': Renderer.VERSION,
+            'config': self._config.dictionary,
+            'sheet_name': sheet_name,
+            'backend': self._backend,
+            'write_only': self._write_only,
+            'max_workers': self._max_workers,
+            'shall_split_sheets': self._shall_split_sheets,
+            'shard_mode': self._shard_mode,
+            'max_records_per_sheet': self._max_records_per_sheet,
+            'max_depths_per_sheet': self._max_depths_per_sheet,
+        }
+
+
+    def _render(self, csv_file_path, wb_file_path, sheet_name, stats):
+        """描画。引数は render() を参照"""
+
+        if self._backend in Renderer._DOCUMENT_DRAWER_CLASS_NAME_DICT:
+            self._render_document(csv_file_path=csv_file_path, file_path=wb_file_path, title=sheet_name, stats=stats)
+            return
+
+        if self._max_workers is not None or self._shall_split_sheets:
+            self._render_in_parallel(csv_file_path=csv_file_path, wb_file_path=wb_file_path, sheet_name=sheet_name, stats=stats)
+            return
+
+        if self._backend == Renderer.BACKEND_SPREADSHEETML:
+            self._render_spreadsheetml(csv_file_path=csv_file_path, wb_file_path=wb_file_path, sheet_name=sheet_name, stats=stats)
+            return
+
+        if self._write_only:
+            self._render_write_only(csv_file_path=csv_file_path, wb_file_path=wb_file_path, sheet_name=sheet_name, stats=stats)
+            return
+
+        import openpyxl as xl
+        from xltree.database import TreeTable
+        from xltree.workbooks import TreeDrawer
 
         # CSV読込
-        tree_table = TreeTable.from_csv(file_path=csv_file_path)
+        with stats.measure('parse'):
+            tree_table = TreeTable.from_csv(file_path=csv_file_path, shall_encode_text=self._shall_encode_text, cache_dir=self._cache_dir)
+            stats.len_records_total = len(tree_table.df)
 
-        # ツリードロワーを用意、描画（都合上、要らない罫線が付いています）
-        tree_drawer = TreeDrawer(tree_table=tree_table, ws=wb[sheet_name], config=self._config)
-        tree_drawer.render()
+        # シートに収まらなければ切り分ける
+        if self._is_sharding_needed(len_records=stats.len_records_total, length_of_nodes=tree_table.actual_length_of_nodes):
+            self._render_shards(tree_table=tree_table, tree_layout=None, wb_file_path=wb_file_path, sheet_name=sheet_name, stats=stats)
+            return
+
+        with stats.measure('draw'):
+            # ワークブックを生成
+            wb = xl.Workbook()
+
+            # シートを作成
+            wb.create_sheet(sheet_name)
+
+            # 既存の Sheet シートを削除
+            wb.remove(wb['Sheet'])
 
+            # ツリードロワーを用意、描画。罫線は最終形で描くので、消しゴム（TreeEraser）は要らない
+            tree_drawer = TreeDrawer(tree_table=tree_table, ws=wb[sheet_name], config=self._config, stats=stats)
+            tree_drawer.render()
 
-        # 要らない罫線を消す
-        # DEBUG_TIPS: このコードを不活性にして、必要な線は全部描かれていることを確認してください
-        if True:
-            tree_eraser = TreeEraser(tree_table=tree_table, ws=wb[sheet_name])
-            tree_eraser.render()
-        else:
-            print(f"Eraser disabled")
+        # ワークブックの保存
+        with stats.measure('save'):
+            wb.save(wb_file_path)
+
+
+    def render_incrementally(self, csv_file_path, wb_file_path, sheet_name, changed_no_list):
+        """描画済みのワークブックを開いて、変わった件とその影響を受ける件だけ描き直します。 TreeDrawer.redraw() を参照
+
+        NOTE ワークブックの読込みと保存には、件数に比例した時間が掛かります。描画の手間だけが変わった件数に比例します
+
+        Parameters
+        ----------
+        csv_file_path : str
+            更新後のCSVファイルパス
+        wb_file_path : str
+            更新前のCSVを描画したワークブックのファイルパス。上書きします
+        sheet_name : str
+            シート名
+        changed_no_list : list<int>
+            更新または挿入された件の no
+
+        Returns
+        -------
+        redrawn_row_number_list : list<int>
+            描き直した件の、0から始まる行番号
+        """
 
+        import openpyxl as xl
+        from xltree.database import TreeTable
+        from xltree.workbooks import TreeDrawer
+
+        # ワークブックを開く
+        wb = xl.load_workbook(wb_file_path)
+
+        # CSV読込
+        tree_table = TreeTable.from_csv(file_path=csv_file_path, shall_encode_text=self._shall_encode_text, cache_dir=self._cache_dir)
+
+        # 変わったところだけ描き直す
+        tree_drawer = TreeDrawer(tree_table=tree_table, ws=wb[sheet_name], config=self._config)
+        redrawn_row_number_list = tree_drawer.redraw(changed_no_list=changed_no_list)
 
         # ワークブックの保存
         wb.save(wb_file_path)
+
+        return redrawn_row_number_list
+
+
+    def _render_in_parallel(self, csv_file_path, wb_file_path, sheet_name, stats):
+        """プロセスを分けて描画"""
+
+        from xltree.database import TreeTable
+        from xltree.parallel import ParallelTreeRenderer
+
+        # CSV読込
+        with stats.measure('parse'):
+            tree_table = TreeTable.from_csv(file_path=csv_file_path, shall_encode_text=self._shall_encode_text, cache_dir=self._cache_dir)
+            stats.len_records_total = len(tree_table.df)
+
+        # シートに収まらなければ、プロセスは分けずに切り分ける
+        if self._is_sharding_needed(len_records=stats.len_records_total, length_of_nodes=tree_table.actual_length_of_nodes):
+            self._render_shards(tree_table=tree_table, tree_layout=None, wb_file_path=wb_file_path, sheet_name=sheet_name, stats=stats)
+            return
+
+        # 描画して、ワークブックを保存
+        ParallelTreeRenderer(
+                tree_table=tree_table,
+                config=self._config,
+                max_workers=self._max_workers,
+                shall_split_sheets=self._shall_split_sheets).render(wb_file_path=wb_file_path, sheet_name=sheet_name, stats=stats)
+
+
+    def _render_write_only(self, csv_file_path, wb_file_path, sheet_name, stats):
+        """書込み専用のワークブックへ描画"""
+
+        import openpyxl as xl
+        from xltree.database import TreeCsvReader
+        from xltree.workbooks import WriteOnlyTreeDrawer
+
+        # CSVは pandas で読み込まず、１件ずつ流し込む。罫線の最終形を求めるのに１周読む
+        with stats.measure('parse'):
+            tree_table = TreeCsvReader(file_path=csv_file_path)
+            tree_layout = self._create_tree_layout(csv_file_path=csv_file_path, tree_table=tree_table)
+            stats.len_records_total = tree_layout.len_records
+
+        # シートに収まらなければ切り分ける
+        if self._is_sharding_needed(len_records=stats.len_records_total, length_of_nodes=tree_table.actual_length_of_nodes):
+            self._render_shards(tree_table=tree_table, tree_layout=tree_layout, wb_file_path=wb_file_path, sheet_name=sheet_name, stats=stats)
+            return
+
+        with stats.measure('draw'):
+            # ワークブックを生成。書込み専用のワークブックには既存の Sheet シートは無い
+            wb = xl.Workbook(write_only=True)
+
+            # シートを作成
+            ws = wb.create_sheet(sheet_name)
+
+            # 罫線は最終形で書き出すので、消しゴムは要らない
+            tree_drawer = WriteOnlyTreeDrawer(tree_table=tree_table, ws=ws, config=self._config, tree_layout=tree_layout, stats=stats)
+            tree_drawer.render()
+
+        # ワークブックの保存
+        with stats.measure('save'):
+            wb.save(wb_file_path)
+
+
+    def _render_spreadsheetml(self, csv_file_path, wb_file_path, sheet_name, stats):
+        """openpyxl を通さずに、 SpreadsheetML を直に書き出す"""
+
+        from xltree.database import TreeCsvReader
+        from xltree.spreadsheetml import SpreadsheetMlSheet, SpreadsheetMlWorkbook
+        from xltree.workbooks import SpreadsheetMlTreeDrawer
+
+        # CSVは pandas で読み込まず、１件ずつ流し込む。罫線の最終形を求めるのに１周読む
+        with stats.measure('parse'):
+            tree_table = TreeCsvReader(file_path=csv_file_path)
+            tree_layout = self._create_tree_layout(csv_file_path=csv_file_path, tree_table=tree_table)
+            stats.len_records_total = tree_layout.len_records
+
+        # シートに収まらなければ切り分ける
+        if self._is_sharding_needed(len_records=stats.len_records_total, length_of_nodes=tree_table.actual_length_of_nodes):
+            self._render_shards(tree_table=tree_table, tree_layout=tree_layout, wb_file_path=wb_file_path, sheet_name=sheet_name, stats=stats)
+            return
+
+        styles = SpreadsheetMlTreeDrawer.create_styles()
+        wb = SpreadsheetMlWorkbook(file_path=wb_file_path, styles=styles)
+
+        try:
+            # 描いた行はすぐにファイルへ書き出すので、書き出しは描画の段階に含める
+            with stats.measure('draw'):
+                sheet = SpreadsheetMlSheet(styles=styles)
+
+                tree_drawer = SpreadsheetMlTreeDrawer(tree_table=tree_table, ws=sheet, config=self._config, tree_layout=tree_layout, stats=stats)
+                tree_drawer.render_header()
+
+                wb.write_sheet(sheet_name=sheet_name, xml_iterable=sheet.iter_xml(row_xml_iterable=tree_drawer.iter_row_xml()))
+
+        except BaseException:
+            # 止めたときや失敗したときは、書きかけのファイルを残さない
+            wb.discard()
+            raise
+
+        with stats.measure('save'):
+            wb.close()
+
+
+    def _is_sharding_needed(self, len_records, length_of_nodes):
+        """樹形図が１枚のシートに収まらないか？"""
+
+        from xltree.shards import ShardedTreeRenderer
+
+        return ShardedTreeRenderer.is_needed(len_records=len_records, length_of_nodes=length_of_nodes, **self._get_shard_limit_dict())
+
+
+    def _get_shard_limit_dict(self):
+        """指定された、１枚のシートの件数と層の数の上限"""
+
+        shard_limit_dict = {}
+
+        if self._max_records_per_sheet is not None:
+            shard_limit_dict['max_records_per_sheet'] = self._max_records_per_sheet
+
+        if self._max_depths_per_sheet is not None:
+            shard_limit_dict['max_depths_per_sheet'] = self._max_depths_per_sheet
+
+        return shard_limit_dict
+
+
+    def _render_shards(self, tree_table, tree_layout, wb_file_path, sheet_name, stats):
+        """シートに収まらない樹形図を、シャードに切り分けて描画。いつも SpreadsheetML で書き出します"""
+
+        from xltree.models import TreeLayout
+        from xltree.shards import ShardedTreeRenderer
+
+        if tree_layout is None:
+            with stats.measure('parse'):
+                tree_layout = TreeLayout.from_tree_table(tree_table=tree_table)
+
+        shard_list = ShardedTreeRenderer(
+                tree_table=tree_table,
+                tree_layout=tree_layout,
+                config=self._config,
+                shard_mode=self._shard_mode,
+                **self._get_shard_limit_dict()).render(wb_file_path=wb_file_path, sheet_name=sheet_name, stats=stats)
+
+        # シャードごとのワークブックも、 shall_skip_unchanged で前回のままか調べる
+        stats.extra_file_path_list = [shard['file_path'] for shard in shard_list if shard['file_path'] != wb_file_path]
+
+
+    def _render_document(self, csv_file_path, file_path, title, stats):
+        """ワークブックの代わりに、テキストの文書を書き出す。 openpyxl も pandas も読み込みません"""
+
+        from xltree import documents
+        from xltree.database import TreeCsvReader
+
+        drawer_class = getattr(documents, Renderer._DOCUMENT_DRAWER_CLASS_NAME_DICT[self._backend])
+
+        def render(file):
+            # CSVは pandas で読み込まず、１件ずつ流し込む。罫線の最終形を求めるのに１周読む
+            with stats.measure('parse'):
+                tree_table = TreeCsvReader(file_path=csv_file_path)
+                tree_layout = self._load_tree_layout(csv_file_path=csv_file_path)
+
+                tree_drawer = drawer_class(tree_table=tree_table, file=file, title=title, tree_layout=tree_layout, stats=stats)
+                tree_drawer.prepare()
+
+                if tree_layout is None:
+                    self._save_tree_layout(csv_file_path=csv_file_path, tree_layout=tree_drawer.tree_layout)
+
+                stats.len_records_total = tree_drawer.tree_layout.len_records
+
+            # 書いたものはすぐ流すので、保存の段階は無い
+            with stats.measure('draw'):
+                tree_drawer.render()
+                file.flush()
+
+        # 標準出力
+        if file_path is None or file_path == '-':
+            render(file=sys.stdout)
+            return
+
+        try:
+            with open(file_path, 'w', encoding='utf8') as f:
+                render(file=f)
+
+        except BaseException:
+            # 止めたときや失敗したときは、書きかけのファイルを残さない
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+
+
+    def _create_tree_layout(self, csv_file_path, tree_table):
+        """罫線の最終形。 cache_dir にあればそれを使い、無ければレコードを１周読んで求めます"""
+
+        from xltree.models import TreeLayout
+
+        tree_layout = self._load_tree_layout(csv_file_path=csv_file_path)
+
+        if tree_layout is None:
+            tree_layout = TreeLayout.from_records(records=tree_table.iter_records(), length_of_nodes=tree_table.actual_length_of_nodes)
+            self._save_tree_layout(csv_file_path=csv_file_path, tree_layout=tree_layout)
+
+        return tree_layout
+
+
+    def _load_tree_layout(self, csv_file_path):
+        """cache_dir にある罫線の最終形。無いか古ければ None"""
+
+        if self._cache_dir is None:
+            return None
+
+        return TreeTableCache(cache_dir=self._cache_dir).load(file_path=csv_file_path, variant=Renderer._TREE_LAYOUT_VARIANT)
+
+
+    def _save_tree_layout(self, csv_file_path, tree_layout):
+        """罫線の最終形を cache_dir に置きます"""
+
+        if self._cache_dir is None:
+            return
+
+        TreeTableCache(cache_dir=self._cache_dir).save(file_path=csv_file_path, snapshot=tree_layout, variant=Renderer._TREE_LAYOUT_VARIANT)
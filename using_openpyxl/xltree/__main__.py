@@ -0,0 +1,211 @@
+#
+# cd using_openpyxl
+# python -m xltree ../temp/csv/*.csv --output-dir ../temp/trees --backend spreadsheetml -j 4
+# python -m xltree ../temp/csv/*.csv --workbook ../temp/trees.xlsx -j 4
+# cat tree.csv | python -m xltree --format text
+# python -m xltree ../temp/unordered.csv --sort --drop-duplicates --renumber --output-dir ../temp/trees
+#
+# たくさんのCSVファイルを、コマンド１つで樹形図にしよう
+#
+
+import argparse
+import glob
+import os
+import shutil
+import sys
+import tempfile
+
+from xltree import Config, Renderer
+from xltree.batch import BatchRenderer
+from xltree.sorting import TreeCsvSorter
+
+
+# 書式 → 拡張子
+_EXTENSION_BY_FORMAT = {
+    'xlsx': '.xlsx',
+    Renderer.BACKEND_TEXT: '.txt',
+    Renderer.BACKEND_HTML: '.html',
+    Renderer.BACKEND_SVG: '.svg',
+}
+
+# ワークブックの書き出し方
+_WORKBOOK_BACKEND_LIST = [Renderer.BACKEND_OPENPYXL, Renderer.BACKEND_SPREADSHEETML]
+
+# 標準入力、標準出力を表すファイルパス
+_STANDARD_STREAM = '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m xltree', description='CSVファイルを樹形図に描画します')
+
+    # 入力
+    parser.add_argument('inputs', nargs='*', default=[_STANDARD_STREAM], help=f"CSVファイルパス、または glob のパターン（例： 'data/**/*.csv'）。 '{_STANDARD_STREAM}' か省略で標準入力")
+
+    # 出力
+    parser.add_argument('-o', '--output-dir', help='CSVファイルごとに、ここへ <CSVファイル名>.<拡張子> を書き出します')
+    parser.add_argument('-w', '--workbook', help=f"CSVファイルごとに１枚のシートにして、このワークブックへまとめて書き出します。 '{_STANDARD_STREAM}' で標準出力")
+    parser.add_argument('-f', '--format', choices=list(_EXTENSION_BY_FORMAT.keys()), default='xlsx', help='出力の書式。 --output-dir も --workbook も無ければ標準出力へ書き出します')
+
+    # Renderer の設定
+    parser.add_argument('--backend', choices=_WORKBOOK_BACKEND_LIST, default=Renderer.BACKEND_OPENPYXL, help="xlsx の書き出し方。 --workbook では、いつも 'spreadsheetml' です")
+    parser.add_argument('--write-only', action='store_true', help='書込み専用のワークブックに書き出します')
+    parser.add_argument('--encode-text', action='store_true', help='テーブルのテキストを整数コードで持ちます')
+    parser.add_argument('--cache-dir', help='読み込んだテーブルや罫線の最終形を置いて使い回すディレクトリー')
+    parser.add_argument('--skip-unchanged', action='store_true', help='前回から何も変わっていないファイルは描画を省きます。 --cache-dir も指定してください')
+    parser.add_argument('--shard-mode', choices=Renderer.SHARD_MODE_LIST, default=Renderer.SHARD_SHEETS, help="エクセルのシートに収まらない樹形図を、シート（'sheets'）とワークブック（'workbooks'）のどちらに切り分けるか。 --output-dir で使います")
+
+    # 並べ替え
+    sort_group = parser.add_argument_group('sort', '順の分からないCSVファイルを、描画する前に根からの道の順に並べ替えます')
+    sort_group.add_argument('--sort', action='store_true', help='並べ替えます。メモリーに持つのは --sort-run-size 件までです')
+    sort_group.add_argument('--drop-duplicates', action='store_true', help='根からの道が同じ件は、最初の件だけ残します。 --sort も指定してください')
+    sort_group.add_argument('--renumber', action='store_true', help='no を並べ替えた後の順に振り直します。 --sort も指定してください')
+    sort_group.add_argument('--sort-run-size', type=int, default=TreeCsvSorter.DEFAULT_MAX_RECORDS_PER_RUN, help='一度にメモリーで並べ替える件数')
+
+    # 構成。 Config の既定のディクショナリーのキーごとに、例えば --node-width
+    config_group = parser.add_argument_group('config', '構成。省略すると既定値')
+    for key, value in Config().dictionary.items():
+        config_group.add_argument(f"--{key.replace('_', '-')}", dest=key, type=type(value), help=f'既定値 {value}')
+
+    # 並列
+    parser.add_argument('-j', '--jobs', type=int, help='CSVファイルを並列に描画するプロセスの数。省略すると、このプロセスで１つずつ描画します')
+
+    parser.add_argument('-q', '--quiet', action='store_true', help='ファイルごとの結果を標準エラー出力へ書きません')
+
+    args = parser.parse_args()
+
+    if args.output_dir is not None and args.workbook is not None:
+        parser.error('--output-dir and --workbook cannot be used together')
+
+    if args.workbook is not None and args.format != 'xlsx':
+        parser.error(f"--workbook requires --format xlsx. {args.format=}")
+
+    if args.skip_unchanged and args.cache_dir is None:
+        parser.error('--skip-unchanged requires --cache-dir')
+
+    if args.jobs is not None and args.jobs < 1:
+        parser.error(f"--jobs must be 1 or more. {args.jobs=}")
+
+    if (args.drop_duplicates or args.renumber) and not args.sort:
+        parser.error('--drop-duplicates and --renumber require --sort')
+
+    if args.sort_run_size < 1:
+        parser.error(f"--sort-run-size must be 1 or more. {args.sort_run_size=}")
+
+    sorter = None
+    if args.sort:
+        sorter = TreeCsvSorter(max_records_per_run=args.sort_run_size, shall_drop_duplicates=args.drop_duplicates, shall_renumber=args.renumber)
+
+    config = Config(dictionary={key: getattr(args, key) for key in Config().dictionary.keys() if getattr(args, key) is not None})
+
+    renderer = Renderer(
+            config=config,
+            write_only=args.write_only,
+            shall_encode_text=args.encode_text,
+            backend=args.backend if args.format == 'xlsx' else args.format,
+            cache_dir=args.cache_dir,
+            shall_skip_unchanged=args.skip_unchanged,
+            shard_mode=args.shard_mode)
+
+    # 標準入力は一時ディレクトリーに書き出してから読む。ファイル名がシート名になる
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_file_path_list = _expand_inputs(parser=parser, input_list=args.inputs, temp_dir=temp_dir)
+
+        def on_result(result):
+            _report(result=result, is_quiet=args.quiet)
+
+        batch_renderer = BatchRenderer(renderer=renderer, max_workers=args.jobs, sorter=sorter)
+
+        if args.workbook is not None:
+            wb_file_path = args.workbook if args.workbook != _STANDARD_STREAM else os.path.join(temp_dir, 'stdout.xlsx')
+            result_list = batch_renderer.render_to_workbook(csv_file_path_list=csv_file_path_list, wb_file_path=wb_file_path, on_result=on_result)
+
+            if args.workbook == _STANDARD_STREAM and os.path.exists(wb_file_path):
+                _copy_to_stdout(file_path=wb_file_path)
+
+        elif args.output_dir is not None:
+            result_list = batch_renderer.render_to_directory(csv_file_path_list=csv_file_path_list, output_dir=args.output_dir, extension=_EXTENSION_BY_FORMAT[args.format], on_result=on_result)
+
+        # 標準出力
+        elif args.format != 'xlsx':
+            result_list = batch_renderer.render_to_stdout(csv_file_path_list=csv_file_path_list, on_result=on_result)
+
+        else:
+            if len(csv_file_path_list) != 1:
+                parser.error(f"writing xlsx to stdout requires exactly one input. use --workbook {_STANDARD_STREAM} to write many. {len(csv_file_path_list)=}")
+
+            result_list = BatchRenderer(renderer=renderer, sorter=sorter).render_to_directory(csv_file_path_list=csv_file_path_list, output_dir=temp_dir, extension=_EXTENSION_BY_FORMAT[args.format], on_result=on_result)
+
+            if result_list[0]['error'] is None:
+                _copy_to_stdout(file_path=result_list[0]['output_file_path'])
+
+    if any([result['error'] is not None for result in result_list]):
+        return 1
+
+    return 0
+
+
+def _expand_inputs(parser, input_list, temp_dir):
+    """glob のパターンを展開したCSVファイルパスのリスト。 '-' は標準入力を書き出した一時ファイル
+
+    NOTE Windows のコマンドプロンプトはパターンを展開しないので、ここで展開します"""
+
+    csv_file_path_list = []
+
+    for input_text in input_list:
+        if input_text == _STANDARD_STREAM:
+            csv_file_path = os.path.join(temp_dir, 'stdin.csv')
+            if os.path.exists(csv_file_path):
+                parser.error(f"'{_STANDARD_STREAM}' can be given only once")
+
+            with open(csv_file_path, 'wb') as f:
+                shutil.copyfileobj(sys.stdin.buffer, f)
+
+            csv_file_path_list.append(csv_file_path)
+            continue
+
+        if os.path.exists(input_text):
+            csv_file_path_list.append(input_text)
+            continue
+
+        matched_file_path_list = sorted(glob.glob(input_text, recursive=True))
+        if len(matched_file_path_list) == 0:
+            parser.error(f"no such file. {input_text=}")
+
+        csv_file_path_list.extend(matched_file_path_list)
+
+    return csv_file_path_list
+
+
+def _report(result, is_quiet):
+    """ファイルごとの結果を、標準エラー出力へ書きます。失敗は is_quiet でも書きます"""
+
+    if result['error'] is not None:
+        print(f"{result['csv_file_path']}: failed\n{result['error']}", file=sys.stderr)
+        return
+
+    if is_quiet:
+        return
+
+    # ワークブックへまとめて書き出すなら、シート名
+    output = result['sheet_name'] if 'sheet_name' in result else result['output_file_path']
+
+    stats = result['stats']
+    if stats['is_skipped']:
+        print(f"{result['csv_file_path']} -> {output}: skipped", file=sys.stderr)
+        return
+
+    phase_text = ', '.join(f"{phase_name}={seconds:.3f}s" for phase_name, seconds in stats['seconds_by_phase'].items())
+    print(f"{result['csv_file_path']} -> {output}: {phase_text}, records={stats['len_records']}", file=sys.stderr)
+
+
+def _copy_to_stdout(file_path):
+    sys.stdout.flush()
+
+    with open(file_path, 'rb') as f:
+        shutil.copyfileobj(f, sys.stdout.buffer)
+
+    sys.stdout.buffer.flush()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,306 @@
+import concurrent.futures
+import contextlib
+import os
+import tempfile
+import traceback
+
+from xltree.stats import RenderStats
+
+
+class BatchRenderer():
+    """たくさんのCSVファイルを、１つのプロセスでまとめて描画します。
+    インポートや Renderer の用意は１回だけで、 max_workers を指定すればファイルごとにワーカープロセスで描画します。
+    １ファイルずつコマンドを起動して描画するより、ずっと速く済みます
+
+    どちらの書き出し方でも、ファイルごとの結果を辞書で返します。
+    ファイルが１つ失敗しても止めずに、結果の error に書いて残りのファイルを描画します"""
+
+
+    def __init__(self, renderer, max_workers=None, sorter=None):
+        """初期化
+
+        Parameters
+        ----------
+        renderer : Renderer
+            ファイルごとに使うレンダラー。ワーカープロセスへは１回だけ渡します
+        max_workers : int
+            ワーカープロセスの数。省略すると、このプロセスで１つずつ描画します
+        sorter : TreeCsvSorter
+            指定すると、CSVファイルを描画する前に一時ファイルへ並べ替えます。並べ替えもワーカープロセスで行います
+        """
+        self._renderer = renderer
+        self._max_workers = max_workers
+        self._sorter = sorter
+
+
+    def render_to_directory(self, csv_file_path_list, output_dir, extension, on_result=None):
+        """CSVファイルごとに、 output_dir へ <CSVファイル名><extension> を書き出します
+
+        Parameters
+        ----------
+        csv_file_path_list : list<str>
+            CSVファイルパスのリスト
+        output_dir : str
+            書き出すディレクトリー。無ければ作ります
+        extension : str
+            書き出すファイルの拡張子。例： '.xlsx'
+        on_result : func
+            ファイルを１つ描画し終えるたびに、結果の辞書を受け取る関数。省略可
+
+        Returns
+        -------
+        result_list : list<dict>
+            ファイルごとの結果。 csv_file_path_list と同じ順です。
+            csv_file_path, output_file_path, stats（RenderStats.to_dict()）, error（失敗していなければ None）
+        """
+
+        os.makedirs(output_dir, exist_ok=True)
+
+        # 違うディレクトリーに同じ名前のCSVファイルがあっても、上書きし合わないようにする
+        output_file_path_list = []
+        used_name_set = set()
+        for csv_file_path in csv_file_path_list:
+            name = _create_unique_name(base_name=_get_stem(csv_file_path), used_name_set=used_name_set)
+            output_file_path_list.append(os.path.join(output_dir, name + extension))
+
+        return self._map(
+                function=_render_file,
+                argument_list=list(zip(csv_file_path_list, output_file_path_list)),
+                on_result=on_result)
+
+
+    def render_to_stdout(self, csv_file_path_list, on_result=None):
+        """CSVファイルごとの文書を、渡した順に標準出力へ続けて書き出します。
+        レンダラーの backend は 'text', 'html', 'svg' のような文書の書式にしてください。
+        書き出す順が入れ替わらないように、 max_workers を指定していても、このプロセスで１つずつ描画します
+
+        Parameters
+        ----------
+        csv_file_path_list : list<str>
+            CSVファイルパスのリスト
+        on_result : func
+            render_to_directory() を参照
+
+        Returns
+        -------
+        result_list : list<dict>
+            render_to_directory() を参照。 output_file_path は '-' です
+        """
+
+        _initialize_worker(renderer=self._renderer, sorter=self._sorter)
+
+        result_list = []
+        for csv_file_path in csv_file_path_list:
+            # 一時ファイルを介さず、レンダラーが標準出力へ直に書く
+            result = _render_file(csv_file_path=csv_file_path, output_file_path='-')
+
+            if on_result is not None:
+                on_result(result)
+            result_list.append(result)
+
+        return result_list
+
+
+    def render_to_workbook(self, csv_file_path_list, wb_file_path, on_result=None):
+        """CSVファイルごとに１枚のシートにして、１つのワークブックへ書き出します。シート名はCSVファイル名です。
+        シートは openpyxl を通さずに SpreadsheetML で書き出すので、レンダラーの backend は使いません
+
+        ワーカーはシートの XML を一時ファイルへ書き出し、このプロセスはそれを少しずつワークブックへ書き写します。
+        シートを丸ごと文字列にしてプロセス間で受け渡さないので、大きなシートでもメモリーに溜まりません。
+        １枚のシートに収まらないCSVファイルは、シャードに切り分けずに失敗として error に書きます。 render_to_directory() なら切り分けて描画します
+
+        Parameters
+        ----------
+        csv_file_path_list : list<str>
+            CSVファイルパスのリスト
+        wb_file_path : str
+            ワークブックのファイルパス
+        on_result : func
+            render_to_directory() を参照
+
+        Returns
+        -------
+        result_list : list<dict>
+            render_to_directory() を参照。 output_file_path の代わりに sheet_name があります
+        """
+
+        # NOTE openpyxl を読み込むので、ワークブックへまとめて書き出すときだけインポートします
+        from xltree.parallel import ParallelTreeRenderer
+        from xltree.spreadsheetml import SpreadsheetMlWorkbook
+        from xltree.workbooks import SpreadsheetMlTreeDrawer
+
+        sheet_name_list = []
+        used_sheet_name_set = set()
+        for csv_file_path in csv_file_path_list:
+            sheet_name_list.append(ParallelTreeRenderer._create_sheet_name(text=_get_stem(csv_file_path), used_sheet_name_set=used_sheet_name_set))
+
+        wb = SpreadsheetMlWorkbook(file_path=wb_file_path, styles=SpreadsheetMlTreeDrawer.create_styles())
+
+        def on_sheet_result(result):
+            # 描けたシートから順に、ワークブックへ書き写して、一時ファイルはすぐに消す。失敗したシートは飛ばす
+            sheet_file_path = result.pop('sheet_file_path')
+            if result['error'] is None:
+                wb.write_sheet_file(sheet_name=result['sheet_name'], xml_file_path=sheet_file_path)
+                os.remove(sheet_file_path)
+
+            if on_result is not None:
+                on_result(result)
+
+        try:
+            with tempfile.TemporaryDirectory(prefix='xltree-sheets-') as temp_dir:
+                sheet_file_path_list = [os.path.join(temp_dir, f'sheet{sheet_th}.xml') for sheet_th in range(1, len(csv_file_path_list) + 1)]
+
+                result_list = self._map(
+                        function=_render_sheet,
+                        argument_list=list(zip(csv_file_path_list, sheet_name_list, sheet_file_path_list)),
+                        on_result=on_sheet_result)
+
+        except BaseException:
+            # 書きかけのファイルを残さない
+            wb.discard()
+            raise
+
+        # シートが１枚も無いワークブックは開けないので、残さない
+        if all([result['error'] is not None for result in result_list]):
+            wb.discard()
+        else:
+            wb.close()
+
+        return result_list
+
+
+    def _map(self, function, argument_list, on_result):
+        """引数ごとに function を呼び出して、結果を順に返します"""
+
+        result_list = []
+
+        def append_result(result):
+            if on_result is not None:
+                on_result(result)
+            result_list.append(result)
+
+        if self._max_workers is None:
+            _initialize_worker(renderer=self._renderer, sorter=self._sorter)
+            for argument in argument_list:
+                append_result(function(*argument))
+
+            return result_list
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self._max_workers, initializer=_initialize_worker, initargs=(self._renderer, self._sorter)) as executor:
+            # 終わった順ではなく、渡した順に返ってくる
+            for result in executor.map(function, *zip(*argument_list)):
+                append_result(result)
+
+        return result_list
+
+
+def _get_stem(file_path):
+    """拡張子を除いたファイル名"""
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+
+def _create_unique_name(base_name, used_name_set):
+    """重複しないファイル名。ファイル名は大文字と小文字を区別しないことがあるので、区別しないで比べます"""
+
+    name = base_name
+    suffix_th = 2
+    while name.lower() in used_name_set:
+        name = f'{base_name} ({suffix_th})'
+        suffix_th += 1
+
+    used_name_set.add(name.lower())
+    return name
+
+
+#####################
+# MARK: Worker process
+#####################
+
+# ワーカープロセスの中で使う、レンダラーと並べ替え
+_worker_renderer = None
+_worker_sorter = None
+
+
+def _initialize_worker(renderer, sorter):
+    global _worker_renderer, _worker_sorter
+    _worker_renderer = renderer
+    _worker_sorter = sorter
+
+
+@contextlib.contextmanager
+def _open_sorted(csv_file_path):
+    """並べ替えるなら、同じファイル名の一時ファイルへ並べ替えて、そのパスを返します"""
+
+    if _worker_sorter is None:
+        yield csv_file_path
+        return
+
+    with tempfile.TemporaryDirectory(prefix='xltree-sorted-') as temp_dir:
+        sorted_csv_file_path = os.path.join(temp_dir, os.path.basename(csv_file_path))
+        _worker_sorter.sort(csv_file_path=csv_file_path, output_file_path=sorted_csv_file_path)
+        yield sorted_csv_file_path
+
+
+def _render_file(csv_file_path, output_file_path):
+    """CSVファイルを１つ描画して、結果の辞書を返します"""
+
+    result = {
+        'csv_file_path': csv_file_path,
+        'output_file_path': output_file_path,
+        'stats': None,
+        'error': None,
+    }
+
+    try:
+        with _open_sorted(csv_file_path=csv_file_path) as sorted_csv_file_path:
+            result['stats'] = _worker_renderer.render(csv_file_path=sorted_csv_file_path, wb_file_path=output_file_path, sheet_name=_get_stem(csv_file_path)).to_dict()
+
+    except Exception:
+        result['error'] = traceback.format_exc()
+
+    return result
+
+
+def _render_sheet(csv_file_path, sheet_name, sheet_file_path):
+    """CSVファイルを１つ、シートの SpreadsheetML に描画して sheet_file_path へ書き出し、結果の辞書を返します"""
+
+    from xltree.database import TreeCsvReader
+    from xltree.models import TreeLayout
+    from xltree.spreadsheetml import SpreadsheetMlSheet
+    from xltree.workbooks import SpreadsheetMlTreeDrawer
+
+    result = {
+        'csv_file_path': csv_file_path,
+        'sheet_name': sheet_name,
+        'sheet_file_path': sheet_file_path,
+        'stats': None,
+        'error': None,
+    }
+
+    try:
+        stats = RenderStats()
+
+        with _open_sorted(csv_file_path=csv_file_path) as sorted_csv_file_path:
+            with stats.measure('parse'):
+                tree_table = TreeCsvReader(file_path=sorted_csv_file_path)
+                tree_layout = TreeLayout.from_records(records=tree_table.iter_records(), length_of_nodes=tree_table.actual_length_of_nodes)
+
+            # シャードは別のワークブックやシートになるので、１枚のシートに収まらなければ描かない
+            if _worker_renderer._is_sharding_needed(len_records=tree_layout.len_records, length_of_nodes=tree_table.actual_length_of_nodes):
+                raise ValueError(f"the tree does not fit in one sheet. render it with render_to_directory() to split it into shards. {tree_layout.len_records=}  {tree_table.actual_length_of_nodes=}")
+
+            with stats.measure('draw'):
+                sheet = SpreadsheetMlSheet(styles=SpreadsheetMlTreeDrawer.create_styles())
+
+                tree_drawer = SpreadsheetMlTreeDrawer(tree_table=tree_table, ws=sheet, config=_worker_renderer.config, tree_layout=tree_layout, stats=stats)
+                tree_drawer.render_header()
+
+                with open(sheet_file_path, mode='w', encoding='utf8', newline='') as f:
+                    f.writelines(sheet.iter_xml(row_xml_iterable=tree_drawer.iter_row_xml()))
+
+        result['stats'] = stats.to_dict()
+
+    except Exception:
+        result['error'] = traceback.format_exc()
+
+    return result
@@ -0,0 +1,348 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+
+class TreeTableCache():
+    """読み込んだ TreeTable のスナップショットを、ディスクに置いておくキャッシュ。
+    罫線の最終形（TreeLayout）のように、CSVファイルの中身だけから決まるものなら、 TreeTable 以外も置けます
+
+    CSVファイルのパスと variant ごとに１つ、スナップショットとその目録（manifest）を置きます。
+    目録には、スナップショットを作ったときのCSVファイルの大きさ、更新時刻、中身のハッシュを書いておきます。
+
+    * 大きさと更新時刻が目録と同じなら、CSVファイルは読まずにスナップショットを使います
+    * 大きさが同じで更新時刻だけ違うなら、中身のハッシュを比べます。同じなら、目録の更新時刻を書き換えてスナップショットを使います
+    * それ以外は古いので、作り直します
+
+    スナップショットの大きさの合計が max_bytes を超えたら、最後に使ってから長いものから消します（LRU）。
+    最後に使った時刻は、目録のファイルの更新時刻で持ちます
+
+    NOTE スナップショットは pickle なので、信頼できないディレクトリーを cache_dir に指定しないでください"""
+
+
+    # 既定のスナップショットの大きさの合計の上限。 1 GiB
+    DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+    # 目録の形式の版。スナップショットの中身が変わったら上げます
+    FORMAT_VERSION = 2
+
+    _MANIFEST_EXTENSION = '.snapshot.json'
+    _SNAPSHOT_EXTENSION = '.snapshot.pickle'
+
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        """初期化
+
+        Parameters
+        ----------
+        cache_dir : str
+            キャッシュのディレクトリー。無ければ作ります
+        max_bytes : int
+            スナップショットの大きさの合計の上限
+        """
+        self._cache_dir = cache_dir
+        self._max_bytes = max_bytes
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+
+
+    def load(self, file_path, variant=''):
+        """スナップショットを読みます
+
+        Parameters
+        ----------
+        file_path : str
+            CSVファイルパス
+        variant : str
+            同じCSVファイルから作った、別のスナップショットを区別する文字列。例えばテキストを整数コードで持つかどうか
+
+        Returns
+        -------
+        snapshot : object
+            スナップショット。無いか、古ければ None
+        """
+
+        manifest_file_path, snapshot_file_path = self._get_entry_file_paths(file_path=file_path, variant=variant)
+
+        try:
+            with open(manifest_file_path, encoding='utf8') as f:
+                manifest = json.load(f)
+
+        except (OSError, ValueError):
+            return None
+
+        if manifest.get('format_version') != TreeTableCache.FORMAT_VERSION:
+            return None
+
+        if not _is_same_file(file_path=file_path, file_description=manifest):
+            return None
+
+        # 触っただけで中身が同じなら、目録の更新時刻を書き換えておく
+        if os.stat(file_path).st_mtime_ns != manifest['mtime_ns']:
+            manifest.update(_describe_file(file_path=file_path))
+            _write_atomically(file_path=manifest_file_path, data=json.dumps(manifest).encode('utf8'))
+
+        try:
+            with open(snapshot_file_path, 'rb') as f:
+                snapshot = pickle.load(f)
+
+        # 他のプロセスが消したか、壊れていれば、作り直す
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+        # 最後に使った時刻
+        os.utime(manifest_file_path)
+
+        return snapshot
+
+
+    def save(self, file_path, snapshot, variant=''):
+        """スナップショットを書き込み、上限を超えた分を消します
+
+        Parameters
+        ----------
+        file_path : str
+            CSVファイルパス
+        snapshot : object
+            スナップショット。 pickle できるもの
+        variant : str
+            load() を参照
+        """
+
+        manifest_file_path, snapshot_file_path = self._get_entry_file_paths(file_path=file_path, variant=variant)
+
+        manifest = {
+            'format_version': TreeTableCache.FORMAT_VERSION,
+            'file_path': os.path.abspath(file_path),
+            'variant': variant,
+            **_describe_file(file_path=file_path),
+        }
+
+        # スナップショットを先に書く。目録が無いスナップショットは使われない
+        _write_atomically(file_path=snapshot_file_path, data=pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+        _write_atomically(file_path=manifest_file_path, data=json.dumps(manifest).encode('utf8'))
+
+        self.evict()
+
+
+    def evict(self):
+        """スナップショットの大きさの合計が上限を超えていれば、最後に使ってから長いものから消します"""
+
+        entry_list = []
+        total_bytes = 0
+
+        for entry in os.scandir(self._cache_dir):
+            if not entry.name.endswith(TreeTableCache._MANIFEST_EXTENSION):
+                continue
+
+            snapshot_file_path = os.path.join(self._cache_dir, entry.name[:-len(TreeTableCache._MANIFEST_EXTENSION)] + TreeTableCache._SNAPSHOT_EXTENSION)
+
+            try:
+                last_used = entry.stat().st_mtime_ns
+                size = os.path.getsize(snapshot_file_path)
+
+            # 他のプロセスが消した
+            except OSError:
+                continue
+
+            entry_list.append((last_used, entry.path, snapshot_file_path, size))
+            total_bytes += size
+
+        # 古い順
+        entry_list.sort()
+
+        for _, manifest_file_path, snapshot_file_path, size in entry_list:
+            if total_bytes <= self._max_bytes:
+                break
+
+            # 目録を先に消す。目録が無いスナップショットは使われない
+            for path in (manifest_file_path, snapshot_file_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+            total_bytes -= size
+
+
+    def _get_entry_file_paths(self, file_path, variant):
+        """目録とスナップショットのファイルパス。名前はCSVファイルの絶対パスのハッシュです"""
+
+        key = _hash_text(f'{os.path.abspath(file_path)}\0{variant}')
+
+        return (
+            os.path.join(self._cache_dir, key + TreeTableCache._MANIFEST_EXTENSION),
+            os.path.join(self._cache_dir, key + TreeTableCache._SNAPSHOT_EXTENSION))
+
+
+class RenderResultCache():
+    """描画したファイルの目録を置いておき、入力が前回と同じなら描画を省くためのキャッシュ
+
+    出力ファイルのパスごとに１つ、目録を置きます。目録には、
+    描画の指紋（構成、シート名、 Renderer の版や設定など、出力を決めるもの）と、
+    入力のCSVファイルと出力ファイル（シャードごとのワークブックのように、他にも書き出したファイルがあればそれも）の大きさ、更新時刻、中身のハッシュを書いておきます。
+    指紋が同じで、CSVファイルが変わっておらず、出力ファイルも描画したときのままなら、描画は要りません。
+    ファイルが変わったかどうかは TreeTableCache と同じく、大きさと更新時刻、それで分からなければ中身のハッシュで決めます"""
+
+
+    # 目録の形式の版
+    FORMAT_VERSION = 2
+
+    _MANIFEST_EXTENSION = '.render.json'
+
+
+    def __init__(self, cache_dir):
+        """初期化
+
+        Parameters
+        ----------
+        cache_dir : str
+            キャッシュのディレクトリー。無ければ作ります
+        """
+        self._cache_dir = cache_dir
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+
+
+    def is_up_to_date(self, csv_file_path, output_file_path, fingerprint):
+        """前回の描画から、何も変わっていないか？
+
+        Parameters
+        ----------
+        csv_file_path : str
+            入力のCSVファイルパス
+        output_file_path : str
+            出力ファイルパス
+        fingerprint : dict
+            描画の指紋。 JSON にできるもの
+        """
+
+        try:
+            with open(self._get_manifest_file_path(output_file_path=output_file_path), encoding='utf8') as f:
+                manifest = json.load(f)
+
+        except (OSError, ValueError):
+            return False
+
+        if manifest.get('format_version') != RenderResultCache.FORMAT_VERSION:
+            return False
+
+        # NOTE JSON を通すとタプルはリストになるので、同じように通してから比べる
+        if manifest['fingerprint'] != json.loads(json.dumps(fingerprint)):
+            return False
+
+        if not _is_same_file(file_path=csv_file_path, file_description=manifest['input']) or not _is_same_file(file_path=output_file_path, file_description=manifest['output']):
+            return False
+
+        # 他にも書き出したファイルが、１つでも消えたり変わったりしていれば描き直す
+        for file_description in manifest['extra_outputs']:
+            if not _is_same_file(file_path=file_description['file_path'], file_description=file_description):
+                return False
+
+        return True
+
+
+    def record(self, csv_file_path, output_file_path, fingerprint, extra_output_file_path_list=()):
+        """描画し終えたので、目録を書き込みます。引数は is_up_to_date() を参照
+
+        Parameters
+        ----------
+        extra_output_file_path_list : list<str>
+            出力ファイルの他に書き出したファイルのパスのリスト。 RenderStats.extra_file_path_list を参照
+        """
+
+        manifest = {
+            'format_version': RenderResultCache.FORMAT_VERSION,
+            'fingerprint': fingerprint,
+            'input': {'file_path': os.path.abspath(csv_file_path), **_describe_file(file_path=csv_file_path)},
+            'output': {'file_path': os.path.abspath(output_file_path), **_describe_file(file_path=output_file_path)},
+            'extra_outputs': [{'file_path': os.path.abspath(file_path), **_describe_file(file_path=file_path)} for file_path in extra_output_file_path_list],
+        }
+
+        _write_atomically(file_path=self._get_manifest_file_path(output_file_path=output_file_path), data=json.dumps(manifest).encode('utf8'))
+
+
+    def forget(self, output_file_path):
+        """目録を消します。描き直す前に呼んでおけば、途中で止まっても古い目録は残りません"""
+
+        try:
+            os.remove(self._get_manifest_file_path(output_file_path=output_file_path))
+        except FileNotFoundError:
+            pass
+
+
+    def _get_manifest_file_path(self, output_file_path):
+        """目録のファイルパス。名前は出力ファイルの絶対パスのハッシュです"""
+        return os.path.join(self._cache_dir, _hash_text(os.path.abspath(output_file_path)) + RenderResultCache._MANIFEST_EXTENSION)
+
+
+def _describe_file(file_path):
+    """ファイルが変わったかどうかを後で調べるための、大きさ、更新時刻、中身のハッシュ"""
+
+    stat = os.stat(file_path)
+
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'content_hash': _hash_file(file_path),
+    }
+
+
+def _is_same_file(file_path, file_description):
+    """_describe_file() で調べたときから、ファイルの中身が変わっていないか？
+    大きさと更新時刻が同じなら中身は読みません。更新時刻だけ違うなら、中身のハッシュを比べます"""
+
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return False
+
+    if stat.st_size != file_description['size']:
+        return False
+
+    if stat.st_mtime_ns == file_description['mtime_ns']:
+        return True
+
+    return _hash_file(file_path) == file_description['content_hash']
+
+
+def _hash_text(text):
+    return hashlib.sha256(text.encode('utf8')).hexdigest()
+
+
+# ハッシュを求めるとき、一度に読む大きさ
+_READ_SIZE = 1024 * 1024
+
+
+def _hash_file(file_path):
+    """中身のハッシュ"""
+
+    hash_object = hashlib.sha256()
+
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(_READ_SIZE)
+            if len(chunk) == 0:
+                break
+
+            hash_object.update(chunk)
+
+    return hash_object.hexdigest()
+
+
+def _write_atomically(file_path, data):
+    """一時ファイルに書いてから置き換えるので、他のプロセスが書きかけのファイルを読むことはありません"""
+
+    fd, temp_file_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix='.tmp')
+
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+
+        os.replace(temp_file_path, file_path)
+
+    except BaseException:
+        os.remove(temp_file_path)
+        raise
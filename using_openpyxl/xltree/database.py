@@ -1,7 +1,9 @@
 import re
+import csv
 import datetime
-import pandas as pd
-from xltree.library import INDENT
+import importlib
+from xltree.caches import TreeTableCache
+from xltree.library import INDENT, is_blank
 
 
 ############
@@ -9,7 +11,13 @@ from xltree.library import INDENT
 ############
 class TreeNode():
     """ノード（節）
-    ノードの形に合わせて改造してください"""
+    ノードの形に合わせて改造してください
+
+    NOTE 件数が多いと数百万個も作るので、 __slots__ で属性の辞書を持たないようにしています。作った後は変えません"""
+
+
+    __slots__ = ('_edge_text', '_text')
+
 
     def __init__(self, edge_text, text):
         """初期化
@@ -45,13 +53,24 @@ class TreeNode():
 """
 
 
+# 葉より深い層の、空のノード。全レコードで共有します
+TreeNode.EMPTY = TreeNode(edge_text=None, text=None)
+
+
 ##############
 # MARK: Record
 ##############
 class TreeRecord():
+    """レコード（件）。根から葉までのノード
 
+    葉より深い層のノードは持たず、 node_at() は空のノード（TreeNode.EMPTY）を返します。
+    浅い葉が多い木では、ノードの数が列の数よりずっと少なく済みます。 TreeNode と同じく、作った後は変えません"""
 
-    def __init__(self, no, node_list):
+
+    __slots__ = ('_no', '_nodes', '_length_of_nodes')
+
+
+    def __init__(self, no, node_list, length_of_nodes=None):
         """初期化
         
         Parameters
@@ -60,17 +79,32 @@ class TreeRecord():
             1から始まる連番。数詞は件
         node_list : list<TreeNode>
             ノードのリスト。
-            第０層は根
+            第０層は根。最初の空欄（None、またはテキストが空欄のノード）より後ろは捨てます
+        length_of_nodes : int
+            テーブルの列の層の数。 len_node_list の値です。省略すると node_list の長さ
         """
+
+        if length_of_nodes is None:
+            length_of_nodes = len(node_list)
+
+        # 葉より深いノードは持たない
+        leaf_th = 0
+        for nd in node_list:
+            if nd is None or is_blank(nd.text):
+                break
+            leaf_th += 1
+
         self._no = no
-        self._node_list = node_list
+        self._nodes = tuple(node_list[:leaf_th])
+        self._length_of_nodes = length_of_nodes
 
 
     @staticmethod
     def new_empty(specified_length_of_nodes):
         return TreeRecord(
                 no=None,
-                node_list=[None] * specified_length_of_nodes)
+                node_list=(),
+                length_of_nodes=specified_length_of_nodes)
 
 
     @property
@@ -80,7 +114,8 @@ class TreeRecord():
 
     @property
     def len_node_list(self):
-        return len(self._node_list)
+        """テーブルの列の層の数。葉より深い層も含みます"""
+        return self._length_of_nodes
 
 
     def node_at(self, depth_th):
@@ -91,13 +126,21 @@ class TreeRecord():
             th は forth や fifth の th。
             例：根なら０を指定してください。
             例：第１層なら 1 を指定してください
+
+        Returns
+        -------
+        node : TreeNode
+            ノード。葉より深い層なら TreeNode.EMPTY
         """
 
         # NOTE -1 を指定すると最後尾の要素になるが、固定長配列の最後尾の要素が、思っているような最後尾の要素とは限らない。うまくいかない
         if depth_th < 0:
             raise ValueError(f'depth_th に負数を設定しないでください。意図した動作はしません {depth_th=}')
 
-        return self._node_list[depth_th]
+        if depth_th < len(self._nodes):
+            return self._nodes[depth_th]
+
+        return TreeNode.EMPTY
 
 
     def update(self, no=None, node_list=None):
@@ -111,14 +154,15 @@ class TreeRecord():
 
         return TreeRecord(
                 no=new_or_default(no, self._no),
-                node_list=new_or_default(node_list, self._node_list))
+                node_list=new_or_default(node_list, self._nodes),
+                length_of_nodes=self._length_of_nodes)
 
 
     def stringify_dump(self, indent):
         succ_indent = indent + INDENT
 
         blocks = []
-        for node in self._node_list:
+        for node in self._nodes:
             blocks.append(node.stringify_dump(succ_indent))
 
         return f"""\
@@ -134,24 +178,25 @@ class TreeRecord():
         th は forth や fifth の th。
         葉要素は、次の層がない要素"""
 
-        for depth_th in range(0, len(self._node_list)):
-            nd = self._node_list[depth_th]
-            if nd is None or nd.text is None:
-                return depth_th
-
-        return len(self._node_list)
+        # 葉より深いノードは持っていない
+        return len(self._nodes)
 
 
 ##############
 # MARK: Record
 ##############
 class TreeTable():
-    """樹形図データのテーブル"""
+    """樹形図データのテーブル
+
+    NOTE pandas はテーブルを使うときにインポートします。 TreeNode, TreeRecord, TreeCsvReader だけなら pandas は要りません"""
 
 
     # 列が可変長
     _dtype = {}
 
+    # iter_records() で、一度に配列へ取り出す件数
+    _CHUNK_SIZE = 4096
+
     @classmethod
     def create_dtype(clazz, specified_length_of_nodes):
         # no はインデックスなので含めない
@@ -190,25 +235,38 @@ class TreeTable():
 
 
     @classmethod
-    def new_empty_table(clazz, specified_length_of_nodes):
+    def new_empty_table(clazz, specified_length_of_nodes, shall_encode_text=False):
+        import pandas as pd
+
         column_name_list = TreeTable.create_column_name_list(
                 specified_length_of_nodes=specified_length_of_nodes,
                 include_index=True) # 'no' は後でインデックスに変換
 
         df = pd.DataFrame(
                 columns=column_name_list)
-        clazz.setup_data_frame(df=df, specified_length_of_nodes=specified_length_of_nodes, shall_set_index=True)
+        clazz.setup_data_frame(df=df, specified_length_of_nodes=specified_length_of_nodes, shall_set_index=True, shall_encode_text=shall_encode_text)
         return TreeTable(df=df, actual_length_of_nodes=specified_length_of_nodes)
 
 
     @classmethod
-    def from_csv(clazz, file_path):
+    def from_csv(clazz, file_path, shall_encode_text=False, cache_dir=None, cache_max_bytes=TreeTableCache.DEFAULT_MAX_BYTES):
         """ファイル読込
 
+        ノードと辺のテキストは、 TreeCsvReader と同じく、書いてあるままの文字列で読みます。
+        欠損値は空欄だけです。 pandas の既定とは違い、 'NA' や 'null' は欠損値にせず、 '007' も数の 7 にはしません
+
         Parameters
         ----------
         file_path : str
             CSVファイルパス
+        shall_encode_text : bool
+            真なら、ノードと辺のテキストを、全列で共有する辞書の整数コード（pandas のカテゴリー型）で持ちます。
+            同じテキストが何度も出てくる木では、メモリー使用量が減り、テキストの比較も整数の比較になります
+        cache_dir : str
+            指定すると、読み込んだテーブルのスナップショットをこのディレクトリーに置き、
+            CSVファイルが変わっていなければ次からはスナップショットを読みます。 TreeTableCache を参照
+        cache_max_bytes : int
+            スナップショットの大きさの合計の上限
         
         Returns
         -------
@@ -217,28 +275,158 @@ class TreeTable():
         file_read_result : FileReadResult
             ファイル読込結果
         """
-        df = pd.read_csv(file_path, encoding="utf8", index_col=['no'])
+        if cache_dir is not None:
+            cache = TreeTableCache(cache_dir=cache_dir, max_bytes=cache_max_bytes)
+
+            # テキストを整数コードで持つかどうかで、スナップショットは別
+            variant = f'{shall_encode_text=}'
+
+            tree_table = cache.load(file_path=file_path, variant=variant)
+            if tree_table is not None:
+                return tree_table
+
+            tree_table = clazz.from_csv(file_path=file_path, shall_encode_text=shall_encode_text)
+            cache.save(file_path=file_path, snapshot=tree_table, variant=variant)
+            return tree_table
+
+        import pandas as pd
+
+        # NOTE pandas の既定では、列の値が全て数に見えれば数の列になり、 'NA' や 'null' などは欠損値になる。
+        # TreeCsvReader と同じ値になるように、 no 以外の列は文字列で読み、空欄だけを欠損値にする
+        with open(file_path, encoding="utf8", newline='') as f:
+            column_name_list = next(csv.reader(f))
+
+        df = pd.read_csv(
+                file_path,
+                encoding="utf8",
+                index_col=['no'],
+                dtype={column_name: str for column_name in column_name_list if column_name != 'no'},
+                keep_default_na=False,
+                na_values=[''])
 
         # ノード数を数えたい
-        # 列名を左から見ていくと、 node0, node1, node2 といった形で 0から始まる昇順の連番が付いている "node数" 形式の列名が見つかるものとします
+        actual_length_of_nodes = clazz.count_length_of_nodes(column_name_list=df.columns.values)
+
+        # テーブルにあるノード数
+        #print(f"[{datetime.datetime.now()}] Table has {actual_length_of_nodes} nodes root node included")
+
+        # テーブルに追加の設定
+        clazz.setup_data_frame(df=df, specified_length_of_nodes=actual_length_of_nodes, shall_set_index=False, shall_encode_text=shall_encode_text)
+
+        return TreeTable(df=df, actual_length_of_nodes=actual_length_of_nodes)
+
+
+    @classmethod
+    def from_parquet(clazz, file_path, shall_encode_text=False, memory_map=False):
+        """Parquet ファイル読込。 to_parquet() で書き出したものを読みます。 pyarrow が要ります
+
+        Parameters
+        ----------
+        file_path : str
+            Parquet ファイルパス
+        shall_encode_text : bool
+            TreeTable.from_csv() を参照
+        memory_map : bool
+            真なら、ファイルをメモリーマップして読みます
+        """
+        pq = _import_pyarrow_module('pyarrow.parquet')
+        return clazz._from_arrow_table(arrow_table=pq.read_table(file_path, memory_map=memory_map), shall_encode_text=shall_encode_text)
+
+
+    @classmethod
+    def from_feather(clazz, file_path, shall_encode_text=False, memory_map=False):
+        """Feather（Arrow IPC）ファイル読込。 to_feather() で書き出したものを読みます。 pyarrow が要ります
+
+        Parameters
+        ----------
+        file_path : str
+            Feather ファイルパス
+        shall_encode_text : bool
+            TreeTable.from_csv() を参照
+        memory_map : bool
+            真なら、ファイルをメモリーマップして読みます。
+            圧縮していないファイルなら、列のバッファーはファイルのページをそのまま指すので、読込みはほぼ一瞬で、ページはプロセスの間で共有されます。
+            NOTE テーブルはテキストを Python の文字列で持つので、データフレームに変換するときに文字列はコピーします
+        """
+        feather = _import_pyarrow_module('pyarrow.feather')
+        return clazz._from_arrow_table(arrow_table=feather.read_table(file_path, memory_map=memory_map), shall_encode_text=shall_encode_text)
+
+
+    @classmethod
+    def _from_arrow_table(clazz, arrow_table, shall_encode_text):
+        """列の並びは CSV と同じ、 no, node0, edge1, node1 ... の Arrow のテーブルから作成"""
+
+        df = arrow_table.to_pandas()
+
+        # ノード数を数えたい
+        actual_length_of_nodes = clazz.count_length_of_nodes(column_name_list=df.columns.values)
+
+        # テーブルに追加の設定。 no 列はインデックスに変換
+        clazz.setup_data_frame(df=df, specified_length_of_nodes=actual_length_of_nodes, shall_set_index=True, shall_encode_text=shall_encode_text)
+
+        return TreeTable(df=df, actual_length_of_nodes=actual_length_of_nodes)
+
+
+    @classmethod
+    def from_adjacency(clazz, source, shall_encode_text=False, **kwargs):
+        """隣接リスト（id, parent_id, edge_text, text）の木から、根から葉までの道を１件ずつ並べたテーブルを作成。
+        道は再帰を使わずにたどるので、層が深くても作れます。 TreeAdjacencyReader を参照
+
+        Parameters
+        ----------
+        source : str または iterable<tuple>
+            CSVファイルパス、または (id, parent_id, edge_text, text) のタプルを返すもの
+        shall_encode_text : bool
+            TreeTable.from_csv() を参照
+        kwargs : dict
+            文字コードや列名。 TreeAdjacencyReader() に渡します
+
+        Raises
+        ------
+        ValueError
+            id が重複しているとき、孤児のノードがあるとき、親をたどると輪になるノードがあるとき
+        """
+        import pandas as pd
+
+        reader = TreeAdjacencyReader(source=source, **kwargs)
+        actual_length_of_nodes = reader.actual_length_of_nodes
+
+        column_name_list = TreeTable.create_column_name_list(
+                specified_length_of_nodes=actual_length_of_nodes,
+                include_index=True) # 'no' は後でインデックスに変換
+
+        # no, node0, edge1, node1, edge2, node2 ... の順
+        row_list = []
+        for record in reader.iter_records():
+            row = [record.no, record.node_at(0).text]
+            for node_th in range(1, actual_length_of_nodes):
+                node = record.node_at(node_th)
+                row.append(node.edge_text)
+                row.append(node.text)
+
+            row_list.append(row)
+
+        df = pd.DataFrame(row_list, columns=column_name_list)
+        clazz.setup_data_frame(df=df, specified_length_of_nodes=actual_length_of_nodes, shall_set_index=True, shall_encode_text=shall_encode_text)
+        return TreeTable(df=df, actual_length_of_nodes=actual_length_of_nodes)
+
+
+    @staticmethod
+    def count_length_of_nodes(column_name_list):
+        """列名の並びから、ノード数を数えます。根ノード含む
+
+        列名を左から見ていくと、 node0, node1, node2 といった形で 0から始まる昇順の連番が付いている "node数" 形式の列名が見つかるものとします
+        """
         expected_node_th = 0
         pattern = re.compile(r'node(\d+)')
-        for column_name in df.columns.values:
+        for column_name in column_name_list:
             result = pattern.match(column_name)
             if result:
                 actual_node_th = int(result.group(1))
                 if expected_node_th == actual_node_th:
                     expected_node_th += 1
 
-        actual_length_of_nodes = expected_node_th # 根ノード含む
-
-        # テーブルにあるノード数
-        #print(f"[{datetime.datetime.now()}] Table has {actual_length_of_nodes} nodes root node included")
-
-        # テーブルに追加の設定
-        clazz.setup_data_frame(df=df, specified_length_of_nodes=actual_length_of_nodes, shall_set_index=False)
-
-        return TreeTable(df=df, actual_length_of_nodes=actual_length_of_nodes)
+        return expected_node_th
 
 
     @property
@@ -252,9 +440,17 @@ class TreeTable():
         return self._actual_length_of_nodes
 
 
+    @property
+    def is_text_encoded(self):
+        """ノードと辺のテキストを、共有の辞書の整数コードで持っているか？"""
+        # NOTE pandas をインポートしないで済むように、型の名前で調べます
+        return self._df['node0'].dtype.name == 'category'
+
+
     @classmethod
-    def setup_data_frame(clazz, df, specified_length_of_nodes, shall_set_index):
+    def setup_data_frame(clazz, df, specified_length_of_nodes, shall_set_index, shall_encode_text=False):
         """データフレームの設定"""
+        import pandas as pd
 
         if shall_set_index:
             # インデックスの設定
@@ -264,7 +460,47 @@ class TreeTable():
         # データ型の設定
         dtype = clazz.create_dtype(specified_length_of_nodes=specified_length_of_nodes)
         #print(f"setup_data_frame {dtype=}")
-        df.astype(dtype)
+
+        # 全列で１つの辞書を共有するカテゴリー型にする
+        if shall_encode_text:
+            text_dict = {}
+            for column_name in dtype.keys():
+                text_dict.update(dict.fromkeys(df[column_name].dropna().unique()))
+
+            categorical_dtype = pd.CategoricalDtype(categories=list(text_dict.keys()))
+            dtype = {column_name: categorical_dtype for column_name in dtype.keys()}
+
+        # NOTE df.astype() は新しいデータフレームを返すだけなので、このインスタンス自身の列を置き換えます
+        for column_name, column_dtype in dtype.items():
+            df[column_name] = df[column_name].astype(column_dtype)
+
+
+    def _extend_text_dictionary(self, text_df):
+        """共有の辞書に無いテキストを、辞書の後ろに足します。既存のコードは変わりません
+
+        Returns
+        -------
+        categorical_dtype : pandas.CategoricalDtype
+            テキストを足した後のカテゴリー型
+        """
+        import pandas as pd
+
+        categorical_dtype = self._df['node0'].dtype
+
+        text_dict = {}
+        for column_name in text_df.columns:
+            text_dict.update(dict.fromkeys(text_df[column_name].dropna().unique()))
+
+        new_text_list = [text for text in text_dict.keys() if text not in categorical_dtype.categories]
+        if len(new_text_list) == 0:
+            return categorical_dtype
+
+        categories = categorical_dtype.categories.append(pd.Index(new_text_list, dtype=object))
+
+        for column_name in text_df.columns:
+            self._df[column_name] = self._df[column_name].cat.set_categories(categories)
+
+        return self._df['node0'].dtype
 
 
     def upsert_record(self, welcome_record):
@@ -324,7 +560,21 @@ class TreeTable():
                 dictionary[f'edge{node_th}'] = welcome_record.node_at(node_th).edge_text
                 dictionary[f'node{node_th}'] = welcome_record.node_at(node_th).text
 
-            self._df.loc[index] = dictionary
+            # 共有の辞書を使っているなら、辞書にテキストを足してからコードに変換する。
+            # NOTE loc に辞書をそのまま入れると、カテゴリー型の列が object 型に戻ってしまう
+            if self.is_text_encoded:
+                import pandas as pd
+
+                row_df = pd.DataFrame([dictionary], index=pd.Index([index], name=self._df.index.name), dtype=object)
+                row_df = row_df.astype(self._extend_text_dictionary(text_df=row_df))
+
+                if is_new_index:
+                    self._df = pd.concat([self._df, row_df])
+                else:
+                    self._df.loc[[index], row_df.columns] = row_df
+
+            else:
+                self._df.loc[index] = dictionary
 
 
         if is_new_index:
@@ -336,22 +586,270 @@ class TreeTable():
         return shall_record_change
 
 
-    def to_csv(self, file_path):
-        """ファイル書き出し
-        
+    def upsert_many(self, welcome_records):
+        """該当レコードが無ければ新規作成、あれば更新を、まとめて行います。
+        １件ずつ upsert_record() するとそのたびにソートが走るので、件数が多いときはこちらを使ってください。
+        比較はノードと辺の列ごとにまとめて行い、挿入と更新は１回ずつ、ソートは最後に１回だけ行います
+
+        Parameters
+        ----------
+        welcome_records : iterable<TreeRecord>
+            レコード。 no が重複していれば後のものを使います
+
+        Returns
+        -------
+        changed_no_list : list
+            新規追加、または更新があったレコードの no のリスト。昇順
+        """
+
+        # no はインデックスなので含めない
+        column_name_list = TreeTable.create_column_name_list(
+                specified_length_of_nodes=self._actual_length_of_nodes,
+                include_index=False)
+
+        no_list = []
+        row_list = []
+
+        for welcome_record in welcome_records:
+            no_list.append(welcome_record.no)
+
+            # 根
+            row = [welcome_record.node_at(0).text]
+
+            # 中間～葉ノード
+            for node_th in range(1, self._actual_length_of_nodes):
+                if node_th < welcome_record.len_node_list and welcome_record.node_at(node_th) is not None:
+                    row.append(welcome_record.node_at(node_th).edge_text)
+                    row.append(welcome_record.node_at(node_th).text)
+                else:
+                    row.extend([None, None])
+
+            row_list.append(row)
+
+        if len(row_list) == 0:
+            return []
+
+        import pandas as pd
+
+        welcome_df = pd.DataFrame(row_list, index=pd.Index(no_list, name=self._df.index.name), columns=column_name_list, dtype=object)
+        welcome_df = welcome_df[~welcome_df.index.duplicated(keep='last')]
+
+        # データ変更判定
+        # -------------
+        is_new_index_array = ~welcome_df.index.isin(self._df.index)
+        new_df = welcome_df[is_new_index_array]
+        existing_df = welcome_df[~is_new_index_array]
+
+        # 既存の行は、列ごとにまとめて比べる。空欄どうしは等しいとみなす
+        current_df = self._df.loc[existing_df.index, column_name_list].astype(object)
+        is_same_df = (current_df == existing_df) | (current_df.isna() & existing_df.isna())
+        changed_df = existing_df[~is_same_df.all(axis=1)]
+
+
+        # 共有の辞書を使っているなら、辞書にテキストを足してからコードに変換する
+        if self.is_text_encoded:
+            categorical_dtype = self._extend_text_dictionary(text_df=pd.concat([new_df, changed_df]))
+            new_df = new_df.astype(categorical_dtype)
+            changed_df = changed_df.astype(categorical_dtype)
+
+        # 行の更新と挿入
+        if 0 < len(changed_df):
+            # NOTE 全部空欄の列は float64 型のことがあり、文字列を入れられないので object 型にしておく
+            for column_name in column_name_list:
+                if self._df[column_name].dtype != object and not isinstance(self._df[column_name].dtype, pd.CategoricalDtype):
+                    self._df[column_name] = self._df[column_name].astype(object)
+
+            self._df.loc[changed_df.index, column_name_list] = changed_df
+
+        if 0 < len(new_df):
+            if len(self._df) == 0:
+                self._df = new_df.copy()
+            else:
+                self._df = pd.concat([self._df, new_df])
+
+            # NOTE ソートをしておかないと、インデックスのパフォーマンスが機能しない
+            self._df.sort_index(
+                    inplace=True)   # NOTE ソートを指定したデータフレームを戻り値として返すのではなく、このインスタンス自身をソートします
+
+
+        return sorted(new_df.index.tolist() + changed_df.index.tolist())
+
+
+    def to_csv(self, file_path, chunk_size=None):
+        """ファイル書き出し。 chunk_size 件ずつ書き出すので、件数が多くても文字列を溜め込みません
+
         Parameters
         ----------
         file_path : str
             CSVファイルパス
+        chunk_size : int
+            一度に書き出す件数。省略可
         """
 
         column_name_list = TreeTable.create_column_name_list(
                 specified_length_of_nodes=self.actual_length_of_nodes,
                 include_index=False) # no はインデックスなので含めない
 
-        self._df.to_csv(
-                csv_file_path,
-                columns=column_name_list)
+        if chunk_size is None:
+            chunk_size = TreeTable._CHUNK_SIZE
+
+        df = self._df
+
+        # NOTE no が空欄の件があると、インデックスは float64 型になり 1.0 のように書き出されてしまう。整数で書き出す
+        if df.index.dtype == 'float64':
+            df = df.set_axis(df.index.astype('Int64'), axis=0)
+
+        df.to_csv(
+                file_path,
+                columns=column_name_list,
+                encoding='utf8',
+                chunksize=chunk_size)
+
+
+    def to_parquet(self, file_path, compression='snappy'):
+        """Parquet ファイル書き出し。列の並びは CSV と同じ、 no, node0, edge1, node1 ... です。 pyarrow が要ります
+
+        Parameters
+        ----------
+        file_path : str
+            Parquet ファイルパス
+        compression : str
+            圧縮の方式。 pyarrow.parquet.write_table() を参照
+        """
+        pq = _import_pyarrow_module('pyarrow.parquet')
+        pq.write_table(self._to_arrow_table(), file_path, compression=compression)
+
+
+    def to_feather(self, file_path, compression='uncompressed'):
+        """Feather（Arrow IPC）ファイル書き出し。列の並びは CSV と同じ、 no, node0, edge1, node1 ... です。 pyarrow が要ります
+
+        Parameters
+        ----------
+        file_path : str
+            Feather ファイルパス
+        compression : str
+            圧縮の方式。 'uncompressed', 'lz4', 'zstd' のいずれか。
+            NOTE 圧縮すると、 from_feather(memory_map=True) でもファイルのページをそのまま使えません
+        """
+        feather = _import_pyarrow_module('pyarrow.feather')
+        feather.write_feather(self._to_arrow_table(), file_path, compression=compression)
+
+
+    def _to_arrow_table(self):
+        """列の並びは CSV と同じ、 no, node0, edge1, node1 ... の Arrow のテーブル"""
+
+        pa = _import_pyarrow_module('pyarrow')
+
+        column_name_list = TreeTable.create_column_name_list(
+                specified_length_of_nodes=self._actual_length_of_nodes,
+                include_index=False)
+
+        # テキストの型。共有の辞書を使っているなら、辞書の型にする
+        if self.is_text_encoded:
+            text_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            text_type = pa.string()
+
+        # NOTE 全部空欄の列は型が決まらないので、型は先に決めておく
+        schema = pa.schema(
+                [pa.field('no', pa.int64())] + [pa.field(column_name, text_type) for column_name in column_name_list])
+
+        return pa.Table.from_pandas(self._df[column_name_list].reset_index(), schema=schema, preserve_index=False)
+
+
+    def iter_records(self, batch_size=None):
+        """レコードを先頭から順に返すジェネレーター。
+        データフレームからセルを１つずつ読むのは遅いので、ノードと辺の列を NumPy の配列としてまとめて取り出します
+
+        Parameters
+        ----------
+        batch_size : int
+            省略すると TreeRecord を１件ずつ返します。
+            指定すると、最大 batch_size 件の list<TreeRecord> を返します
+
+        Returns
+        -------
+        record : TreeRecord または list<TreeRecord>
+            レコード、またはレコードのリスト
+        """
+
+        df = self._df
+
+        # no はインデックスなので含めない。 node0, edge1, node1, edge2, node2 ... の順
+        column_name_list = TreeTable.create_column_name_list(
+                specified_length_of_nodes=self._actual_length_of_nodes,
+                include_index=False)
+
+        # 一度に配列へ取り出す件数
+        if batch_size is None:
+            chunk_size = TreeTable._CHUNK_SIZE
+        else:
+            chunk_size = batch_size
+
+        for start_row_number in range(0, len(df), chunk_size):
+            chunk_df = df.iloc[start_row_number:start_row_number + chunk_size]
+
+            no_list = chunk_df.index.tolist()
+            value_matrix = chunk_df[column_name_list].to_numpy(dtype=object)
+
+            record_list = []
+
+            for no, value_list in zip(no_list, value_matrix):
+                record = self._new_record(no=no, value_list=value_list)
+
+                if batch_size is None:
+                    yield record
+                else:
+                    record_list.append(record)
+
+            if batch_size is not None:
+                yield record_list
+
+
+    def record_at(self, row_number):
+        """指定の行のレコード
+
+        Parameters
+        ----------
+        row_number : int
+            0から始まる行番号
+        """
+
+        column_name_list = TreeTable.create_column_name_list(
+                specified_length_of_nodes=self._actual_length_of_nodes,
+                include_index=False)
+
+        row_df = self._df.iloc[row_number:row_number + 1]
+
+        return self._new_record(
+                no=row_df.index[0],
+                value_list=row_df[column_name_list].to_numpy(dtype=object)[0])
+
+
+    def _new_record(self, no, value_list):
+        """node0, edge1, node1, edge2, node2 ... の順に並んだ値からレコードを作成"""
+
+        # 根
+        node_list = [TreeNode(edge_text=None, text=value_list[0])]
+
+        # 中間～葉ノード。葉より深い層のノードは作らない
+        for node_th in range(1, self._actual_length_of_nodes):
+            text = value_list[2 * node_th]
+            if is_blank(text):
+                break
+
+            # TreeCsvReader と同じく、空欄の辺は None
+            edge_text = value_list[2 * node_th - 1]
+            if is_blank(edge_text):
+                edge_text = None
+
+            node_list.append(TreeNode(edge_text=edge_text, text=text))
+
+        # レコード作成
+        return TreeRecord(
+                no=no,
+                node_list=node_list,
+                length_of_nodes=self._actual_length_of_nodes)
 
 
     def for_each(self, on_each):
@@ -359,31 +857,409 @@ class TreeTable():
         Parameters
         ----------
         on_each : func
-            TreeRecord 引数を受け取る関数
+            行番号と TreeRecord 引数を受け取る関数
         """
 
-        df = self._df
+        for row_number, record in enumerate(self.iter_records()):
+            on_each(row_number, record)
+
+
+def _import_pyarrow_module(module_name):
+    """pyarrow は Parquet や Feather を使うときだけ要るので、使うときにインポートします"""
+
+    try:
+        return importlib.import_module(module_name)
+
+    except ImportError as e:
+        raise ImportError(f"{module_name} is required to read or write Parquet and Feather files. pip install pyarrow") from e
+
+
+##############
+# MARK: Reader
+##############
+class TreeCsvReader():
+    """pandas を使わずに、CSVファイルを先頭から１件ずつ読みます。
+    列の並びは TreeTable.from_csv() と同じように調べます。
+    テキストも TreeTable.from_csv() と同じく、書いてあるままの文字列で、空欄だけを欠損値（None）とします。
+    'NA' や 'null' は文字列のまま、 '007' も文字列のままです。
+    一度に持つのは１件分だけなので、件数が多くてもメモリー使用量は層の数にしか比例しません"""
+
+
+    def __init__(self, file_path, encoding='utf8'):
+        """初期化。ヘッダーだけ先に読みます
+
+        Parameters
+        ----------
+        file_path : str
+            CSVファイルパス
+        encoding : str
+            文字コード
+        """
+        self._file_path = file_path
+        self._encoding = encoding
+
+        with open(self._file_path, encoding=self._encoding, newline='') as f:
+            column_name_list = next(csv.reader(f))
+
+        self._actual_length_of_nodes = TreeTable.count_length_of_nodes(column_name_list=column_name_list)
+
+        # 列名から、列の位置へ
+        column_index_dict = {column_name: column_index for column_index, column_name in enumerate(column_name_list)}
+
+        self._no_column_index = column_index_dict['no']
+        self._node_column_index_list = [column_index_dict[f'node{node_th}'] for node_th in range(0, self._actual_length_of_nodes)]
+
+        # 根に辺は無い
+        self._edge_column_index_list = [None] + [column_index_dict.get(f'edge{node_th}') for node_th in range(1, self._actual_length_of_nodes)]
+
+
+    @property
+    def actual_length_of_nodes(self):
+        """ヘッダーから数えたノード数"""
+        return self._actual_length_of_nodes
+
+
+    def iter_records(self):
+        """レコードを先頭から順に返すジェネレーター。
+        呼び出すたびにファイルを開き直すので、何周でも読めます
+
+        Returns
+        -------
+        record : TreeRecord
+            レコード。空欄のテキストは None
+        """
+
+        no_column_index = self._no_column_index
+        node_column_index_list = self._node_column_index_list
+
+        # 根に辺は無い。辺の列が無い層も None
+        edge_column_index_list = self._edge_column_index_list
+
+        # 行が短ければ、読む列まで空欄で埋める。そうすれば、列があるか１つずつ調べずに済む
+        len_columns = max([no_column_index] + node_column_index_list + [column_index for column_index in edge_column_index_list if column_index is not None]) + 1
+
+        with open(self._file_path, encoding=self._encoding, newline='') as f:
+            reader = csv.reader(f)
+
+            # ヘッダーは読み飛ばす
+            next(reader)
+
+            for row in reader:
+                # 空行は飛ばす
+                if len(row) == 0:
+                    continue
+
+                if len(row) < len_columns:
+                    row += [''] * (len_columns - len(row))
+
+                # 空欄は None。葉より深い層のノードは作らない
+                node_list = []
+                for edge_column_index, node_column_index in zip(edge_column_index_list, node_column_index_list):
+                    text = row[node_column_index]
+                    if text == '':
+                        break
+
+                    node_list.append(TreeNode(
+                            edge_text=None if edge_column_index is None else (row[edge_column_index] or None),
+                            text=text))
+
+                # NOTE pandas と同じく、 no が空欄の行も飛ばさずに返す
+                no = row[no_column_index]
+                if no == '':
+                    no = None
+                else:
+                    no = int(no)
+
+                yield TreeRecord(
+                        no=no,
+                        node_list=node_list,
+                        length_of_nodes=self._actual_length_of_nodes)
+
+
+    def for_each(self, on_each):
+        """
+        Parameters
+        ----------
+        on_each : func
+            行番号と TreeRecord 引数を受け取る関数
+        """
+
+        for row_number, record in enumerate(self.iter_records()):
+            on_each(row_number, record)
+
+
+class TreeAdjacencyReader():
+    """隣接リスト（id, parent_id, edge_text, text）の木を読んで、根から葉までの道を１件ずつ返します。
+    TreeCsvReader と同じように iter_records() で読めます
+
+    子は親の後に、兄弟は入力に出てきた順に並べます。 parent_id が空欄のノードは根です。根が複数あれば、出てきた順に並べます。
+    道は再帰を使わずに深さ優先でたどるので、層が Python の再帰の上限より深くても読めます。
+    ノードごとに持つのは、テキストと親の id、長子と弟の番号だけです"""
+
+
+    # 番号が無いことを表す
+    _NONE = -1
+
+
+    def __init__(self, source, encoding='utf8', id_column_name='id', parent_id_column_name='parent_id', edge_text_column_name='edge_text', text_column_name='text'):
+        """初期化。ノードを全部読んで、親子をつなぎ、層の数を数えます
+
+        Parameters
+        ----------
+        source : str または iterable<tuple>
+            CSVファイルパス、または (id, parent_id, edge_text, text) のタプルを返すもの。
+            空欄（None または空文字列）の parent_id は根です
+        encoding : str
+            CSVファイルの文字コード
+        id_column_name : str
+            CSVファイルの、ノードの id の列名
+        parent_id_column_name : str
+            CSVファイルの、親ノードの id の列名
+        edge_text_column_name : str
+            CSVファイルの、親からの辺のテキストの列名。列が無くても構いません
+        text_column_name : str
+            CSVファイルの、節のテキストの列名
+
+        Raises
+        ------
+        ValueError
+            id が重複しているとき、親が見つからないノード（孤児）があるとき、親をたどると輪になるノードがあるとき、
+            テキストが空欄のノードに子があるとき
+        """
+
+        if isinstance(source, str):
+            self._read_csv(file_path=source, encoding=encoding, id_column_name=id_column_name, parent_id_column_name=parent_id_column_name, edge_text_column_name=edge_text_column_name, text_column_name=text_column_name)
+        else:
+            self._read_rows(rows=source)
+
+        self._link_nodes()
+        self._actual_length_of_nodes = self._count_length_of_nodes()
+
+
+    def _read_csv(self, file_path, encoding, id_column_name, parent_id_column_name, edge_text_column_name, text_column_name):
+        """CSVファイルを pandas を使わずに読みます"""
+
+        with open(file_path, encoding=encoding, newline='') as f:
+            reader = csv.reader(f)
+            column_name_list = next(reader)
+
+            column_index_dict = {column_name: column_index for column_index, column_name in enumerate(column_name_list)}
+
+            for column_name in [id_column_name, parent_id_column_name, text_column_name]:
+                if column_name not in column_index_dict:
+                    raise ValueError(f"{column_name=} not found in {file_path=}. {column_name_list=}")
 
-        node_list = [None] * self._actual_length_of_nodes
-        edge_list = [None] * self._actual_length_of_nodes
+            id_column_index = column_index_dict[id_column_name]
+            parent_id_column_index = column_index_dict[parent_id_column_name]
+            edge_text_column_index = column_index_dict.get(edge_text_column_name)
+            text_column_index = column_index_dict[text_column_name]
 
-        for row_number in range(0, len(df)):
-            # no はインデックス
-            no = df.index[row_number]
+            len_columns = len(column_name_list)
 
-            node_list = []
+            def iter_rows():
+                for row in reader:
+                    # 空行は飛ばす
+                    if len(row) == 0:
+                        continue
 
+                    if len(row) < len_columns:
+                        row += [''] * (len_columns - len(row))
+
+                    yield (
+                            row[id_column_index],
+                            row[parent_id_column_index],
+                            None if edge_text_column_index is None else row[edge_text_column_index],
+                            row[text_column_index])
+
+            self._read_rows(rows=iter_rows())
+
+
+    def _read_rows(self, rows):
+        """(id, parent_id, edge_text, text) を読みます。ノードは出てきた順に 0 から番号を振ります"""
+
+        id_to_node_index = {}
+        parent_id_list = []
+        edge_text_list = []
+        text_list = []
+
+        for node_id, parent_id, edge_text, text in rows:
+            if node_id in id_to_node_index:
+                raise ValueError(f"duplicate id. {node_id=}")
+
+            id_to_node_index[node_id] = len(text_list)
+
+            # 空欄は None。 0 のような偽の値はテキストとして残す
+            parent_id_list.append(None if parent_id is None or parent_id == '' else parent_id)
+            edge_text_list.append(None if edge_text is None or edge_text == '' else edge_text)
+            text_list.append(None if text is None or text == '' else text)
+
+        self._id_to_node_index = id_to_node_index
+        self._parent_id_list = parent_id_list
+        self._edge_text_list = edge_text_list
+        self._text_list = text_list
+
+
+    def _link_nodes(self):
+        """親から長子へ、兄から弟へつなぎます。兄弟は出てきた順です"""
+
+        NONE = TreeAdjacencyReader._NONE
+        len_nodes = len(self._text_list)
+
+        first_child_list = [NONE] * len_nodes
+        younger_sibling_list = [NONE] * len_nodes
+        last_child_list = [NONE] * len_nodes
+
+        first_root = NONE
+        last_root = NONE
+
+        orphan_node_index_list = []
+
+        for node_index, parent_id in enumerate(self._parent_id_list):
             # 根
-            node_list.append(TreeNode(edge_text=None, text=df.at[no, f'node0']))
+            if parent_id is None:
+                if last_root == NONE:
+                    first_root = node_index
+                else:
+                    younger_sibling_list[last_root] = node_index
+                last_root = node_index
+                continue
+
+            parent_node_index = self._id_to_node_index.get(parent_id)
+
+            # 孤児
+            if parent_node_index is None:
+                orphan_node_index_list.append(node_index)
+                continue
+
+            if last_child_list[parent_node_index] == NONE:
+                first_child_list[parent_node_index] = node_index
+            else:
+                younger_sibling_list[last_child_list[parent_node_index]] = node_index
+            last_child_list[parent_node_index] = node_index
+
+        if 0 < len(orphan_node_index_list):
+            # NOTE 辞書は入れた順に並ぶので、 id は番号の順に並んでいる
+            id_list = list(self._id_to_node_index.keys())
+            orphan_list = [(id_list[node_index], self._parent_id_list[node_index]) for node_index in orphan_node_index_list]
+            raise ValueError(f"{len(orphan_list)} nodes have a parent_id that is not an id. (id, parent_id) = {orphan_list[:10]}")
+
+        # NOTE TreeRecord は最初の空欄で道を切るので、テキストが空欄のノードに子があると、子孫ごと消えてしまう
+        id_list = None
+        blank_parent_id_list = []
+        for node_index, text in enumerate(self._text_list):
+            if text is None and first_child_list[node_index] != NONE:
+                if id_list is None:
+                    id_list = list(self._id_to_node_index.keys())
+                blank_parent_id_list.append(id_list[node_index])
+
+        if 0 < len(blank_parent_id_list):
+            raise ValueError(f"{len(blank_parent_id_list)} nodes have a blank text but have children. {blank_parent_id_list[:10]=}")
+
+        self._first_root = first_root
+        self._first_child_list = first_child_list
+        self._younger_sibling_list = younger_sibling_list
+
+
+    def _count_length_of_nodes(self):
+        """根から一番深い葉までのノードの数を数えます。
+        ノードの親は１つだけなので、根からたどれないノードは、親をたどると輪になるノードか、その子孫です"""
+
+        length_of_nodes = 0
+        is_reachable_list = [False] * len(self._text_list)
+
+        for node_index, depth_th in self._iter_preorder():
+            is_reachable_list[node_index] = True
+
+            if length_of_nodes <= depth_th:
+                length_of_nodes = depth_th + 1
+
+        cycle_id_list = [node_id for node_id, node_index in self._id_to_node_index.items() if not is_reachable_list[node_index]]
+        if 0 < len(cycle_id_list):
+            raise ValueError(f"{len(cycle_id_list)} nodes cannot be reached from a root because their parents form a cycle. {cycle_id_list[:10]=}")
+
+        return length_of_nodes
+
+
+    def _iter_preorder(self):
+        """根から深さ優先で、ノードの番号と根からの深さを先行順に返します。再帰は使いません"""
+
+        NONE = TreeAdjacencyReader._NONE
+        first_child_list = self._first_child_list
+        younger_sibling_list = self._younger_sibling_list
+
+        # 根から今のノードまでの道
+        path_node_index_list = []
+
+        node_index = self._first_root
+        while node_index != NONE:
+            yield node_index, len(path_node_index_list)
+            path_node_index_list.append(node_index)
+
+            # 子があれば下りる
+            child_index = first_child_list[node_index]
+            if child_index != NONE:
+                node_index = child_index
+                continue
+
+            # 弟があるところまで上る
+            node_index = NONE
+            while 0 < len(path_node_index_list):
+                younger_sibling_index = younger_sibling_list[path_node_index_list.pop()]
+                if younger_sibling_index != NONE:
+                    node_index = younger_sibling_index
+                    break
 
-            # 中間～葉ノード
-            for node_th in range(1, self._actual_length_of_nodes):
-                node_list.append(TreeNode(edge_text=df.at[no, f'edge{node_th}'], text=df.at[no, f'node{node_th}']))
 
+    @property
+    def actual_length_of_nodes(self):
+        """根から一番深い葉までのノードの数"""
+        return self._actual_length_of_nodes
+
+
+    def iter_records(self):
+        """根から葉までの道を、１件ずつ返すジェネレーター。何周でも読めます
+
+        Returns
+        -------
+        record : TreeRecord
+            レコード。 no は 1 から始まる連番
+        """
+
+        NONE = TreeAdjacencyReader._NONE
+        first_child_list = self._first_child_list
+        edge_text_list = self._edge_text_list
+        text_list = self._text_list
+        length_of_nodes = self._actual_length_of_nodes
+
+        # 根から今のノードまでの道
+        path_node_list = []
+
+        no = 0
 
-            # レコード作成
-            record = TreeRecord(
-                    no=no,
-                    node_list=node_list)
+        for node_index, depth_th in self._iter_preorder():
+            del path_node_list[depth_th:]
+
+            # 根に辺は無い
+            path_node_list.append(TreeNode(
+                    edge_text=None if depth_th == 0 else edge_text_list[node_index],
+                    text=text_list[node_index]))
+
+            # 葉まで来たら１件
+            if first_child_list[node_index] == NONE:
+                no += 1
+                yield TreeRecord(
+                        no=no,
+                        node_list=path_node_list,
+                        length_of_nodes=length_of_nodes)
+
+
+    def for_each(self, on_each):
+        """
+        Parameters
+        ----------
+        on_each : func
+            行番号と TreeRecord 引数を受け取る関数
+        """
 
+        for row_number, record in enumerate(self.iter_records()):
             on_each(row_number, record)
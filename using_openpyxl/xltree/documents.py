@@ -0,0 +1,330 @@
+import html
+import unicodedata
+
+from xltree.library import is_blank
+from xltree.models import TreeModel, TreeLayout
+from xltree.stats import RenderStats
+
+
+# 罫線が下の件へ続く（弟がいる）罫線の種類
+_KIND_OF_EDGE_TO_BELOW_SET = {
+    TreeModel.KIND_OF_EDGE_DOWNWARD,
+    TreeModel.KIND_OF_EDGE_RIGHTWARD,
+    TreeModel.KIND_OF_EDGE_VERTICAL}
+
+
+class TreeDocumentDrawer():
+    """樹形図を、ワークブックではなくテキストの文書として、上から順にファイルへ書き出します。
+    ノードは、始まる件で１度だけ書き出します。 `tree` コマンドのように、１行に１ノードです
+
+    罫線の最終形は TreeLayout で先に求めておくので、持つのは件数に比例する小さな配列だけです。
+    書いた行はすぐファイルへ流すので、件数が多くても文書は溜め込みません。
+    書式ごとの書き方は、継承したクラスで _on_begin(), _on_node(), _on_end() を実装してください"""
+
+
+    def __init__(self, tree_table, file, title=None, tree_layout=None, stats=None):
+        """初期化
+
+        Parameters
+        ----------
+        tree_table : TreeTable または TreeCsvReader
+            ツリーテーブル。 TreeCsvReader なら、ファイルを２周読みます
+        file : io.TextIOBase
+            書き出し先。 sys.stdout も渡せます
+        title : str
+            文書の題。省略可
+        tree_layout : TreeLayout
+            罫線の最終形。省略すると render() で作ります
+        stats : RenderStats
+            描画の統計。省略可
+        """
+        self._tree_table = tree_table
+        self._file = file
+        self._title = title
+        self._tree_layout = tree_layout
+        self._stats = stats if stats is not None else RenderStats()
+
+
+    @property
+    def tree_layout(self):
+        """罫線の最終形。 prepare() の前は、渡されたものか None"""
+        return self._tree_layout
+
+
+    def prepare(self):
+        """書き出す前に、レコードを１周読んで罫線の最終形を調べます。 render() が呼び出すので、省略可"""
+
+        if self._tree_layout is None:
+            self._tree_layout = TreeLayout.from_records(
+                    records=self._tree_table.iter_records(),
+                    length_of_nodes=self._tree_table.actual_length_of_nodes)
+
+
+    def render(self):
+        """描画"""
+
+        self.prepare()
+
+        tree_layout = self._tree_layout
+        kind_of_edge_matrix = tree_layout.kind_of_edge_matrix
+
+        self._on_begin()
+
+        for row_number, record in enumerate(self._tree_table.iter_records()):
+            # 層ごとの、弟がいるか。祖先の縦線を下へ伸ばすかどうかにも使う
+            has_younger_sibling_list = [kind in _KIND_OF_EDGE_TO_BELOW_SET for kind in kind_of_edge_matrix[row_number].tolist()]
+
+            # 前件と同じノードは、もう書き出している
+            for depth_th in range(tree_layout.get_same_depth_as_above(row_number), tree_layout.get_node_count(row_number)):
+                nd = record.node_at(depth_th=depth_th)
+
+                self._on_node(
+                        depth_th=depth_th,
+                        edge_text=_to_text(nd.edge_text) if 0 < depth_th else '',
+                        text=_to_text(nd.text),
+                        has_younger_sibling_list=has_younger_sibling_list)
+
+            self._stats.count_records()
+
+        self._on_end()
+
+
+    def _on_begin(self):
+        pass
+
+
+    def _on_node(self, depth_th, edge_text, text, has_younger_sibling_list):
+        """ノードを１つ書き出します
+
+        Parameters
+        ----------
+        depth_th : int
+            第何層。根層は 0
+        edge_text : str
+            親ノードからの辺のテキスト。無ければ空文字列
+        text : str
+            ノードのテキスト
+        has_younger_sibling_list : list<bool>
+            層ごとの、弟がいるか。 depth_th より浅い層は祖先の分です
+        """
+        raise NotImplementedError()
+
+
+    def _on_end(self):
+        pass
+
+
+def _to_text(value):
+    """空欄（None または NaN）は空文字列"""
+
+    if is_blank(value):
+        return ''
+
+    return str(value)
+
+
+class TextTreeDrawer(TreeDocumentDrawer):
+    """`tree` コマンドのような、罫線素片のテキスト
+
+    しりとり
+    ├─ あ ─ リアス海岸
+    └─ す ─ リス
+        └─ み ─ すみれ
+    """
+
+
+    def _on_node(self, depth_th, edge_text, text, has_younger_sibling_list):
+
+        # 根
+        if depth_th == 0:
+            self._file.write(f"{text}\n")
+            return
+
+        # 祖先の縦線。第0層は根なので、縦線は無い
+        indent = ''.join(['│   ' if has_younger_sibling else '    ' for has_younger_sibling in has_younger_sibling_list[1:depth_th]])
+
+        if has_younger_sibling_list[depth_th]:
+            connector = '├'
+        else:
+            connector = '└'
+
+        if edge_text == '':
+            self._file.write(f"{indent}{connector}── {text}\n")
+        else:
+            self._file.write(f"{indent}{connector}─ {edge_text} ─ {text}\n")
+
+
+class HtmlTreeDrawer(TreeDocumentDrawer):
+    """入れ子のリストで書いた、１ファイルで完結する HTML。罫線は CSS で引きます"""
+
+
+    _STYLE = ''.join([
+        'body{font-family:sans-serif;font-size:14px}',
+        'ul.tree,ul.tree ul{list-style:none;margin:0;padding:0}',
+        'ul.tree ul{margin-left:0.75em}',
+        'ul.tree ul>li{position:relative;padding-left:1.5em}',
+        # 兄弟を繋ぐ縦線。末っ子は自分の高さの真ん中まで
+        'ul.tree ul>li::before{content:"";position:absolute;left:0;top:0;height:100%;border-left:1px solid #000}',
+        'ul.tree ul>li:last-child::before{height:0.8em}',
+        # 親からの横線
+        'ul.tree ul>li::after{content:"";position:absolute;left:0;top:0.8em;width:1.25em;border-top:1px solid #000}',
+        'ul.tree li>span.edge{font-size:0.8em;color:#666;margin-right:0.25em}',
+        'ul.tree li>span.node{display:inline-block;margin:0.1em 0;padding:0 0.25em;line-height:1.4em;background:#FFFFCC;border:1px solid #000}',
+    ])
+
+
+    def __init__(self, tree_table, file, title=None, tree_layout=None, stats=None):
+        super().__init__(tree_table=tree_table, file=file, title=title, tree_layout=tree_layout, stats=stats)
+
+        # 最後に開いた li の層。まだ無ければ None
+        self._open_depth_th = None
+
+
+    def _on_begin(self):
+        title = html.escape(self._title if self._title is not None else 'Tree')
+        self._file.write(f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{title}</title><style>{HtmlTreeDrawer._STYLE}</style></head>\n<body>\n<ul class="tree">')
+
+
+    def _on_node(self, depth_th, edge_text, text, has_younger_sibling_list):
+        open_depth_th = self._open_depth_th
+
+        # 子は、親の li の中に ul を開く。同じ件の中では１層ずつ深くなる
+        if open_depth_th is not None and open_depth_th < depth_th:
+            self._file.write('<ul>')
+
+        # 弟、または祖先の弟は、開いている li を閉じる
+        elif open_depth_th is not None:
+            self._file.write('</li>' + '</ul></li>' * (open_depth_th - depth_th) + '\n')
+
+        if edge_text == '':
+            self._file.write(f'<li><span class="node">{html.escape(text)}</span>')
+        else:
+            self._file.write(f'<li><span class="edge">{html.escape(edge_text)}</span><span class="node">{html.escape(text)}</span>')
+
+        self._open_depth_th = depth_th
+
+
+    def _on_end(self):
+        if self._open_depth_th is not None:
+            self._file.write('</li>' + '</ul></li>' * self._open_depth_th)
+
+        self._file.write('</ul>\n</body></html>\n')
+
+
+class SvgTreeDrawer(TreeDocumentDrawer):
+    """１行に１ノードを書いた SVG
+
+    NOTE SVG は大きさを先頭に書く必要があるので、罫線の最終形を調べる１周で、テキストの幅も見積もっておきます。
+    罫線の最終形を渡されたときは、幅を見積もるためだけにもう１周読みます"""
+
+
+    _LINE_HEIGHT = 20   # １行の高さ。ピクセル
+    _INDENT = 24        # １層の字下げ。ピクセル
+    _FONT_SIZE = 14     # 文字の大きさ。ピクセル
+    _PADDING = 8        # 余白。ピクセル
+
+
+    def __init__(self, tree_table, file, title=None, tree_layout=None, stats=None):
+        super().__init__(tree_table=tree_table, file=file, title=title, tree_layout=tree_layout, stats=stats)
+
+        # 書き出したノードの行数
+        self._len_lines = 0
+
+        # 一番右まで伸びるノードの右端。ピクセル
+        self._max_right = None
+
+
+    def prepare(self):
+
+        if self._max_right is not None:
+            return
+
+        self._max_right = 0
+
+        def iter_measured_records(records):
+            for record in records:
+                self._measure_record(record)
+                yield record
+
+        if self._tree_layout is None:
+            self._tree_layout = TreeLayout.from_records(
+                    records=iter_measured_records(self._tree_table.iter_records()),
+                    length_of_nodes=self._tree_table.actual_length_of_nodes)
+
+        else:
+            for _ in iter_measured_records(self._tree_table.iter_records()):
+                pass
+
+
+    def _measure_record(self, record):
+        """ノードの右端を見積もります"""
+
+        # 前の件と同じノードも測り直すが、テキストの文字数を数えるだけなので軽い
+        for depth_th in range(0, record.get_th_of_leaf_node()):
+            nd = record.node_at(depth_th=depth_th)
+            text = _to_text(nd.text)
+
+            edge_text = _to_text(nd.edge_text) if 0 < depth_th else ''
+            right = depth_th * SvgTreeDrawer._INDENT + SvgTreeDrawer._measure_width(f'{edge_text} {text}')
+            if self._max_right < right:
+                self._max_right = right
+
+
+    def _on_begin(self):
+        width = SvgTreeDrawer._PADDING * 2 + int(self._max_right) + 1
+        height = SvgTreeDrawer._PADDING * 2 + self._tree_layout.len_nodes * SvgTreeDrawer._LINE_HEIGHT
+
+        self._file.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" font-size="{SvgTreeDrawer._FONT_SIZE}">\n')
+
+        if self._title is not None:
+            self._file.write(f'<title>{html.escape(self._title)}</title>\n')
+
+        self._file.write('<style>path{fill:none;stroke:#000;stroke-width:1}tspan.edge{fill:#666;font-size:0.8em}</style>\n')
+
+
+    @staticmethod
+    def _measure_width(text):
+        """テキストの幅の見積もり。全角は文字の大きさ、半角はその 0.6 倍"""
+        return sum([SvgTreeDrawer._FONT_SIZE if unicodedata.east_asian_width(ch) in ('W', 'F') else SvgTreeDrawer._FONT_SIZE * 0.6 for ch in text])
+
+
+    def _on_node(self, depth_th, edge_text, text, has_younger_sibling_list):
+        line_height = SvgTreeDrawer._LINE_HEIGHT
+        indent = SvgTreeDrawer._INDENT
+
+        top = SvgTreeDrawer._PADDING + self._len_lines * line_height
+        middle = top + line_height // 2
+        bottom = top + line_height
+        left = SvgTreeDrawer._PADDING + depth_th * indent
+
+        # 罫線。第0層は根なので、罫線は無い
+        if 0 < depth_th:
+            path_list = []
+
+            # 祖先の縦線
+            for ancestor_depth_th in range(1, depth_th):
+                if has_younger_sibling_list[ancestor_depth_th]:
+                    x = SvgTreeDrawer._PADDING + ancestor_depth_th * indent - indent // 2
+                    path_list.append(f'M{x},{top}V{bottom}')
+
+            # 自分への罫線。弟がいれば、縦線は下まで伸ばす
+            x = left - indent // 2
+            if has_younger_sibling_list[depth_th]:
+                path_list.append(f'M{x},{top}V{bottom}M{x},{middle}H{left - 2}')
+            else:
+                path_list.append(f'M{x},{top}V{middle}H{left - 2}')
+
+            self._file.write(f'<path d="{"".join(path_list)}"/>')
+
+        baseline = middle + SvgTreeDrawer._FONT_SIZE // 3
+
+        if edge_text == '':
+            self._file.write(f'<text x="{left}" y="{baseline}">{html.escape(text)}</text>\n')
+        else:
+            self._file.write(f'<text x="{left}" y="{baseline}"><tspan class="edge">{html.escape(edge_text)}</tspan> {html.escape(text)}</text>\n')
+
+        self._len_lines += 1
+
+
+    def _on_end(self):
+        self._file.write('</svg>\n')
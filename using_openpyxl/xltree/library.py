@@ -1,4 +1,6 @@
-# 循環参照を防ぐために、何もインポートしません
+# 循環参照を防ぐために、 xltree のモジュールは何もインポートしません
+import math
+import sys
 
 # ダンプで使う
 INDENT = '    '
@@ -10,3 +12,24 @@ def nth(n):
     📖 [Ordinal numbers replacement](https://stackoverflow.com/questions/9647202/ordinal-numbers-replacement)
     """
     return "%d%s" % (n,"tsnrhtdd"[(n//10%10!=1)*(n%10<4)*n%10::4])
+
+
+def is_blank(value):
+    """空欄か？　pd.isnull() の代わりに使います。 pandas をインポートしないで済むように、よくある None と文字列、 NaN を先に調べます
+
+    NOTE pandas の NA や NaT は、 pandas が既にインポートされているときだけ現れるので、そのときだけ pd.isnull() に任せます"""
+
+    if value is None:
+        return True
+
+    if type(value) is str:
+        return False
+
+    if isinstance(value, float):
+        return math.isnan(value)
+
+    pandas_module = sys.modules.get('pandas')
+    if pandas_module is None:
+        return False
+
+    return bool(pandas_module.isnull(value))
@@ -1,6 +1,23 @@
+import array
+
+import numpy as np
+
+
 class TreeModel():
 
 
+    # 罫線の種類の行列に入れる値
+    KIND_OF_EDGE_NONE = 0       # 何も描かない
+    KIND_OF_EDGE_HORIZONTAL = 1 # ─字
+    KIND_OF_EDGE_DOWNWARD = 2   # ┬字
+    KIND_OF_EDGE_RIGHTWARD = 3  # ├字
+    KIND_OF_EDGE_UPWARD = 4     # └字
+    KIND_OF_EDGE_VERTICAL = 5   # │字
+
+    # 行列の値から罫線の種類へ
+    KIND_OF_EDGE_LIST = [None, '─字', '┬字', '├字', '└字', '│字']
+
+
     @staticmethod
     def is_same_path_as_avobe(curr_record, prev_record, depth_th):
         """自件と前件を比較して、根から自ノードまで、ノードテキストが等しいか？"""
@@ -92,3 +109,760 @@ class TreeModel():
                 curr_record=next_record,
                 prev_record=curr_record,
                 depth_th=predepth_th)
+
+
+    @staticmethod
+    def create_depth_arrays(tree_table):
+        """各件のノードの数と、隣り合う件どうしが根から何層まで同じかを、まとめて数えます。
+        ノードの列を NumPy の配列として１回だけ取り出し、ノードテキストの比較も１回だけ行います
+
+        Parameters
+        ----------
+        tree_table : TreeTable
+            ツリーテーブル
+
+        Returns
+        -------
+        node_count_array : numpy.ndarray
+            各件の、根から途切れずに続くノードの数。要素数は件数
+        same_depth_array : numpy.ndarray
+            第 i 件と第 i+1 件を根から比べて、ノードテキストが等しい層の数。要素数は件数 - 1
+        """
+
+        column_name_list = [f'node{node_th}' for node_th in range(0, tree_table.actual_length_of_nodes)]
+
+        # 共有の辞書の整数コードで持っているなら、整数どうしの比較で済む。空欄は -1
+        if tree_table.is_text_encoded:
+            node_matrix = np.column_stack([tree_table.df[column_name].cat.codes.to_numpy() for column_name in column_name_list])
+            is_present_matrix = 0 <= node_matrix
+
+        else:
+            node_df = tree_table.df[column_name_list]
+            node_matrix = node_df.to_numpy(dtype=object)
+
+            # 空欄は NaN。 pandas はデータフレームのメソッドで調べて、このモジュールではインポートしない
+            is_present_matrix = node_df.notna().to_numpy()
+
+        # 根から途切れずに真が続く数
+        node_count_array = np.cumprod(is_present_matrix, axis=1).sum(axis=1)
+
+        # NOTE NaN は NaN と等しくないが、念のため空欄どうしは等しくないものとする
+        is_same_matrix = (node_matrix[1:] == node_matrix[:-1]) & is_present_matrix[1:] & is_present_matrix[:-1]
+        same_depth_array = np.cumprod(is_same_matrix, axis=1).sum(axis=1)
+
+        return node_count_array, same_depth_array
+
+
+    @staticmethod
+    def count_nodes(record):
+        """根から途切れずに続くノードの数"""
+
+        # レコードは葉より深いノードを持たない
+        return record.get_th_of_leaf_node()
+
+
+    @staticmethod
+    def count_same_nodes(prev_record, curr_record):
+        """前件と自件を根から比べて、ノードテキストが等しい層の数"""
+
+        # 葉より深い層は比べるまでもない
+        len_node_list = min(prev_record.get_th_of_leaf_node(), curr_record.get_th_of_leaf_node())
+
+        for depth_th in range(0, len_node_list):
+            if prev_record.node_at(depth_th=depth_th).text != curr_record.node_at(depth_th=depth_th).text:
+                return depth_th
+
+        return len_node_list
+
+
+    @staticmethod
+    def create_depth_arrays_by_records(records):
+        """TreeModel.create_depth_arrays() と同じものを、レコードを１件ずつ読みながら数えます。
+        手元に持つのは前件と自件の２件だけなので、データフレームが無くても使えます
+
+        Parameters
+        ----------
+        records : iterable<TreeRecord>
+            先頭から順に並んだレコード
+        """
+
+        # NOTE 件数が多いと Python の int のリストは大きくなるので、詰めて持つ
+        node_count_list = array.array('q')
+        same_depth_list = array.array('q')
+        prev_record = None
+
+        for record in records:
+            if prev_record is not None:
+                same_depth_list.append(TreeModel.count_same_nodes(prev_record=prev_record, curr_record=record))
+
+            node_count_list.append(TreeModel.count_nodes(record=record))
+            prev_record = record
+
+        return np.array(node_count_list, dtype=np.int64), np.array(same_depth_list, dtype=np.int64)
+
+
+    @staticmethod
+    def create_kind_of_edge_matrix(tree_table):
+        """罫線の種類の行列。消しゴム（TreeEraser）を掛けた後と同じ最終形です
+
+        Parameters
+        ----------
+        tree_table : TreeTable
+            ツリーテーブル
+
+        Returns
+        -------
+        kind_of_edge_matrix : numpy.ndarray
+            行は件、列は層の uint8 の行列。値は TreeModel.KIND_OF_EDGE_NONE などです
+        """
+        node_count_array, same_depth_array = TreeModel.create_depth_arrays(tree_table=tree_table)
+
+        return TreeModel.create_kind_of_edge_matrix_by_depth_arrays(
+                node_count_array=node_count_array,
+                same_depth_array=same_depth_array,
+                length_of_nodes=tree_table.actual_length_of_nodes)
+
+
+    @staticmethod
+    def create_kind_of_edge_matrix_by_depth_arrays(node_count_array, same_depth_array, length_of_nodes):
+        """TreeModel.create_depth_arrays() の結果から、罫線の種類の行列を作ります。
+        層ごとに全件まとめて計算するので、計算量は 件数 × 層数 です"""
+
+        len_records = len(node_count_array)
+        kind_of_edge_matrix = np.zeros((len_records, length_of_nodes), dtype=np.uint8)
+
+        if len_records == 0:
+            return kind_of_edge_matrix
+
+        # 前件と、根から何層まで同じか。先頭行は 0
+        same_depth_as_above_array = np.concatenate(([0], same_depth_array))
+
+        # 件と件の境目。最終行の後ろにも、番兵の境目を置く
+        boundary_index_array = np.arange(len_records)
+        same_depth_at_boundary_array = np.concatenate((same_depth_array, [-1]))
+        next_node_count_array = np.concatenate((node_count_array[1:], [0]))
+
+        # 第0層は根なので、辺は無い
+        for depth_th in range(1, length_of_nodes):
+
+            # 自ノードが途切れる境目の、最初のもの
+            is_end_array = same_depth_at_boundary_array <= depth_th
+            end_index_array = np.where(is_end_array, boundary_index_array, len_records - 1)
+            end_index_array = np.minimum.accumulate(end_index_array[::-1])[::-1]
+
+            # 途切れた次件が、親まで同じで自ノードとは違うノードを持っていれば弟
+            is_younger_sibling_at_boundary_array = (same_depth_at_boundary_array == depth_th) & (depth_th < next_node_count_array)
+            has_younger_sibling_array = is_younger_sibling_at_boundary_array[end_index_array]
+
+            # 根から自ノードまで前件と同じか？
+            is_same_path_as_above_array = depth_th < same_depth_as_above_array
+
+            # 前行は兄か？
+            has_elder_sibling_array = depth_th <= same_depth_as_above_array
+
+            kind_array = np.select(
+                    [
+                        is_same_path_as_above_array & has_younger_sibling_array,
+                        is_same_path_as_above_array,
+                        has_elder_sibling_array & has_younger_sibling_array,
+                        has_elder_sibling_array,
+                        has_younger_sibling_array,
+                    ],
+                    [
+                        TreeModel.KIND_OF_EDGE_VERTICAL,
+                        TreeModel.KIND_OF_EDGE_NONE,
+                        TreeModel.KIND_OF_EDGE_RIGHTWARD,
+                        TreeModel.KIND_OF_EDGE_UPWARD,
+                        TreeModel.KIND_OF_EDGE_DOWNWARD,
+                    ],
+                    default=TreeModel.KIND_OF_EDGE_HORIZONTAL)
+
+            # ノードが無ければ何も描かない
+            kind_array[node_count_array <= depth_th] = TreeModel.KIND_OF_EDGE_NONE
+
+            kind_of_edge_matrix[:, depth_th] = kind_array
+
+        return kind_of_edge_matrix
+
+
+class TreeLayout():
+    """罫線の最終形
+
+    前件、自件、次件を見比べるだけでは、垂直線を下へ伸ばしてよいか（弟がいるか）が分かりません。
+    そこで隣り合う件どうしが根から何層まで同じかを、先に１回だけ数えておきます。
+    これを使うと、要らない罫線を引いてから消す（TreeEraser）必要が無くなります"""
+
+
+    def __init__(self, kind_of_edge_matrix, node_count_array, same_depth_array):
+        """初期化
+
+        Parameters
+        ----------
+        kind_of_edge_matrix : numpy.ndarray
+            罫線の種類の行列。 TreeModel.create_kind_of_edge_matrix() を参照
+        node_count_array : numpy.ndarray
+            件ごとの、根から途切れずに続くノードの数
+        same_depth_array : numpy.ndarray
+            第 i 件と第 i+1 件を根から比べて、ノードテキストが等しい層の数。要素数は件数 - 1
+        """
+        self._kind_of_edge_matrix = kind_of_edge_matrix
+        self._node_count_array = node_count_array
+        self._same_depth_array = same_depth_array
+
+
+    @staticmethod
+    def from_tree_table(tree_table):
+        """テーブルから作成"""
+
+        node_count_array, same_depth_array = TreeModel.create_depth_arrays(tree_table=tree_table)
+
+        kind_of_edge_matrix = TreeModel.create_kind_of_edge_matrix_by_depth_arrays(
+                node_count_array=node_count_array,
+                same_depth_array=same_depth_array,
+                length_of_nodes=tree_table.actual_length_of_nodes)
+
+        return TreeLayout(kind_of_edge_matrix=kind_of_edge_matrix, node_count_array=node_count_array, same_depth_array=same_depth_array)
+
+
+    @staticmethod
+    def from_records(records, length_of_nodes):
+        """先頭から順に並んだレコードを１回だけ読んで作成。 TreeCsvReader のように、データフレームが無いときに使います"""
+
+        node_count_array, same_depth_array = TreeModel.create_depth_arrays_by_records(records=records)
+
+        kind_of_edge_matrix = TreeModel.create_kind_of_edge_matrix_by_depth_arrays(
+                node_count_array=node_count_array,
+                same_depth_array=same_depth_array,
+                length_of_nodes=length_of_nodes)
+
+        return TreeLayout(kind_of_edge_matrix=kind_of_edge_matrix, node_count_array=node_count_array, same_depth_array=same_depth_array)
+
+
+    def select(self, row_number_array, first_depth_th=0, len_depths=None):
+        """一部の件と層だけを、１枚の樹形図として描くための罫線の最終形。シートを分けるときに使います
+
+        先頭の件は、上に件が無いので、前件と同じノードも描き、罫線は上へ伸ばさずに親から引き直します。
+        first_depth_th 層を根とみなすので、その層にノードが無い件は選ばないでください
+
+        Parameters
+        ----------
+        row_number_array : numpy.ndarray
+            選ぶ件の、0から始まる行番号。昇順
+        first_depth_th : int
+            根とみなす層
+        len_depths : int
+            選ぶ層の数。省略すると first_depth_th から最後の層まで
+
+        Returns
+        -------
+        tree_layout : TreeLayout
+            選んだ件の行番号を 0 から、選んだ層を 0 から数え直したもの
+        """
+
+        if len_depths is None:
+            len_depths = self._kind_of_edge_matrix.shape[1] - first_depth_th
+
+        row_number_array = np.asarray(row_number_array, dtype=np.int64)
+
+        kind_of_edge_matrix = self._kind_of_edge_matrix[row_number_array, first_depth_th:first_depth_th + len_depths]
+        node_count_array = np.clip(self._node_count_array[row_number_array] - first_depth_th, 0, len_depths)
+
+        # 選んだ件と次に選んだ件の間で、根から等しい層の数は、間の件どうしの最小
+        if len(row_number_array) < 2:
+            same_depth_array = np.zeros(0, dtype=self._same_depth_array.dtype)
+        else:
+            same_depth_array = np.minimum.reduceat(self._same_depth_array[:row_number_array[-1]], row_number_array[:-1])
+            same_depth_array = np.clip(same_depth_array - first_depth_th, 0, len_depths)
+
+        # 先頭の件の罫線は、上の件から続けずに、親から引く
+        if 0 < len(row_number_array):
+            first_kind_array = kind_of_edge_matrix[0]
+            has_node_array = np.arange(len_depths) < node_count_array[0]
+
+            # 弟がいれば '┬字'、いなければ '─字'
+            has_younger_sibling_array = np.isin(first_kind_array, (TreeModel.KIND_OF_EDGE_DOWNWARD, TreeModel.KIND_OF_EDGE_RIGHTWARD, TreeModel.KIND_OF_EDGE_VERTICAL))
+            first_kind_array[has_node_array & has_younger_sibling_array] = TreeModel.KIND_OF_EDGE_DOWNWARD
+            first_kind_array[has_node_array & ~has_younger_sibling_array] = TreeModel.KIND_OF_EDGE_HORIZONTAL
+
+        # 根とみなす層に辺は無い
+        kind_of_edge_matrix[:, 0:1] = TreeModel.KIND_OF_EDGE_NONE
+
+        return TreeLayout(kind_of_edge_matrix=kind_of_edge_matrix, node_count_array=node_count_array, same_depth_array=same_depth_array)
+
+
+    @property
+    def kind_of_edge_matrix(self):
+        return self._kind_of_edge_matrix
+
+
+    @property
+    def node_count_array(self):
+        """件ごとの、根から途切れずに続くノードの数"""
+        return self._node_count_array
+
+
+    @property
+    def same_depth_array(self):
+        """件と次件の間ごとの、根から比べてノードテキストが等しい層の数"""
+        return self._same_depth_array
+
+
+    @property
+    def len_records(self):
+        return len(self._kind_of_edge_matrix)
+
+
+    @property
+    def len_nodes(self):
+        """ノードの数。同じノードが複数の件に跨っていても１つと数えます"""
+
+        if self.len_records == 0:
+            return 0
+
+        # 各件で、前件と同じでない層から数え始める
+        return int(self._node_count_array.sum() - self._same_depth_array.sum())
+
+
+    def get_node_count(self, row_number):
+        """根から途切れずに続くノードの数"""
+        return int(self._node_count_array[row_number])
+
+
+    def get_same_depth_as_above(self, row_number):
+        """前件と根から比べて、ノードテキストが等しい層の数。先頭行は 0"""
+
+        if row_number == 0:
+            return 0
+
+        return int(self._same_depth_array[row_number - 1])
+
+
+    def is_same_path_as_above(self, row_number, depth_th):
+        """自件と前件を比較して、根から自ノードまで、ノードテキストが等しいか？"""
+
+        if row_number == 0:
+            return False
+
+        return depth_th < self._same_depth_array[row_number - 1]
+
+
+    def has_node(self, row_number, depth_th):
+        """根から途切れずに、その層にノードがあるか？"""
+        return depth_th < self._node_count_array[row_number]
+
+
+    def has_younger_sibling(self, row_number, depth_th):
+        """その層のノードに弟がいるか？　'┬字', '├字', '│字' のように、罫線が下の件へ続くなら真"""
+        return self._kind_of_edge_matrix[row_number, depth_th] in (
+                TreeModel.KIND_OF_EDGE_DOWNWARD,
+                TreeModel.KIND_OF_EDGE_RIGHTWARD,
+                TreeModel.KIND_OF_EDGE_VERTICAL)
+
+
+    def get_span_of_node(self, row_number, depth_th):
+        """その層のノードが跨る行の範囲
+
+        Parameters
+        ----------
+        row_number : int
+            0から始まる行番号
+        depth_th : int
+            第何層。根層は 0
+
+        Returns
+        -------
+        first_row_number : int
+            ノードが始まる行番号
+        last_row_number : int
+            ノードが終わる行番号。この行も含みます
+        """
+
+        # 第 i 件と第 i+1 件の間で、ノードが途切れる境目
+        above_index_array = np.flatnonzero(self._same_depth_array[:row_number] <= depth_th)
+        below_index_array = np.flatnonzero(self._same_depth_array[row_number:] <= depth_th)
+
+        if len(above_index_array) == 0:
+            first_row_number = 0
+        else:
+            first_row_number = int(above_index_array[-1]) + 1
+
+        if len(below_index_array) == 0:
+            last_row_number = self.len_records - 1
+        else:
+            last_row_number = row_number + int(below_index_array[0])
+
+        return first_row_number, last_row_number
+
+
+    def get_span_list(self, depth_th):
+        """その層のノードごとの、跨る行の範囲のリスト。上から順です。
+        その層にノードが無い件は、１件ずつ別の範囲になります
+
+        Returns
+        -------
+        span_list : list<tuple>
+            (first_row_number, last_row_number) のリスト。 get_span_of_node() を参照
+        """
+
+        if self.len_records == 0:
+            return []
+
+        end_index_array = np.flatnonzero(self._same_depth_array <= depth_th)
+        first_row_number_list = [0] + (end_index_array + 1).tolist()
+        last_row_number_list = end_index_array.tolist() + [self.len_records - 1]
+
+        return list(zip(first_row_number_list, last_row_number_list))
+
+
+    def get_kind_of_edge(self, row_number, depth_th):
+        """消しゴムを掛けた後と同じ、罫線の最終形
+
+        Parameters
+        ----------
+        row_number : int
+            0から始まる行番号
+        depth_th : int
+            第何層。根層は 0
+
+        Returns
+        -------
+        kind : str
+            '─字', '┬字', '├字', '└字', '│字' のいずれか。何も描かないなら None
+        """
+        return TreeModel.KIND_OF_EDGE_LIST[self._kind_of_edge_matrix[row_number, depth_th]]
+
+
+class TreeIndex():
+    """樹形図の構造の索引
+
+    ノードに通し番号（ノードID）を振ります。
+    ノードIDは根から深さ優先の順（行順、層順）に振るので、あるノードの子孫のノードIDは、そのノードIDのすぐ後ろに続きます。
+    親、長子、兄、弟へのリンク、子孫の葉の数、ノードが跨る行の範囲を持つので、兄弟や祖先を調べるのに前後の件を見比べる必要がありません。
+
+    ノードを１つずつ作るのではなく、 TreeModel.create_depth_arrays() と同じ、件ごとのノードの数と前件と同じ層の数から、
+    全ノードの属性を NumPy の配列として層ごとにまとめて求めます。計算量は 件数 × 層数 です
+
+    NOTE 描画と同じく、根から同じパスが続く行は隣り合っているものとします。離れた行に同じパスが出てきたら、別のノードとして扱います
+    """
+
+
+    def __init__(self, node_id_matrix, row_number_array, depth_array, node_count_array, edge_text_list, text_list):
+        """初期化。 from_tree_table() か from_records() を使ってください
+
+        Parameters
+        ----------
+        node_id_matrix : numpy.ndarray
+            行ごとの、層ごとのノードID。ノードが無ければ -1
+        row_number_array : numpy.ndarray
+            ノードIDごとの、ノードが始まる行番号
+        depth_array : numpy.ndarray
+            ノードIDごとの、第何層か
+        node_count_array : numpy.ndarray
+            件ごとの、根から途切れずに続くノードの数
+        edge_text_list : list
+            ノードIDごとの辺のテキスト。空欄は None
+        text_list : list
+            ノードIDごとのノードのテキスト
+        """
+
+        len_nodes = len(row_number_array)
+        node_id_array = np.arange(len_nodes, dtype=np.int64)
+
+        self._node_id_matrix = node_id_matrix
+        self._depth_array = depth_array
+        self._first_row_number_array = row_number_array
+        self._edge_text_list = edge_text_list
+        self._text_list = text_list
+
+        # 親は、ノードが始まる行の、１つ浅い層のノード
+        self._parent_id_array = np.full(len_nodes, -1, dtype=np.int64)
+        is_child_array = 0 < depth_array
+        self._parent_id_array[is_child_array] = node_id_matrix[row_number_array[is_child_array], depth_array[is_child_array] - 1]
+
+        # ノードが始まる行では、葉まで新しいノードが続くので、長子は次のノードID
+        self._first_child_id_array = np.where(depth_array + 1 < node_count_array[row_number_array], node_id_array + 1, -1)
+
+        # ノードが跨る最後の行
+        self._last_row_number_array = row_number_array.copy()
+        has_node_matrix = 0 <= node_id_matrix
+        np.maximum.at(self._last_row_number_array, node_id_matrix[has_node_matrix], np.nonzero(has_node_matrix)[0])
+
+        # 最後の子孫は、ノードが跨る最後の行の葉
+        if 0 < len_nodes:
+            self._last_descendant_id_array = node_id_matrix[self._last_row_number_array, node_count_array[self._last_row_number_array] - 1]
+        else:
+            self._last_descendant_id_array = np.zeros(0, dtype=np.int64)
+
+        # 子孫の葉の数。子孫のノードIDは続いているので、葉の数の累積和の差で数える
+        is_leaf_array = self._first_child_id_array == -1
+        leaf_cumsum_array = np.cumsum(is_leaf_array)
+        self._leaf_count_array = leaf_cumsum_array[self._last_descendant_id_array] - leaf_cumsum_array + is_leaf_array
+
+        # 最後の子孫の次のノードが、同じ親を持てば弟
+        next_id_array = self._last_descendant_id_array + 1
+        has_next_array = next_id_array < len_nodes
+        self._younger_sibling_id_array = np.full(len_nodes, -1, dtype=np.int64)
+        self._younger_sibling_id_array[has_next_array] = np.where(
+                self._parent_id_array[next_id_array[has_next_array]] == self._parent_id_array[has_next_array],
+                next_id_array[has_next_array],
+                -1)
+
+        self._elder_sibling_id_array = np.full(len_nodes, -1, dtype=np.int64)
+        has_younger_sibling_array = self._younger_sibling_id_array != -1
+        self._elder_sibling_id_array[self._younger_sibling_id_array[has_younger_sibling_array]] = node_id_array[has_younger_sibling_array]
+
+        # 根のノードIDのリスト
+        self._root_id_list = np.flatnonzero(depth_array == 0).tolist()
+
+
+    @staticmethod
+    def from_tree_table(tree_table):
+        """テーブルから作成。ノードと辺の列は NumPy の配列として層ごとにまとめて取り出し、レコードは作りません"""
+
+        length_of_nodes = tree_table.actual_length_of_nodes
+        node_count_array, same_depth_array = TreeModel.create_depth_arrays(tree_table=tree_table)
+        node_id_matrix, row_number_array, depth_array = TreeIndex._create_node_id_matrix(
+                node_count_array=node_count_array,
+                same_depth_array=same_depth_array,
+                length_of_nodes=length_of_nodes)
+
+        # 新しいノードの始まるセルだけ、テキストを読む
+        df = tree_table.df
+        edge_text_array = np.full(len(row_number_array), None, dtype=object)
+        text_array = np.full(len(row_number_array), None, dtype=object)
+
+        for depth_th in range(0, length_of_nodes):
+            is_at_depth_array = depth_array == depth_th
+            at_row_number_array = row_number_array[is_at_depth_array]
+
+            text_array[is_at_depth_array] = df[f'node{depth_th}'].to_numpy(dtype=object)[at_row_number_array]
+
+            # 根に辺は無い。 TreeTable.iter_records() と同じく、空欄の辺は None
+            if 0 < depth_th:
+                edge_text_series = df[f'edge{depth_th}']
+                at_edge_text_array = edge_text_series.to_numpy(dtype=object)[at_row_number_array]
+                at_edge_text_array[edge_text_series.isna().to_numpy()[at_row_number_array]] = None
+                edge_text_array[is_at_depth_array] = at_edge_text_array
+
+        return TreeIndex(
+                node_id_matrix=node_id_matrix,
+                row_number_array=row_number_array,
+                depth_array=depth_array,
+                node_count_array=node_count_array,
+                edge_text_list=edge_text_array.tolist(),
+                text_list=text_array.tolist())
+
+
+    @staticmethod
+    def from_records(records, length_of_nodes):
+        """先頭から順に並んだレコードを１回だけ読んで作成。 TreeCsvReader のように、データフレームが無いときに使います
+
+        Parameters
+        ----------
+        records : iterable<TreeRecord>
+            レコード
+        length_of_nodes : int
+            層の数。根を含む
+        """
+
+        # NOTE 件数が多いと Python の int のリストは大きくなるので、詰めて持つ
+        node_count_list = array.array('q')
+        same_depth_list = array.array('q')
+
+        # 前件と違うノードのテキストだけ、ノードIDの順に持つ
+        edge_text_list = []
+        text_list = []
+        prev_record = None
+
+        for record in records:
+            node_count = TreeModel.count_nodes(record=record)
+
+            if prev_record is None:
+                same_depth = 0
+            else:
+                same_depth = TreeModel.count_same_nodes(prev_record=prev_record, curr_record=record)
+                same_depth_list.append(same_depth)
+
+            for depth_th in range(same_depth, node_count):
+                nd = record.node_at(depth_th=depth_th)
+                edge_text_list.append(nd.edge_text)
+                text_list.append(nd.text)
+
+            node_count_list.append(node_count)
+            prev_record = record
+
+        node_count_array = np.array(node_count_list, dtype=np.int64)
+        node_id_matrix, row_number_array, depth_array = TreeIndex._create_node_id_matrix(
+                node_count_array=node_count_array,
+                same_depth_array=np.array(same_depth_list, dtype=np.int64),
+                length_of_nodes=length_of_nodes)
+
+        return TreeIndex(
+                node_id_matrix=node_id_matrix,
+                row_number_array=row_number_array,
+                depth_array=depth_array,
+                node_count_array=node_count_array,
+                edge_text_list=edge_text_list,
+                text_list=text_list)
+
+
+    @staticmethod
+    def _create_node_id_matrix(node_count_array, same_depth_array, length_of_nodes):
+        """行ごとの、層ごとのノードIDの行列
+
+        Returns
+        -------
+        node_id_matrix : numpy.ndarray
+            行ごとの、層ごとのノードID。ノードが無ければ -1
+        row_number_array : numpy.ndarray
+            ノードIDごとの、ノードが始まる行番号
+        depth_array : numpy.ndarray
+            ノードIDごとの、第何層か
+        """
+
+        len_records = len(node_count_array)
+        depth_th_array = np.arange(length_of_nodes)
+
+        # 前件と、根から何層まで同じか。先頭行は 0
+        same_depth_as_above_array = np.concatenate(([0], same_depth_array))[:len_records]
+
+        # 前件と同じでない層から葉までが、新しいノード
+        has_node_matrix = depth_th_array < node_count_array[:, np.newaxis]
+        is_new_matrix = has_node_matrix & (same_depth_as_above_array[:, np.newaxis] <= depth_th_array)
+
+        # 行順、層順に並べると、根から深さ優先の順になる
+        row_number_array, depth_array = np.nonzero(is_new_matrix)
+
+        node_id_matrix = np.full((len_records, length_of_nodes), -1, dtype=np.int64)
+        node_id_matrix[is_new_matrix] = np.arange(len(row_number_array), dtype=np.int64)
+
+        # 前件と同じノードは、上の行のノードIDを引き継ぐ。ノードIDは下の行ほど大きい
+        node_id_matrix = np.maximum.accumulate(node_id_matrix, axis=0)
+        node_id_matrix[~has_node_matrix] = -1
+
+        return node_id_matrix, row_number_array.astype(np.int64), depth_array.astype(np.int64)
+
+
+    @property
+    def len_nodes(self):
+        """ノードの数"""
+        return len(self._parent_id_array)
+
+
+    @property
+    def root_id_list(self):
+        """根のノードIDのリスト。通常は１つ"""
+        return self._root_id_list
+
+
+    @property
+    def node_id_matrix(self):
+        """行ごとの、層ごとのノードID。ノードが無ければ -1"""
+        return self._node_id_matrix
+
+
+    def node_id_at(self, row_number, depth_th):
+        """第 row_number 行の、第 depth_th 層のノードID。ノードが無ければ -1"""
+        return int(self._node_id_matrix[row_number, depth_th])
+
+
+    def parent_id_of(self, node_id):
+        """親のノードID。根なら -1"""
+        return int(self._parent_id_array[node_id])
+
+
+    def first_child_id_of(self, node_id):
+        """長子のノードID。葉なら -1"""
+        return int(self._first_child_id_array[node_id])
+
+
+    def elder_sibling_id_of(self, node_id):
+        """すぐ上の兄のノードID。長子なら -1"""
+        return int(self._elder_sibling_id_array[node_id])
+
+
+    def younger_sibling_id_of(self, node_id):
+        """すぐ下の弟のノードID。末っ子なら -1"""
+        return int(self._younger_sibling_id_array[node_id])
+
+
+    def depth_of(self, node_id):
+        """第何層か。根層は 0"""
+        return int(self._depth_array[node_id])
+
+
+    def edge_text_of(self, node_id):
+        return self._edge_text_list[node_id]
+
+
+    def text_of(self, node_id):
+        return self._text_list[node_id]
+
+
+    def row_span_of(self, node_id):
+        """ノードが跨る行の範囲
+
+        Returns
+        -------
+        first_row_number : int
+            最初の行番号。0から始まる
+        last_row_number : int
+            最後の行番号。この行を含む
+        """
+        return int(self._first_row_number_array[node_id]), int(self._last_row_number_array[node_id])
+
+
+    def leaf_count_of(self, node_id):
+        """自分を含む子孫の葉の数"""
+        return int(self._leaf_count_array[node_id])
+
+
+    def is_ancestor_of(self, ancestor_id, node_id):
+        """ancestor_id は node_id の祖先か？ 自分自身は含めません"""
+        return ancestor_id < node_id and node_id <= self._last_descendant_id_array[ancestor_id]
+
+
+    def get_path_id_list(self, node_id):
+        """根から自ノードまでのノードIDのリスト"""
+
+        first_row_number = self._first_row_number_array[node_id]
+        return self._node_id_matrix[first_row_number, :self._depth_array[node_id] + 1].tolist()
+
+
+    def get_kind_of_edge(self, row_number, depth_th):
+        """TreeLayout.get_kind_of_edge() と同じ、罫線の最終形
+
+        Returns
+        -------
+        kind : str
+            '─字', '┬字', '├字', '└字', '│字' のいずれか。何も描かないなら None
+        """
+
+        # 第0層は根なので、辺は無い
+        if depth_th == 0:
+            return None
+
+        node_id = self._node_id_matrix[row_number, depth_th]
+        if node_id == -1:
+            return None
+
+        has_younger_sibling = self._younger_sibling_id_array[node_id] != -1
+
+        # 根から自ノードまで前件と同じなら、弟がいるときだけ垂直線を通す
+        if self._first_row_number_array[node_id] < row_number:
+            if has_younger_sibling:
+                return '│字'
+
+            return None
+
+        # 前行は兄か？ 親が前行から続いていれば、前行に線がつながる
+        if self._first_row_number_array[self._parent_id_array[node_id]] < row_number:
+            if has_younger_sibling:
+                return '├字'
+
+            return '└字'
+
+        if has_younger_sibling:
+            return '┬字'
+
+        return '─字'
@@ -0,0 +1,284 @@
+import concurrent.futures
+import functools
+import math
+import os
+import re
+
+from xltree.database import TreeTable
+from xltree.library import is_blank
+from xltree.models import TreeLayout
+from xltree.spreadsheetml import SpreadsheetMlSheet, SpreadsheetMlWorkbook
+from xltree.stats import RenderStats, RenderCancelled
+from xltree.workbooks import SpreadsheetMlTreeDrawer
+
+
+class ParallelTreeRenderer():
+    """テーブルを第1層のノード（部分木）の境目で切り分けて、プロセスごとに描画します
+
+    第1層の部分木どうしが罫線を共有するのは、第1層の辺の列の垂直線だけです。
+    罫線の最終形（TreeLayout）はテーブル全体で１回だけ求めてワーカープロセスへ渡すので、切れ目でも垂直線は繋がります。
+    ワーカープロセスは SpreadsheetML の行を文字列で返し、親プロセスはそれを順に繋げてファイルに書くだけです"""
+
+
+    # 部分木の境目で切り分けた範囲を、ワーカープロセス数のこの倍くらいの数の仕事にまとめる
+    _TASKS_PER_WORKER = 4
+
+
+    def __init__(self, tree_table, config, max_workers=None, shall_split_sheets=False):
+        """初期化
+
+        Parameters
+        ----------
+        tree_table : TreeTable
+            ツリーテーブル
+        config : Config
+            構成
+        max_workers : int
+            ワーカープロセスの数。省略すると CPU の数
+        shall_split_sheets : bool
+            真なら、第1層の部分木ごとにシートを分けます。シート名は第1層のノードのテキストです
+        """
+        self._tree_table = tree_table
+        self._config = config
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._shall_split_sheets = shall_split_sheets
+
+
+    def render(self, wb_file_path, sheet_name, stats=None):
+        """描画して、ワークブックを保存します
+
+        Parameters
+        ----------
+        wb_file_path : str
+            ワークブックのファイルパス
+        sheet_name : str
+            シート名。シートを分けるときは、第1層のノードが無い範囲のシート名に使います
+        stats : RenderStats
+            描画の統計。ワーカープロセスで数えたものは、仕事が返ってくるたびに足します。省略可
+        """
+
+        if stats is None:
+            stats = RenderStats()
+
+        wb = SpreadsheetMlWorkbook(file_path=wb_file_path, styles=SpreadsheetMlTreeDrawer.create_styles())
+
+        try:
+            # 書き出しながら描くので、シートの書出しは描画の段階に含める
+            with stats.measure('draw'):
+                if self._shall_split_sheets:
+                    self._render_sheet_per_subtree(wb=wb, sheet_name=sheet_name, stats=stats)
+                else:
+                    self._render_one_sheet(wb=wb, sheet_name=sheet_name, stats=stats)
+
+        except BaseException:
+            # 止めたときや失敗したときは、書きかけのファイルを残さない
+            wb.discard()
+            raise
+
+        with stats.measure('save'):
+            wb.close()
+
+
+    def _render_one_sheet(self, wb, sheet_name, stats):
+        """切り分けた行を、１枚のシートに繋げます"""
+
+        df = self._tree_table.df
+        length_of_nodes = self._tree_table.actual_length_of_nodes
+
+        # 罫線の最終形はテーブル全体で求める。第1層の垂直線が切れ目を跨いでも正しく繋がる
+        tree_layout = TreeLayout.from_tree_table(tree_table=self._tree_table)
+
+        # 列ヘッダーは親プロセスで書く
+        sheet = SpreadsheetMlSheet(styles=SpreadsheetMlTreeDrawer.create_styles())
+        SpreadsheetMlTreeDrawer(tree_table=self._tree_table, ws=sheet, config=self._config, tree_layout=tree_layout, stats=stats).render_header()
+
+        # 部分木の境目で切り分ける。大き過ぎる部分木は、罫線の最終形がテーブル全体のものなので、途中で切っても構わない
+        chunk_size = self._get_chunk_size()
+        task_list = []
+        for first_row_number, last_row_number in ParallelTreeRenderer._group_span_list(span_list=self._get_subtree_span_list(tree_layout=tree_layout), chunk_size=chunk_size, shall_cut=True):
+            task_list.append((first_row_number, df.iloc[first_row_number:last_row_number + 1]))
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self._max_workers, initializer=_initialize_worker, initargs=(tree_layout,)) as executor:
+            # 終わった順ではなく、切り分けた順に返ってくる
+            result_iterator = executor.map(
+                    functools.partial(_render_rows, self._config, length_of_nodes),
+                    [first_row_number for first_row_number, _ in task_list],
+                    [task_df for _, task_df in task_list])
+
+            def iter_row_xml():
+                for row_xml, counts in result_iterator:
+                    stats.merge(counts=counts)
+                    yield row_xml
+
+            try:
+                wb.write_sheet(sheet_name=sheet_name, xml_iterable=sheet.iter_xml(row_xml_iterable=iter_row_xml()))
+
+            except RenderCancelled:
+                # まだ始まっていない仕事は捨てる
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+
+
+    def _render_sheet_per_subtree(self, wb, sheet_name, stats):
+        """第1層の部分木ごとに、シートを分けます。各シートは、根とその部分木だけの樹形図です"""
+
+        df = self._tree_table.df
+        length_of_nodes = self._tree_table.actual_length_of_nodes
+
+        tree_layout = TreeLayout.from_tree_table(tree_table=self._tree_table)
+        span_list = self._get_subtree_span_list(tree_layout=tree_layout)
+
+        # シート名
+        sheet_name_list = []
+        used_sheet_name_set = set()
+        for first_row_number, _ in span_list:
+            text = None
+            if 1 < length_of_nodes:
+                text = df['node1'].iat[first_row_number]
+
+            sheet_name_list.append(ParallelTreeRenderer._create_sheet_name(
+                    text=sheet_name if is_blank(text) else text,
+                    used_sheet_name_set=used_sheet_name_set))
+
+        # 部分木は途中で切らずに、いくつかずつまとめる
+        task_list = []
+        span_index = 0
+        for first_row_number, last_row_number in ParallelTreeRenderer._group_span_list(span_list=span_list, chunk_size=self._get_chunk_size(), shall_cut=False):
+            task_span_list = []
+            while span_index < len(span_list) and span_list[span_index][1] <= last_row_number:
+                task_span_list.append(span_list[span_index])
+                span_index += 1
+
+            task_list.append([df.iloc[first:last + 1] for first, last in task_span_list])
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+            sheet_name_iterator = iter(sheet_name_list)
+
+            try:
+                for sheet_xml_list, counts in executor.map(functools.partial(_render_sheets, self._config, length_of_nodes), task_list):
+                    for sheet_xml in sheet_xml_list:
+                        wb.write_sheet(sheet_name=next(sheet_name_iterator), xml_iterable=[sheet_xml])
+
+                    stats.merge(counts=counts)
+
+            except RenderCancelled:
+                # まだ始まっていない仕事は捨てる
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+
+
+    def _get_subtree_span_list(self, tree_layout):
+        """第1層の部分木ごとの、行の範囲のリスト"""
+
+        if self._tree_table.actual_length_of_nodes < 2:
+            return [(0, tree_layout.len_records - 1)] if 0 < tree_layout.len_records else []
+
+        return tree_layout.get_span_list(depth_th=1)
+
+
+    def _get_chunk_size(self):
+        """１つの仕事で描く件数の目安"""
+        return max(1, math.ceil(len(self._tree_table.df) / (self._max_workers * ParallelTreeRenderer._TASKS_PER_WORKER)))
+
+
+    @staticmethod
+    def _group_span_list(span_list, chunk_size, shall_cut):
+        """隣り合う範囲を、chunk_size 件くらいずつにまとめます
+
+        Parameters
+        ----------
+        shall_cut : bool
+            真なら、chunk_size 件より大きい範囲を途中で切ります
+        """
+
+        group_list = []
+        group_first = None
+
+        for first_row_number, last_row_number in span_list:
+            if group_first is None:
+                group_first = first_row_number
+
+            if shall_cut:
+                while chunk_size <= last_row_number - group_first:
+                    group_list.append((group_first, group_first + chunk_size - 1))
+                    group_first += chunk_size
+
+            if chunk_size <= last_row_number - group_first + 1:
+                group_list.append((group_first, last_row_number))
+                group_first = None
+
+        if group_first is not None:
+            group_list.append((group_first, span_list[-1][1]))
+
+        return group_list
+
+
+    @staticmethod
+    def _create_sheet_name(text, used_sheet_name_set):
+        """エクセルのシート名に使えない文字を取り除き、31文字に切り詰め、重複しないようにします"""
+
+        MAX_LENGTH = 31
+
+        base_name = re.sub(r'[\[\]:*?/\\]', '', str(text)).strip("'")[:MAX_LENGTH]
+        if base_name == '':
+            base_name = 'Sheet'
+
+        # シート名は大文字と小文字を区別しない
+        name = base_name
+        suffix_th = 2
+        while name.lower() in used_sheet_name_set:
+            suffix = f' ({suffix_th})'
+            name = base_name[:MAX_LENGTH - len(suffix)] + suffix
+            suffix_th += 1
+
+        used_sheet_name_set.add(name.lower())
+        return name
+
+
+#####################
+# MARK: Worker process
+#####################
+
+# ワーカープロセスの中で使う、テーブル全体の罫線の最終形
+_worker_tree_layout = None
+
+
+def _initialize_worker(tree_layout):
+    global _worker_tree_layout
+    _worker_tree_layout = tree_layout
+
+
+def _render_rows(config, length_of_nodes, first_row_number, df):
+    """切り分けた行を描画して、 SpreadsheetML の行の文字列と、数えたものを返します"""
+
+    sheet = SpreadsheetMlSheet(styles=SpreadsheetMlTreeDrawer.create_styles())
+    stats = RenderStats()
+
+    SpreadsheetMlTreeDrawer(
+            tree_table=TreeTable(df=df, actual_length_of_nodes=length_of_nodes),
+            ws=sheet,
+            config=config,
+            tree_layout=_worker_tree_layout,
+            stats=stats).render_rows(first_row_number=first_row_number)
+
+    return sheet.pop_row_xml(), stats.to_counts()
+
+
+def _render_sheets(config, length_of_nodes, df_list):
+    """部分木ごとにシートを描画して、 SpreadsheetML のワークシートの文字列のリストと、数えたものを返します"""
+
+    sheet_xml_list = []
+    stats = RenderStats()
+
+    for df in df_list:
+        sheet = SpreadsheetMlSheet(styles=SpreadsheetMlTreeDrawer.create_styles())
+
+        SpreadsheetMlTreeDrawer(
+                tree_table=TreeTable(df=df, actual_length_of_nodes=length_of_nodes),
+                ws=sheet,
+                config=config,
+                stats=stats).render()
+
+        sheet_xml_list.append(''.join(sheet.iter_xml()))
+
+    return sheet_xml_list, stats.to_counts()
@@ -0,0 +1,414 @@
+import itertools
+import os
+import queue
+import threading
+
+import numpy as np
+
+from xltree.library import nth
+from xltree.parallel import ParallelTreeRenderer
+from xltree.spreadsheetml import SpreadsheetMlSheet, SpreadsheetMlWorkbook
+from xltree.stats import RenderStats
+from xltree.workbooks import TreeDrawer, ShardTreeDrawer, SpreadsheetMlTreeDrawer
+
+
+class ShardedTreeRenderer():
+    """エクセルのシートの行数（1,048,576）、列数（16,384）に収まらない樹形図を、複数のシート（シャード）に切り分けて描画します
+
+    件は３行、層は３列使うので、１枚に収まるのは 349,524 件、 5,462 層までです。
+    件が多すぎれば、件と件の境目のうち根に近いもの（大きな部分木の境目）で切ります。
+    層が深すぎれば、 max_depths_per_sheet 層ずつの帯に分けます。帯は１層ずつ重ねて、前の帯の最後の層を次の帯の根にします。
+    シャードの先頭の件は、前のシャードから続いているノードも描き、第２行に根からの道を書きます。
+    先頭には、全てのシャードへのハイパーリンクを並べた目次のシートを置きます
+
+    CSVを読む仕事は別のスレッドで先に進めておき、描画してファイルに書くのと重ねます"""
+
+
+    # シャードの置き方
+    SHARD_SHEETS = 'sheets'          # １つのワークブックのシートに分ける
+    SHARD_WORKBOOKS = 'workbooks'    # シャードごとにワークブックを分ける。目次は wb_file_path のワークブックに書きます
+
+    SHARD_MODE_LIST = [SHARD_SHEETS, SHARD_WORKBOOKS]
+
+    # エクセルのシートの大きさ
+    EXCEL_MAX_ROWS = 1048576
+    EXCEL_MAX_COLUMNS = 16384
+
+    # １枚のシートに収まる件数。列ヘッダーに２行、１件に３行使う
+    MAX_RECORDS_PER_SHEET = (EXCEL_MAX_ROWS - 2) // 3
+
+    # １枚のシートに収まる層の数。 A列（no）、 B列（空列）、 C列（根）、以降、１層につき３列
+    MAX_DEPTHS_PER_SHEET = (EXCEL_MAX_COLUMNS - 3) // 3 + 1
+
+    # 別のスレッドで読んでおく件数の上限は、これ × _LEN_PREFETCH_CHUNKS
+    _LEN_RECORDS_PER_CHUNK = 1000
+    _LEN_PREFETCH_CHUNKS = 8
+
+
+    def __init__(self, tree_table, tree_layout, config, shard_mode=SHARD_SHEETS, max_records_per_sheet=MAX_RECORDS_PER_SHEET, max_depths_per_sheet=MAX_DEPTHS_PER_SHEET):
+        """初期化
+
+        Parameters
+        ----------
+        tree_table : TreeTable または TreeCsvReader
+            ツリーテーブル。層が深すぎれば、帯ごとにレコードを１周読みます
+        tree_layout : TreeLayout
+            テーブル全体の罫線の最終形
+        config : Config
+            構成
+        shard_mode : str
+            シャードの置き方。 ShardedTreeRenderer.SHARD_MODE_LIST のいずれか
+        max_records_per_sheet : int
+            １枚のシートの件数の上限。 MAX_RECORDS_PER_SHEET 以下
+        max_depths_per_sheet : int
+            １枚のシートの層の数の上限。 2 以上、 MAX_DEPTHS_PER_SHEET 以下
+        """
+
+        if shard_mode not in ShardedTreeRenderer.SHARD_MODE_LIST:
+            raise ValueError(f"{shard_mode=} must be one of {ShardedTreeRenderer.SHARD_MODE_LIST}")
+
+        if not 1 <= max_records_per_sheet <= ShardedTreeRenderer.MAX_RECORDS_PER_SHEET:
+            raise ValueError(f"{max_records_per_sheet=} must be 1 to {ShardedTreeRenderer.MAX_RECORDS_PER_SHEET}")
+
+        if not 2 <= max_depths_per_sheet <= ShardedTreeRenderer.MAX_DEPTHS_PER_SHEET:
+            raise ValueError(f"{max_depths_per_sheet=} must be 2 to {ShardedTreeRenderer.MAX_DEPTHS_PER_SHEET}")
+
+        self._tree_table = tree_table
+        self._tree_layout = tree_layout
+        self._config = config
+        self._shard_mode = shard_mode
+        self._max_records_per_sheet = max_records_per_sheet
+        self._max_depths_per_sheet = max_depths_per_sheet
+
+
+    @staticmethod
+    def is_needed(len_records, length_of_nodes, max_records_per_sheet=MAX_RECORDS_PER_SHEET, max_depths_per_sheet=MAX_DEPTHS_PER_SHEET):
+        """１枚のシートに収まらないか？　読み込む前に、件数と層の数だけで決まります"""
+        return max_records_per_sheet < len_records or max_depths_per_sheet < length_of_nodes
+
+
+    def render(self, wb_file_path, sheet_name, stats=None):
+        """描画して、ワークブックを保存します
+
+        Parameters
+        ----------
+        wb_file_path : str
+            ワークブックのファイルパス。 shard_mode が 'workbooks' なら目次のワークブックで、
+            シャードは同じディレクトリーに `<名前>-1.xlsx`, `<名前>-2.xlsx` ... と書き出します
+        sheet_name : str
+            目次のシート名。シャードのシート名は `<シート名> (1)`, `<シート名> (2)` ...
+        stats : RenderStats
+            描画の統計。省略可
+
+        Returns
+        -------
+        shard_list : list<dict>
+            シャードごとの sheet_name, file_path, first_depth_th, len_depths, first_no, last_no, ancestor_text
+        """
+
+        if stats is None:
+            stats = RenderStats()
+
+        styles = SpreadsheetMlTreeDrawer.create_styles()
+        wb = SpreadsheetMlWorkbook(file_path=wb_file_path, styles=styles)
+        shard_file_path_list = []
+
+        try:
+            # 描いた行はすぐにファイルへ書き出すので、書き出しは描画の段階に含める
+            with stats.measure('draw'):
+                shard_list = []
+                used_sheet_name_set = {sheet_name.lower()}
+                stem, extension = os.path.splitext(wb_file_path)
+
+                for band in self._create_band_list():
+                    for shard in self._render_band(band=band, styles=styles, stats=stats):
+                        shard_th = len(shard_list) + 1
+
+                        if self._shard_mode == ShardedTreeRenderer.SHARD_SHEETS:
+                            shard['sheet_name'] = ParallelTreeRenderer._create_sheet_name(text=f'{sheet_name} ({shard_th})', used_sheet_name_set=used_sheet_name_set)
+                            shard['file_path'] = wb_file_path
+                            shard['xml_iterable_writer'](wb=wb, sheet_name=shard['sheet_name'])
+
+                        else:
+                            shard['sheet_name'] = sheet_name
+                            shard['file_path'] = f'{stem}-{shard_th}{extension}'
+
+                            shard_wb = SpreadsheetMlWorkbook(file_path=shard['file_path'], styles=styles)
+                            try:
+                                shard['xml_iterable_writer'](wb=shard_wb, sheet_name=shard['sheet_name'])
+                            except BaseException:
+                                shard_wb.discard()
+                                raise
+
+                            shard_wb.close()
+                            shard_file_path_list.append(shard['file_path'])
+
+                        del shard['xml_iterable_writer']
+                        shard_list.append(shard)
+
+                # 目次は最後に書くが、タブは先頭に置く
+                index_sheet = self._create_index_sheet(shard_list=shard_list, wb_file_path=wb_file_path, styles=styles)
+                wb.write_sheet(sheet_name=sheet_name, xml_iterable=index_sheet.iter_xml(), hyperlink_target_list=index_sheet.hyperlink_target_list, tab_index=0)
+
+        except BaseException:
+            # 止めたときや失敗したときは、書きかけのファイルを残さない
+            wb.discard()
+            for file_path in shard_file_path_list:
+                os.remove(file_path)
+            raise
+
+        with stats.measure('save'):
+            wb.close()
+
+        return shard_list
+
+
+    def _create_band_list(self):
+        """層の帯のリスト。 (根とみなす層, 層の数) のタプル"""
+
+        length_of_nodes = self._tree_table.actual_length_of_nodes
+        max_depths = self._max_depths_per_sheet
+
+        band_list = []
+        first_depth_th = 0
+        while True:
+            band_list.append((first_depth_th, min(max_depths, length_of_nodes - first_depth_th)))
+
+            if length_of_nodes <= first_depth_th + max_depths:
+                return band_list
+
+            # 最後の層を、次の帯の根にする
+            first_depth_th += max_depths - 1
+
+
+    def _render_band(self, band, styles, stats):
+        """層の帯を、件数の上限ごとのシャードに分けて描くジェネレーター。
+        シャードごとに、情報と、シートを書き出す関数 xml_iterable_writer(wb, sheet_name) を入れた辞書を返します。
+        次のシャードへ進む前に、その関数を呼んでください"""
+
+        first_depth_th, len_depths = band
+        tree_layout = self._tree_layout
+        length_of_nodes = self._tree_table.actual_length_of_nodes
+
+        # 帯の件。２つ目からの帯は、根とみなす層より深いノードを持つ件だけ
+        if first_depth_th == 0:
+            is_in_band_array = None
+            row_number_array = np.arange(tree_layout.len_records)
+        else:
+            is_in_band_array = first_depth_th + 1 < tree_layout.node_count_array
+            row_number_array = np.flatnonzero(is_in_band_array)
+
+        # 帯の罫線の最終形
+        if first_depth_th == 0 and len_depths == length_of_nodes:
+            band_layout = tree_layout
+        else:
+            band_layout = tree_layout.select(row_number_array=row_number_array, first_depth_th=first_depth_th, len_depths=len_depths)
+
+        del row_number_array
+
+        # 帯の件を、先読みしながら１件ずつ
+        record_iterator = _iter_in_background(
+                iterable=self._tree_table.iter_records(),
+                len_items_per_chunk=ShardedTreeRenderer._LEN_RECORDS_PER_CHUNK,
+                max_chunks=ShardedTreeRenderer._LEN_PREFETCH_CHUNKS)
+
+        try:
+            if is_in_band_array is None:
+                band_record_iterator = record_iterator
+            else:
+                band_record_iterator = (record for row_number, record in enumerate(record_iterator) if is_in_band_array[row_number])
+
+            for shard_first_row_number, shard_end_row_number in ShardedTreeRenderer._create_span_list(same_depth_array=band_layout.same_depth_array, len_records=band_layout.len_records, max_records=self._max_records_per_sheet):
+
+                # 前のシャードから続いているノード
+                if shard_first_row_number == 0:
+                    len_ancestors = first_depth_th
+                else:
+                    len_ancestors = first_depth_th + int(band_layout.same_depth_array[shard_first_row_number - 1])
+
+                shard = {
+                    'first_depth_th': first_depth_th,
+                    'len_depths': len_depths,
+                    'first_no': None,
+                    'last_no': None,
+                    'ancestor_text': None,
+                }
+
+                shard_table = _TreeShard(
+                        record_iterable=itertools.islice(band_record_iterator, shard_end_row_number - shard_first_row_number),
+                        length_of_nodes=len_depths,
+                        len_ancestors=len_ancestors,
+                        shard=shard)
+
+                def write(wb, sheet_name, shard_table=shard_table, shard_first_row_number=shard_first_row_number, shard_end_row_number=shard_end_row_number, len_ancestors=len_ancestors):
+                    sheet = SpreadsheetMlSheet(styles=styles)
+
+                    tree_drawer = ShardTreeDrawer(
+                            tree_table=shard_table,
+                            ws=sheet,
+                            config=self._config,
+                            tree_layout=band_layout.select(row_number_array=np.arange(shard_first_row_number, shard_end_row_number)),
+                            first_depth_th=first_depth_th,
+                            len_ancestors=len_ancestors,
+                            stats=stats)
+                    tree_drawer.render_header()
+
+                    wb.write_sheet(sheet_name=sheet_name, xml_iterable=sheet.iter_xml(row_xml_iterable=tree_drawer.iter_row_xml()))
+
+                shard['xml_iterable_writer'] = write
+                yield shard
+
+        finally:
+            record_iterator.close()
+
+
+    @staticmethod
+    def _create_span_list(same_depth_array, len_records, max_records):
+        """件を max_records 件以下ずつに切り分けます。
+        切れ目は、範囲の後ろ半分の件と件の境目のうち、根から等しい層が一番少ないところ（同じなら後ろのもの）です
+
+        Returns
+        -------
+        span_list : list<tuple>
+            0から始まる、最初の行番号と、最後の行番号の次のタプルのリスト
+        """
+
+        span_list = []
+        first_row_number = 0
+
+        while max_records < len_records - first_row_number:
+            # 切れ目 end の候補。 end - 1 件目と end 件目の境目は same_depth_array[end - 1]
+            first_end = first_row_number + max(1, (max_records + 1) // 2)
+            last_end = first_row_number + max_records
+            candidate_array = same_depth_array[first_end - 1:last_end]
+
+            # 後ろから探して、一番少ないところ
+            end = last_end - int(np.argmin(candidate_array[::-1]))
+
+            span_list.append((first_row_number, end))
+            first_row_number = end
+
+        span_list.append((first_row_number, len_records))
+        return span_list
+
+
+    def _create_index_sheet(self, shard_list, wb_file_path, styles):
+        """全てのシャードへのハイパーリンクを並べた目次のシート"""
+
+        sheet = SpreadsheetMlSheet(styles=styles)
+
+        sheet.set_column_width('A', 24)
+        sheet.set_column_width('B', 16)
+        sheet.set_column_width('C', 24)
+        sheet.set_column_width('D', 60)
+        sheet.freeze_panes = 'A2'
+
+        header_list = ['Sheet', 'Layer', 'No', 'Path']
+        sheet.append_row(row_th=1, row=[sheet.new_cell(value=header, fill=TreeDrawer._bgcolor_list[0], font=TreeDrawer._fgcolor_list[0]) for header in header_list], height=self._config.dictionary['header_height'])
+
+        def get_column_title(depth_th):
+            if depth_th == 0:
+                return 'Root'
+            return nth(depth_th)
+
+        for shard_index, shard in enumerate(shard_list):
+            row_th = shard_index + 2
+
+            if self._shard_mode == ShardedTreeRenderer.SHARD_SHEETS:
+                link_text = shard['sheet_name']
+                sheet.add_hyperlink(cell_name=f'A{row_th}', location="'{}'!A1".format(shard['sheet_name'].replace("'", "''")))
+
+            else:
+                # 目次のワークブックからの相対パス
+                link_text = os.path.relpath(shard['file_path'], start=os.path.dirname(os.path.abspath(wb_file_path)))
+                sheet.add_hyperlink(cell_name=f'A{row_th}', target=link_text.replace(os.sep, '/'))
+
+            layer_text = f"{get_column_title(shard['first_depth_th'])} - {get_column_title(shard['first_depth_th'] + shard['len_depths'] - 1)}"
+            no_text = f"{shard['first_no']} - {shard['last_no']}"
+
+            sheet.append_row(row_th=row_th, row=[sheet.new_cell(value=value) for value in [link_text, layer_text, no_text, shard['ancestor_text']]], height=None)
+
+        return sheet
+
+
+class _TreeShard():
+    """シャードの件を、切り分ける前の形で返すテーブル。 ShardTreeDrawer へ渡します。
+    読んだ最初と最後の件の no と、第２行に書く根からの道を shard に書き込みます"""
+
+
+    def __init__(self, record_iterable, length_of_nodes, len_ancestors, shard):
+        self._record_iterable = record_iterable
+        self._length_of_nodes = length_of_nodes
+        self._len_ancestors = len_ancestors
+        self._shard = shard
+
+
+    @property
+    def actual_length_of_nodes(self):
+        return self._length_of_nodes
+
+
+    def iter_records(self):
+        for record in self._record_iterable:
+            if self._shard['first_no'] is None:
+                self._shard['first_no'] = record.no
+                self._shard['ancestor_text'] = ShardTreeDrawer.get_ancestor_text(record=record, len_ancestors=self._len_ancestors)
+
+            self._shard['last_no'] = record.no
+            yield record
+
+
+def _iter_in_background(iterable, len_items_per_chunk, max_chunks):
+    """iterable を別のスレッドで先に進めておいて、要素を１つずつ返すジェネレーター。
+    先に進めておくのは max_chunks × len_items_per_chunk 個までです。
+    iterable の例外は、ここから送出します。途中で close() すると、スレッドも止めます"""
+
+    chunk_queue = queue.Queue(maxsize=max_chunks)
+    stop_event = threading.Event()
+
+    def put(item):
+        """止められるまで、空くのを待って入れます"""
+        while not stop_event.is_set():
+            try:
+                chunk_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+    def produce():
+        try:
+            chunk = []
+            for item in iterable:
+                chunk.append(item)
+
+                if len_items_per_chunk <= len(chunk):
+                    if not put(('chunk', chunk)):
+                        return
+                    chunk = []
+
+            if put(('chunk', chunk)):
+                put(('end', None))
+
+        except BaseException as e:
+            put(('error', e))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            kind, value = chunk_queue.get()
+
+            if kind == 'end':
+                return
+
+            if kind == 'error':
+                raise value
+
+            yield from value
+
+    finally:
+        stop_event.set()
+        thread.join()
@@ -0,0 +1,244 @@
+import csv
+import heapq
+import itertools
+import os
+import re
+import tempfile
+
+
+class TreeCsvSorter():
+    """どんな順に並んだCSVファイルでも、根からのノードのテキストの順（道の順）に並べ替えます。
+    描画は、根からの道が同じ件が隣り合っていることを前提にしているので、順の分からないCSVファイルは先にこれを通してください
+
+    pandas は使わずに、外部マージソートで並べ替えます。
+    max_records_per_run 件ずつメモリーで並べ替えて一時ファイル（ラン）に書き出し、ランを max_runs_per_merge 個ずつ併合します。
+    メモリーに持つのは１つのラン分と、併合中のランごとに１件だけなので、ファイルが大きくてもメモリー使用量は増えません
+
+    道が同じ件は、入力の順のままです。 shall_drop_duplicates なら、そのうち最初の件だけ残します"""
+
+
+    # 既定の、１つのランの件数
+    DEFAULT_MAX_RECORDS_PER_RUN = 100000
+
+    # 既定の、一度に併合するランの数。一度に開くファイルの数でもあります
+    DEFAULT_MAX_RUNS_PER_MERGE = 64
+
+
+    def __init__(self, max_records_per_run=DEFAULT_MAX_RECORDS_PER_RUN, max_runs_per_merge=DEFAULT_MAX_RUNS_PER_MERGE, shall_drop_duplicates=False, shall_renumber=False, temp_dir=None, encoding='utf8'):
+        """初期化
+
+        Parameters
+        ----------
+        max_records_per_run : int
+            メモリーで並べ替える件数。メモリー使用量はこれに比例します
+        max_runs_per_merge : int
+            一度に併合するランの数。 2 以上
+        shall_drop_duplicates : bool
+            真なら、根からの道（ノードのテキスト）が同じ件は、入力で最初の件だけ残します
+        shall_renumber : bool
+            真なら、 no を並べ替えた後の順に 1 から振り直します
+        temp_dir : str
+            ランを置くディレクトリー。省略すると OS の一時ディレクトリー
+        encoding : str
+            文字コード
+        """
+
+        if max_records_per_run < 1:
+            raise ValueError(f"{max_records_per_run=} must be 1 or more")
+
+        if max_runs_per_merge < 2:
+            raise ValueError(f"{max_runs_per_merge=} must be 2 or more")
+
+        self._max_records_per_run = max_records_per_run
+        self._max_runs_per_merge = max_runs_per_merge
+        self._shall_drop_duplicates = shall_drop_duplicates
+        self._shall_renumber = shall_renumber
+        self._temp_dir = temp_dir
+        self._encoding = encoding
+
+
+    def sort(self, csv_file_path, output_file_path):
+        """並べ替えて書き出します
+
+        Parameters
+        ----------
+        csv_file_path : str
+            入力のCSVファイルパス
+        output_file_path : str
+            書き出すCSVファイルパス。列は入力と同じです。入力と同じパスでも構いません
+
+        Returns
+        -------
+        result : dict
+            len_records_read（読んだ件数）, len_records_written（書き出した件数）, len_runs（最初に作ったランの数）
+        """
+
+        with tempfile.TemporaryDirectory(dir=self._temp_dir, prefix='xltree-sort-') as run_dir:
+            run_file_counter = itertools.count()
+
+            def new_run_file_path():
+                return os.path.join(run_dir, f'run{next(run_file_counter)}.csv')
+
+            # ランを作る
+            with open(csv_file_path, encoding=self._encoding, newline='') as f:
+                reader = csv.reader(f)
+                column_name_list = next(reader)
+
+                no_column_index, node_column_index_list = TreeCsvSorter._get_column_indexes(column_name_list=column_name_list)
+
+                def get_key(seq_and_row):
+                    """根からの道。同じ道なら、入力の順"""
+                    return (TreeCsvSorter._get_path(row=seq_and_row[1], node_column_index_list=node_column_index_list), seq_and_row[0])
+
+                run_file_path_list = []
+                len_records_read = 0
+
+                while True:
+                    run = []
+                    for row in itertools.islice(reader, self._max_records_per_run):
+                        # 空行は飛ばす
+                        if len(row) == 0:
+                            continue
+
+                        run.append((len_records_read, row))
+                        len_records_read += 1
+
+                    if len(run) == 0:
+                        break
+
+                    run.sort(key=get_key)
+
+                    run_file_path = new_run_file_path()
+                    TreeCsvSorter._write_run(file_path=run_file_path, seq_and_row_iterable=run, encoding=self._encoding)
+                    run_file_path_list.append(run_file_path)
+
+            len_runs = len(run_file_path_list)
+
+            # 一度に開けるファイルの数まで、ランを併合して減らす
+            while self._max_runs_per_merge < len(run_file_path_list):
+                next_run_file_path_list = []
+
+                for start in range(0, len(run_file_path_list), self._max_runs_per_merge):
+                    group = run_file_path_list[start:start + self._max_runs_per_merge]
+
+                    if len(group) == 1:
+                        next_run_file_path_list.append(group[0])
+                        continue
+
+                    run_file_path = new_run_file_path()
+                    with _RunReaderGroup(file_path_list=group, encoding=self._encoding) as seq_and_row_iterable_list:
+                        TreeCsvSorter._write_run(file_path=run_file_path, seq_and_row_iterable=heapq.merge(*seq_and_row_iterable_list, key=get_key), encoding=self._encoding)
+
+                    for file_path in group:
+                        os.remove(file_path)
+
+                    next_run_file_path_list.append(run_file_path)
+
+                run_file_path_list = next_run_file_path_list
+
+            # 最後の併合をしながら書き出す。書き終えてから置き換えるので、入力と同じパスでもよい
+            temp_output_file_path = new_run_file_path()
+            len_records_written = 0
+
+            with _RunReaderGroup(file_path_list=run_file_path_list, encoding=self._encoding) as seq_and_row_iterable_list:
+                with open(temp_output_file_path, 'w', encoding=self._encoding, newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(column_name_list)
+
+                    prev_path = None
+                    for seq_and_row in heapq.merge(*seq_and_row_iterable_list, key=get_key):
+                        row = seq_and_row[1]
+
+                        if self._shall_drop_duplicates:
+                            path = TreeCsvSorter._get_path(row=row, node_column_index_list=node_column_index_list)
+                            if path == prev_path:
+                                continue
+                            prev_path = path
+
+                        len_records_written += 1
+
+                        if self._shall_renumber:
+                            if len(row) <= no_column_index:
+                                row += [''] * (no_column_index + 1 - len(row))
+                            row[no_column_index] = len_records_written
+
+                        writer.writerow(row)
+
+            os.replace(temp_output_file_path, output_file_path)
+
+        return {
+            'len_records_read': len_records_read,
+            'len_records_written': len_records_written,
+            'len_runs': len_runs,
+        }
+
+
+    @staticmethod
+    def _get_column_indexes(column_name_list):
+        """no 列と、 node0, node1, node2 ... 列の位置。 TreeTable.count_length_of_nodes() と同じく、 node 列は 0 から途切れずに続くものだけです"""
+
+        column_index_dict = {column_name: column_index for column_index, column_name in enumerate(column_name_list)}
+
+        if 'no' not in column_index_dict:
+            raise ValueError(f"'no' column not found. {column_name_list=}")
+
+        node_column_index_list = []
+        pattern = re.compile(r'node(\d+)')
+        for column_name in column_name_list:
+            result = pattern.match(column_name)
+            if result and int(result.group(1)) == len(node_column_index_list):
+                node_column_index_list.append(column_index_dict[column_name])
+
+        return column_index_dict['no'], node_column_index_list
+
+
+    @staticmethod
+    def _get_path(row, node_column_index_list):
+        """根から最初の空欄の手前までの、ノードのテキストのタプル"""
+
+        path = []
+        for node_column_index in node_column_index_list:
+            if len(row) <= node_column_index or row[node_column_index] == '':
+                break
+            path.append(row[node_column_index])
+
+        return tuple(path)
+
+
+    @staticmethod
+    def _write_run(file_path, seq_and_row_iterable, encoding):
+        """ランを書き出します。先頭の列は入力の順です"""
+
+        with open(file_path, 'w', encoding=encoding, newline='') as f:
+            writer = csv.writer(f)
+            for seq, row in seq_and_row_iterable:
+                writer.writerow([seq] + row)
+
+
+class _RunReaderGroup():
+    """ランをまとめて開いて、ランごとに (入力の順, 行) を返すイテレーターのリストにします"""
+
+
+    def __init__(self, file_path_list, encoding):
+        self._file_path_list = file_path_list
+        self._encoding = encoding
+        self._file_list = []
+
+
+    def __enter__(self):
+        try:
+            for file_path in self._file_path_list:
+                self._file_list.append(open(file_path, encoding=self._encoding, newline=''))
+
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+
+        return [((int(row[0]), row[1:]) for row in csv.reader(f)) for f in self._file_list]
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for f in self._file_list:
+            f.close()
+
+        self._file_list = []
@@ -0,0 +1,454 @@
+import contextlib
+import math
+import numbers
+import os
+import shutil
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+from openpyxl.compat import safe_string
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.utils import get_column_letter
+from openpyxl.xml.functions import tostring
+
+
+##############
+# MARK: Styles
+##############
+
+class SpreadsheetMlStyles():
+    """セルの書式の表（styles.xml）
+
+    セルの書式は、フォント、背景色、罫線の組です。使う組を先に全部並べておくので、
+    別々のプロセスで書いた行でも、書式の番号が揃います"""
+
+
+    def __init__(self, cell_style_list):
+        """初期化
+
+        Parameters
+        ----------
+        cell_style_list : list<tuple>
+            (font, fill, border) のタプルのリスト。使わないものは None。
+            書式の番号は、このリストの順に 1 から振ります。 0 は既定の書式です
+        """
+
+        self._font_list = []
+        self._fill_list = []
+        self._border_list = []
+
+        # 書式の番号 → (フォントの番号, 背景色の番号, 罫線の番号)
+        self._cell_xf_list = [(0, 0, 0)]
+
+        # (font, fill, border) → 書式の番号
+        self._style_id_dict = {(None, None, None): 0}
+
+        # (id(font), id(fill), id(border)) → 書式の番号
+        #
+        # NOTE openpyxl の書式のオブジェクトは、ハッシュを求めるたびに属性を全部たどるので遅い。
+        # 描画では TreeDrawer のクラス変数の同じオブジェクトを何度も使うので、まずオブジェクトの同一性で引く
+        #
+        self._style_id_dict_by_identity = {(id(None), id(None), id(None)): 0}
+
+        for font, fill, border in cell_style_list:
+            if (font, fill, border) in self._style_id_dict:
+                self._style_id_dict_by_identity[(id(font), id(fill), id(border))] = self._style_id_dict[(font, fill, border)]
+                continue
+
+            self._style_id_dict[(font, fill, border)] = len(self._cell_xf_list)
+            self._style_id_dict_by_identity[(id(font), id(fill), id(border))] = len(self._cell_xf_list)
+            self._cell_xf_list.append((
+                    SpreadsheetMlStyles._index_of(self._font_list, font, offset=1),      # 0 は既定のフォント
+                    SpreadsheetMlStyles._index_of(self._fill_list, fill, offset=2),      # 0, 1 は Excel が予約している背景色
+                    SpreadsheetMlStyles._index_of(self._border_list, border, offset=1))) # 0 は罫線なし
+
+
+    @staticmethod
+    def _index_of(style_list, style, offset):
+        if style is None:
+            return 0
+
+        for index, item in enumerate(style_list):
+            if item is style:
+                return index + offset
+
+        style_list.append(style)
+        return len(style_list) - 1 + offset
+
+
+    def get_style_id(self, font=None, fill=None, border=None):
+        """書式の番号"""
+
+        style_id = self._style_id_dict_by_identity.get((id(font), id(fill), id(border)))
+
+        if style_id is not None:
+            return style_id
+
+        # 同じ値の別のオブジェクト
+        style_id = self._style_id_dict.get((font, fill, border))
+
+        if style_id is None:
+            raise ValueError(f"unregistered cell style. {font=} {fill=} {border=}")
+
+        return style_id
+
+
+    def to_xml(self):
+        """styles.xml の中身"""
+
+        def stringify_list(tag, item_xml_list):
+            return f'<{tag} count="{len(item_xml_list)}">{"".join(item_xml_list)}</{tag}>'
+
+        font_xml_list = [tostring(DEFAULT_FONT.to_tree()).decode()] + [tostring(font.to_tree()).decode() for font in self._font_list]
+        fill_xml_list = ['<fill><patternFill/></fill>', '<fill><patternFill patternType="gray125"/></fill>'] + [tostring(fill.to_tree()).decode() for fill in self._fill_list]
+        border_xml_list = ['<border><left/><right/><top/><bottom/><diagonal/></border>'] + [tostring(border.to_tree()).decode() for border in self._border_list]
+
+        cell_xf_xml_list = []
+        for font_id, fill_id, border_id in self._cell_xf_list:
+            apply_list = []
+            if font_id != 0:
+                apply_list.append(' applyFont="1"')
+            if fill_id != 0:
+                apply_list.append(' applyFill="1"')
+            if border_id != 0:
+                apply_list.append(' applyBorder="1"')
+
+            cell_xf_xml_list.append(f'<xf numFmtId="0" fontId="{font_id}" fillId="{fill_id}" borderId="{border_id}" xfId="0"{"".join(apply_list)}/>')
+
+        return ''.join([
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n',
+            '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">',
+            stringify_list('fonts', font_xml_list),
+            stringify_list('fills', fill_xml_list),
+            stringify_list('borders', border_xml_list),
+            '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>',
+            stringify_list('cellXfs', cell_xf_xml_list),
+            '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>',
+            '</styleSheet>'])
+
+
+#############
+# MARK: Sheet
+#############
+
+class SpreadsheetMlSheet():
+    """ワークシートの部品（sheet1.xml など）
+
+    行は書き出したら XML の文字列にして溜めるので、セルのオブジェクトは残りません。
+    溜めた行は pop_row_xml() で取り出せます"""
+
+
+    def __init__(self, styles):
+        """初期化
+
+        Parameters
+        ----------
+        styles : SpreadsheetMlStyles
+            セルの書式の表
+        """
+        self._styles = styles
+        self._column_width_dict = {}
+        self._row_xml_list = []
+
+        # (セル名, シート内の飛び先, 外部の飛び先) のリスト
+        self._hyperlink_list = []
+
+        # 例： 'B2'
+        self.freeze_panes = None
+
+
+    def set_column_width(self, column_letter, width):
+        self._column_width_dict[column_letter] = width
+
+
+    def add_hyperlink(self, cell_name, location=None, target=None):
+        """セルにハイパーリンクを付けます。セルの値は append_row() で書いてください
+
+        Parameters
+        ----------
+        cell_name : str
+            例： 'A3'
+        location : str
+            ワークブックの中の飛び先。例： "'Sheet2'!A1"
+        target : str
+            外部の飛び先のファイルパスか URL。 SpreadsheetMlWorkbook.write_sheet() に hyperlink_target_list を渡してください
+        """
+
+        if (location is None) == (target is None):
+            raise ValueError(f"specify either location or target. {location=} {target=}")
+
+        self._hyperlink_list.append((cell_name, location, target))
+
+
+    @property
+    def hyperlink_target_list(self):
+        """外部の飛び先のリスト。 rId1 から順に振ります"""
+        return [target for _, _, target in self._hyperlink_list if target is not None]
+
+
+    def new_cell(self, value=None, fill=None, font=None, border=None):
+        """セル。値と書式の番号のタプルです"""
+        return (value, self._styles.get_style_id(font=font, fill=fill, border=border))
+
+
+    def append_row(self, row_th, row, height):
+        """１行書出し
+
+        Parameters
+        ----------
+        row_th : int
+            1から始まる行番号
+        row : list
+            new_cell() で作ったセルのリスト。空のセルは None
+        height : float
+            行の高さ。既定なら None
+        """
+
+        cell_xml_list = []
+
+        for column_index, cell in enumerate(row):
+            if cell is None:
+                continue
+
+            value, style_id = cell
+            cell_name = f'{get_column_letter(column_index + 1)}{row_th}'
+
+            # NaN も空のセルにする
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                cell_xml_list.append(f'<c r="{cell_name}" s="{style_id}"/>')
+
+            elif isinstance(value, numbers.Number) and not isinstance(value, bool):
+                cell_xml_list.append(f'<c r="{cell_name}" s="{style_id}" t="n"><v>{safe_string(value)}</v></c>')
+
+            else:
+                # 共有文字列表を使わずに、セルの中に文字列を書く。別々のプロセスで書いた行を、そのまま繋げられる
+                text = str(value)
+                if text != text.strip():
+                    cell_xml_list.append(f'<c r="{cell_name}" s="{style_id}" t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>')
+                else:
+                    cell_xml_list.append(f'<c r="{cell_name}" s="{style_id}" t="inlineStr"><is><t>{escape(text)}</t></is></c>')
+
+        if height is None:
+            self._row_xml_list.append(f'<row r="{row_th}">{"".join(cell_xml_list)}</row>')
+        else:
+            self._row_xml_list.append(f'<row r="{row_th}" ht="{height}" customHeight="1">{"".join(cell_xml_list)}</row>')
+
+
+    def pop_row_xml(self):
+        """溜めた行の XML を取り出して、空にします"""
+        row_xml = ''.join(self._row_xml_list)
+        self._row_xml_list = []
+        return row_xml
+
+
+    def iter_xml(self, row_xml_iterable=()):
+        """ワークシートの XML を先頭から少しずつ返します
+
+        Parameters
+        ----------
+        row_xml_iterable : iterable<str>
+            溜めた行の後ろに続ける行の XML。別のプロセスで書いた行を繋げるときに使います
+        """
+
+        yield '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        yield '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+
+        # ウィンドウ枠の固定
+        if self.freeze_panes is None:
+            yield '<sheetViews><sheetView workbookViewId="0"/></sheetViews>'
+
+        else:
+            column_th, row_th = _split_cell_name(self.freeze_panes)
+            yield ''.join([
+                '<sheetViews><sheetView workbookViewId="0">',
+                f'<pane xSplit="{column_th - 1}" ySplit="{row_th - 1}" topLeftCell="{self.freeze_panes}" activePane="bottomRight" state="frozen"/>',
+                '<selection pane="topRight"/><selection pane="bottomLeft"/>',
+                f'<selection pane="bottomRight" activeCell="{self.freeze_panes}" sqref="{self.freeze_panes}"/>',
+                '</sheetView></sheetViews>'])
+
+        yield '<sheetFormatPr baseColWidth="8" defaultRowHeight="15"/>'
+
+        # 列の幅
+        if 0 < len(self._column_width_dict):
+            col_xml_list = []
+            for column_letter, width in self._column_width_dict.items():
+                column_th = _split_cell_name(column_letter)[0]
+                col_xml_list.append(f'<col min="{column_th}" max="{column_th}" width="{width}" customWidth="1"/>')
+
+            yield f'<cols>{"".join(col_xml_list)}</cols>'
+
+        yield '<sheetData>'
+        yield self.pop_row_xml()
+
+        for row_xml in row_xml_iterable:
+            yield row_xml
+
+        yield '</sheetData>'
+
+        # ハイパーリンク
+        if 0 < len(self._hyperlink_list):
+            hyperlink_xml_list = []
+            target_th = 0
+            for cell_name, location, target in self._hyperlink_list:
+                if target is None:
+                    hyperlink_xml_list.append(f'<hyperlink ref="{cell_name}" location={quoteattr(location)}/>')
+                else:
+                    target_th += 1
+                    hyperlink_xml_list.append(f'<hyperlink ref="{cell_name}" r:id="rId{target_th}"/>')
+
+            yield f'<hyperlinks>{"".join(hyperlink_xml_list)}</hyperlinks>'
+
+        yield '<pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/>'
+        yield '</worksheet>'
+
+
+def _split_cell_name(cell_name):
+    """'B2' → (2, 2)。行が無ければ 'C' → (3, None)"""
+
+    column_letter = cell_name.rstrip('0123456789')
+    row_text = cell_name[len(column_letter):]
+
+    column_th = 0
+    for letter in column_letter:
+        column_th = column_th * 26 + ord(letter) - ord('A') + 1
+
+    if row_text == '':
+        return column_th, None
+
+    return column_th, int(row_text)
+
+
+################
+# MARK: Workbook
+################
+
+class SpreadsheetMlWorkbook():
+    """ワークブックのファイル（.xlsx）を、部品ごとに zip へ直に書き出します。
+    openpyxl のワークブックを作らないので、シートを１枚ずつ書き出して、書いたものは手元に残りません"""
+
+
+    def __init__(self, file_path, styles):
+        """初期化
+
+        Parameters
+        ----------
+        file_path : str
+            ワークブックのファイルパス
+        styles : SpreadsheetMlStyles
+            セルの書式の表
+        """
+        self._zip_file = zipfile.ZipFile(file_path, mode='w', compression=zipfile.ZIP_DEFLATED)
+        self._styles = styles
+        self._sheet_name_list = []
+
+        # シートのタブの順。 1 から始まるシートの番号のリスト
+        self._tab_sheet_th_list = []
+
+
+    def write_sheet(self, sheet_name, xml_iterable, hyperlink_target_list=(), tab_index=None):
+        """シートを１枚書き出します
+
+        Parameters
+        ----------
+        sheet_name : str
+            シート名
+        xml_iterable : iterable<str>
+            ワークシートの XML。 SpreadsheetMlSheet.iter_xml() を参照
+        hyperlink_target_list : list<str>
+            外部の飛び先のリスト。 SpreadsheetMlSheet.hyperlink_target_list を参照
+        tab_index : int
+            0から始まる、タブの位置。省略すると末尾。後から書いたシートを先頭のタブにするときに使います
+        """
+
+        with self._open_sheet(sheet_name=sheet_name, hyperlink_target_list=hyperlink_target_list, tab_index=tab_index) as f:
+            for xml in xml_iterable:
+                f.write(xml.encode('utf8'))
+
+
+    def write_sheet_file(self, sheet_name, xml_file_path, hyperlink_target_list=(), tab_index=None):
+        """ファイルに書き出してあるワークシートの XML を、シートとして書き写します。
+        別のプロセスで描いたシートを、メモリーに読み込まずに少しずつ zip へ流し込むときに使います
+
+        Parameters
+        ----------
+        xml_file_path : str
+            UTF-8 で書いた、ワークシートの XML のファイルパス
+        sheet_name, hyperlink_target_list, tab_index
+            write_sheet() を参照
+        """
+
+        # 先に開いておけば、開けなかったときにシートが増えない
+        with open(xml_file_path, mode='rb') as xml_file:
+            with self._open_sheet(sheet_name=sheet_name, hyperlink_target_list=hyperlink_target_list, tab_index=tab_index) as f:
+                shutil.copyfileobj(xml_file, f)
+
+
+    @contextlib.contextmanager
+    def _open_sheet(self, sheet_name, hyperlink_target_list, tab_index):
+        """シートを１枚足して、ワークシートの XML を書き込む zip の中のファイルを開きます"""
+
+        self._sheet_name_list.append(sheet_name)
+        sheet_th = len(self._sheet_name_list)
+
+        if tab_index is None:
+            self._tab_sheet_th_list.append(sheet_th)
+        else:
+            self._tab_sheet_th_list.insert(tab_index, sheet_th)
+
+        with self._zip_file.open(f'xl/worksheets/sheet{sheet_th}.xml', mode='w') as f:
+            yield f
+
+        if 0 < len(hyperlink_target_list):
+            self._zip_file.writestr(f'xl/worksheets/_rels/sheet{sheet_th}.xml.rels', ''.join([
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n',
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">',
+                *[f'<Relationship Id="rId{target_th}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink" Target={quoteattr(target)} TargetMode="External"/>' for target_th, target in enumerate(hyperlink_target_list, 1)],
+                '</Relationships>']))
+
+
+    def discard(self):
+        """ファイルを閉じて、消します。書きかけのファイルを残さないために使います"""
+        self._zip_file.close()
+        os.remove(self._zip_file.filename)
+
+
+    def close(self):
+        """残りの部品を書き出して、ファイルを閉じます"""
+
+        sheet_range = range(1, len(self._sheet_name_list) + 1)
+
+        self._zip_file.writestr('[Content_Types].xml', ''.join([
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n',
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">',
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>',
+            '<Default Extension="xml" ContentType="application/xml"/>',
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>',
+            '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>',
+            *[f'<Override PartName="/xl/worksheets/sheet{sheet_th}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>' for sheet_th in sheet_range],
+            '</Types>']))
+
+        self._zip_file.writestr('_rels/.rels', ''.join([
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n',
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">',
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>',
+            '</Relationships>']))
+
+        self._zip_file.writestr('xl/workbook.xml', ''.join([
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n',
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">',
+            '<bookViews><workbookView activeTab="0"/></bookViews>',
+            '<sheets>',
+            *[f'<sheet name={quoteattr(self._sheet_name_list[sheet_th - 1])} sheetId="{sheet_th}" r:id="rId{sheet_th}"/>' for sheet_th in self._tab_sheet_th_list],
+            '</sheets>',
+            '</workbook>']))
+
+        self._zip_file.writestr('xl/_rels/workbook.xml.rels', ''.join([
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n',
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">',
+            *[f'<Relationship Id="rId{sheet_th}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet{sheet_th}.xml"/>' for sheet_th in sheet_range],
+            f'<Relationship Id="rId{len(self._sheet_name_list) + 1}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>',
+            '</Relationships>']))
+
+        self._zip_file.writestr('xl/styles.xml', self._styles.to_xml())
+
+        self._zip_file.close()
@@ -0,0 +1,221 @@
+import contextlib
+import time
+
+
+class RenderCancelled(Exception):
+    """進捗のコールバックが False を返したので、描画を止めました"""
+    pass
+
+
+class RenderStats():
+    """描画の統計
+
+    段階（parse, draw, save など）ごとの時間、描いた件数、書いたセルの数、罫線を引いたセルの数、使った書式の数を数えます。
+    数えるのは件ごと、辺やノードごとなので、セルごとに時刻を取る debug_write よりずっと軽いです
+
+    進捗のコールバックを渡すと、 progress_interval 件ごとと、段階が終わるたびに呼び出します。
+    コールバックが False を返すと RenderCancelled を送出して、描画を止めます"""
+
+
+    def __init__(self, on_progress=None, progress_interval=1000, len_records_total=None):
+        """初期化
+
+        Parameters
+        ----------
+        on_progress : func
+            この RenderStats を引数に受け取る関数。 False を返すと描画を止めます。省略可
+        progress_interval : int
+            何件ごとにコールバックを呼び出すか
+        len_records_total : int
+            全件数。分かっていれば、進捗の割合を出すのに使えます
+        """
+        self._on_progress = on_progress
+        self._progress_interval = progress_interval
+        self._len_records_total = len_records_total
+
+        # 段階の名前 → 秒数。段階を通った順
+        self._seconds_by_phase = {}
+        self._phase_name = None
+
+        self._len_records = 0
+        self._len_cells = 0
+        self._len_borders = 0
+
+        # id(書式) → 書式
+        #
+        # NOTE openpyxl の書式のオブジェクトは、ハッシュを求めるのが遅い。
+        # セルを書くたびに集合に入れると描画より重くなるので、オブジェクトの同一性で数えて、値が同じものは len_styles でまとめる
+        #
+        self._style_dict = {}
+
+        # 前回と何も変わっていないので、描画を省いたか？
+        self._is_skipped = False
+
+        # 出力ファイルの他に書き出したファイル
+        self._extra_file_path_list = []
+
+
+    @property
+    def seconds_by_phase(self):
+        """段階の名前 → 秒数"""
+        return self._seconds_by_phase
+
+
+    @property
+    def phase_name(self):
+        """今の段階の名前。段階の外なら None"""
+        return self._phase_name
+
+
+    @property
+    def len_records_total(self):
+        return self._len_records_total
+
+
+    @len_records_total.setter
+    def len_records_total(self, value):
+        self._len_records_total = value
+
+
+    @property
+    def is_skipped(self):
+        """前回と何も変わっていないので、描画を省いたか？"""
+        return self._is_skipped
+
+
+    @is_skipped.setter
+    def is_skipped(self, value):
+        self._is_skipped = value
+
+
+    @property
+    def extra_file_path_list(self):
+        """出力ファイルの他に書き出したファイルのパスのリスト。シャードごとのワークブックなど"""
+        return self._extra_file_path_list
+
+
+    @extra_file_path_list.setter
+    def extra_file_path_list(self, value):
+        self._extra_file_path_list = value
+
+
+    @property
+    def len_records(self):
+        """描いた件数"""
+        return self._len_records
+
+
+    @property
+    def len_cells(self):
+        """書いたセルの数"""
+        return self._len_cells
+
+
+    @property
+    def len_borders(self):
+        """罫線を引いたセルの数"""
+        return self._len_borders
+
+
+    @property
+    def len_styles(self):
+        """使ったフォント、背景色、罫線の種類の数"""
+        return len(set(self._style_dict.values()))
+
+
+    @contextlib.contextmanager
+    def measure(self, phase_name):
+        """with 文の中を、１つの段階として時間を測ります"""
+
+        self._phase_name = phase_name
+        start = time.perf_counter()
+
+        try:
+            yield self
+
+        finally:
+            self._seconds_by_phase[phase_name] = self._seconds_by_phase.get(phase_name, 0) + time.perf_counter() - start
+            self._phase_name = None
+
+        self.report()
+
+
+    def count_cells(self, len_cells, fill=None, font=None, border=None):
+        """同じ書式のセルを len_cells 個書いたことを数えます"""
+
+        self._len_cells += len_cells
+
+        if border is not None:
+            self._len_borders += len_cells
+            self._style_dict[id(border)] = border
+
+        if fill is not None:
+            self._style_dict[id(fill)] = fill
+
+        if font is not None:
+            self._style_dict[id(font)] = font
+
+
+    def count_records(self, len_records=1):
+        """描いた件数を数えます。 progress_interval 件を超えるたびにコールバックを呼び出します"""
+
+        prev_len_records = self._len_records
+        self._len_records += len_records
+
+        if self._on_progress is not None and prev_len_records // self._progress_interval != self._len_records // self._progress_interval:
+            self.report()
+
+
+    def merge(self, counts):
+        """別のプロセスで数えたものを足します
+
+        Parameters
+        ----------
+        counts : dict
+            別のプロセスの to_counts() の戻り値
+        """
+        self._len_cells += counts['len_cells']
+        self._len_borders += counts['len_borders']
+
+        # 別のプロセスから来た書式は、こちらの書式と別のオブジェクトになる
+        for style in counts['style_list']:
+            self._style_dict[id(style)] = style
+
+        self.count_records(len_records=counts['len_records'])
+
+
+    def to_counts(self):
+        """別のプロセスへ渡せる、数えたもの"""
+        return {
+            'len_records': self._len_records,
+            'len_cells': self._len_cells,
+            'len_borders': self._len_borders,
+            'style_list': list(set(self._style_dict.values())),
+        }
+
+
+    def report(self):
+        """進捗のコールバックを呼び出します"""
+
+        if self._on_progress is None:
+            return
+
+        if self._on_progress(self) is False:
+            raise RenderCancelled(f"cancelled by the progress callback. {self._phase_name=} {self._len_records=}")
+
+
+    def to_dict(self):
+        """JSON にそのまま書き出せる辞書"""
+        return {
+            'seconds_by_phase': dict(self._seconds_by_phase),
+            'is_skipped': self._is_skipped,
+            'len_records': self._len_records,
+            'len_cells': self._len_cells,
+            'len_borders': self._len_borders,
+            'len_styles': self.len_styles,
+        }
+
+
+    def __str__(self):
+        phase_text = ', '.join(f"{phase_name}={seconds:.3f}s" for phase_name, seconds in self._seconds_by_phase.items())
+        return f"{phase_text}, records={self._len_records}, cells={self._len_cells}, borders={self._len_borders}, styles={self.len_styles}"
@@ -0,0 +1,82 @@
+from openpyxl.styles import PatternFill, Font
+from openpyxl.styles.borders import Border, Side
+
+
+class StylePool():
+    """スタイルの溜め池
+
+    罫線、背景色、文字色のオブジェクトは、見た目が同じなら１つあれば足ります。
+    プロセスの中で最初に頼まれたときに１回だけ作り、以降は同じオブジェクトを返します。
+    セルごとに作り直さないので、描画中の割り当ても、保存時に openpyxl が行う重複除去の手間も減ります"""
+
+
+    # 罫線
+    #
+    #   style に入るもの： 'dashDot', 'dashDotDot', 'double', 'hair', 'dotted', 'mediumDashDotDot', 'dashed', 'mediumDashed', 'slantDashDot', 'thick', 'thin', 'medium', 'mediumDashDot'
+    #   色の参考： 📖 [Excels 56 ColorIndex Colors](https://www.excelsupersite.com/what-are-the-56-colorindex-colors-in-excel/)
+    #
+    BLACK = '000000'
+
+    # キーはスタイルの記述子（種類と属性のタプル）
+    _pool = {}
+
+
+    @classmethod
+    def _get_or_create(clazz, key, create):
+        style = clazz._pool.get(key)
+
+        if style is None:
+            style = create()
+            clazz._pool[key] = style
+
+        return style
+
+
+    @classmethod
+    def get_side(clazz, style='thick', color=BLACK):
+        """罫線の１辺"""
+        return clazz._get_or_create(
+                key=('side', style, color),
+                create=lambda: Side(style=style, color=color))
+
+
+    @classmethod
+    def get_border(clazz, left=False, right=False, top=False, bottom=False, style='thick', color=BLACK):
+        """罫線。真を指定した辺に線を引きます
+
+        DEBUG_TIPS: 罫線に色を付けると、デバッグしやすいです。例： color='FF0000'
+        """
+
+        def create():
+            side = clazz.get_side(style=style, color=color)
+            return Border(
+                    left=side if left else None,
+                    right=side if right else None,
+                    top=side if top else None,
+                    bottom=side if bottom else None)
+
+        return clazz._get_or_create(
+                key=('border', left, right, top, bottom, style, color),
+                create=create)
+
+
+    @classmethod
+    def get_fill(clazz, fgcolor):
+        """背景色"""
+        return clazz._get_or_create(
+                key=('fill', fgcolor),
+                create=lambda: PatternFill(patternType='solid', fgColor=fgcolor))
+
+
+    @classmethod
+    def get_font(clazz, color):
+        """文字色"""
+        return clazz._get_or_create(
+                key=('font', color),
+                create=lambda: Font(color=color))
+
+
+    @classmethod
+    def len_styles(clazz):
+        """これまでに作ったスタイルの数"""
+        return len(clazz._pool)
@@ -1,12 +1,14 @@
+import bisect
 import datetime
-import pandas as pd
 import openpyxl as xl
-from openpyxl.styles import PatternFill, Font
-from openpyxl.styles.borders import Border, Side
+from openpyxl.cell import WriteOnlyCell
 
-from xltree.library import nth
-from xltree.database import TreeNode, TreeRecord
-from xltree.models import TreeModel
+from xltree.library import nth, is_blank
+from xltree.database import TreeNode, TreeRecord, TreeTable
+from xltree.models import TreeLayout
+from xltree.spreadsheetml import SpreadsheetMlStyles
+from xltree.stats import RenderStats
+from xltree.styles import StylePool
 
 
 class TreeDrawer():
@@ -18,15 +20,25 @@ class TreeDrawer():
     #   色の参考： 📖 [Excels 56 ColorIndex Colors](https://www.excelsupersite.com/what-are-the-56-colorindex-colors-in-excel/)
     #
     _fgcolor_list = [
-        Font(color='111111'),
-        Font(color='EEEEEE')]
+        StylePool.get_font(color='111111'),
+        StylePool.get_font(color='EEEEEE')]
 
     _bgcolor_list = [
-        PatternFill(patternType='solid', fgColor='CCCCCC'),
-        PatternFill(patternType='solid', fgColor='333333')]
+        StylePool.get_fill(fgcolor='CCCCCC'),
+        StylePool.get_fill(fgcolor='333333')]
 
+    # ノードの背景色
+    _node_bgcolor = StylePool.get_fill(fgcolor='FFFFCC')
 
-    def __init__(self, tree_table, ws, config, debug_write=False):
+    # 罫線
+    _under_border = StylePool.get_border(bottom=True)
+    _leftside_border = StylePool.get_border(left=True)
+    _l_letter_border = StylePool.get_border(left=True, bottom=True)
+    _upside_node_border = StylePool.get_border(top=True, left=True, right=True)
+    _downside_node_border = StylePool.get_border(bottom=True, left=True, right=True)
+
+
+    def __init__(self, tree_table, ws, config, debug_write=False, stats=None):
         """初期化
         
         Parameters
@@ -40,20 +52,28 @@ class TreeDrawer():
         debug_write : bool
             デバッグライト
             DEBUG_TIPS: デバッグライトをオンにして、コンソールにログを表示すると不具合を調査しやすくなります
+        stats : RenderStats
+            描画の統計。省略可
         """
         self._tree_table = tree_table
         self._ws = ws
         self._config = config
         self._debug_write = debug_write
+        self._stats = stats if stats is not None else RenderStats()
 
         self._prev_record = TreeRecord.new_empty(specified_length_of_nodes=self._tree_table.actual_length_of_nodes)
         self._curr_record = TreeRecord.new_empty(specified_length_of_nodes=self._tree_table.actual_length_of_nodes)
         self._next_record = TreeRecord.new_empty(specified_length_of_nodes=self._tree_table.actual_length_of_nodes)
 
+        self._tree_layout = None
+
 
     def render(self):
         """描画"""
 
+        # 罫線の最終形を先に調べておく。要らない罫線を引かないので、消しゴム（TreeEraser）は要らない
+        self._tree_layout = TreeLayout.from_tree_table(tree_table=self._tree_table)
+
         # 対象シートへ列ヘッダー書出し
         self._on_header()
 
@@ -67,6 +87,177 @@ class TreeDrawer():
         self._ws.freeze_panes = 'B2'
 
 
+    def redraw(self, changed_no_list):
+        """描画済みのシートのうち、変わったところだけ描き直します。
+        シートは、更新前のテーブルを render() で描いたものとします。テーブルは更新後のものを渡してください
+
+        描き直すのは、更新または挿入された件と、その前後の件の全体、
+        それから弟の有無が変わって、垂直線を引き直すことになったノードの辺の列だけです。
+        弟の有無が変わったかは、シートに残っている罫線を１か所読めば分かるので、変わっていない件は読み書きしません
+
+        NOTE 件の削除には対応していません。削除したときは render() で描き直してください
+
+        Parameters
+        ----------
+        changed_no_list : list<int>
+            更新または挿入された件の no。 TreeTable.upsert_many() の戻り値をそのまま渡せます
+
+        Returns
+        -------
+        redrawn_row_number_list : list<int>
+            描き直した件の、0から始まる行番号
+        """
+
+        # 変数名短縮
+        ws = self._ws
+        df = self._tree_table.df
+
+        self._tree_layout = TreeLayout.from_tree_table(tree_table=self._tree_table)
+
+        len_records = len(df)
+
+        # 描き直す前の件数。最終件の３行目のA列には背景色があるので、最後の行から数えられる
+        old_len_records = max(0, (ws.max_row - 2) // 3)
+        old_max_column = ws.max_column
+
+
+        # 変わった件の行番号
+        row_number_array = df.index.get_indexer(list(set(changed_no_list)))
+        if (row_number_array < 0).any():
+            raise ValueError(f"not found in tree table. {changed_no_list=}")
+
+        changed_row_number_list = sorted(row_number_array.tolist())
+
+
+        # 挿入された件を見分ける。挿入でない件は、それより前に挿入された件数だけ前にずらすと、シートのA列に同じ no がある
+        inserted_row_number_list = []
+
+        for row_number in changed_row_number_list:
+            old_row_number = row_number - len(inserted_row_number_list)
+
+            if old_row_number < old_len_records and ws.cell(row=TreeDrawer.get_three_row_numbers(row_number=old_row_number)[0], column=1).value == df.index[row_number]:
+                continue
+
+            inserted_row_number_list.append(row_number)
+
+        if old_len_records + len(inserted_row_number_list) != len_records:
+            raise ValueError(f"the sheet does not match the tree table. records were deleted, or changed_no_list is short. {old_len_records=} {len(inserted_row_number_list)=} {len_records=}")
+
+
+        # 挿入された件の３行を空ける。続けて挿入された件はまとめて空ける
+        # NOTE 行を空けると openpyxl は下のセルをすべて動かすので、ここは件数に比例した時間が掛かります
+        group_start_index = 0
+        for index, row_number in enumerate(inserted_row_number_list):
+            if index + 1 < len(inserted_row_number_list) and inserted_row_number_list[index + 1] == row_number + 1:
+                continue
+
+            first_row_number = inserted_row_number_list[group_start_index]
+            ws.insert_rows(TreeDrawer.get_three_row_numbers(row_number=first_row_number)[0], amount=(index - group_start_index + 1) * 3)
+            group_start_index = index + 1
+
+
+        # 件の全体を描き直す行。変わった件は、前後の件の罫線とノードの有無も変える
+        full_row_number_set = set()
+        for row_number in changed_row_number_list:
+            for neighbor_row_number in (row_number - 1, row_number, row_number + 1):
+                if 0 <= neighbor_row_number < len_records:
+                    full_row_number_set.add(neighbor_row_number)
+
+        full_row_number_list = sorted(full_row_number_set)
+
+
+        # 辺の列だけ描き直す行。層ごと
+        edge_row_number_set_by_depth = {}
+
+        for depth_th in range(1, self._tree_table.actual_length_of_nodes):
+            edge_row_number_set = set()
+            cn2_column_th = xl.utils.column_index_from_string(TreeDrawer.get_three_column_names(depth_th=depth_th)[1])
+            visited_first_row_number_set = set()
+
+            for row_number in full_row_number_list:
+                if not self._tree_layout.has_node(row_number=row_number, depth_th=depth_th):
+                    continue
+
+                first_row_number, last_row_number = self._tree_layout.get_span_of_node(row_number=row_number, depth_th=depth_th)
+
+                if first_row_number in visited_first_row_number_set:
+                    continue
+
+                visited_first_row_number_set.add(first_row_number)
+
+                # ノードが跨る行を、全体を描き直す行で区切る。区切られた各区間の中は、弟の有無が更新前も後も揃っている
+                start = bisect.bisect_left(full_row_number_list, first_row_number)
+                end = bisect.bisect_right(full_row_number_list, last_row_number)
+                boundary_list = [first_row_number - 1] + full_row_number_list[start:end] + [last_row_number + 1]
+
+                for segment_first, segment_last in zip(boundary_list, boundary_list[1:]):
+                    segment_first += 1
+                    segment_last -= 1
+
+                    if segment_last < segment_first:
+                        continue
+
+                    # 更新前に弟がいたなら、区間の先頭の件の２行目に左辺の罫線が引いてある（'┬字', '├字', '│字'）
+                    old_border = ws.cell(row=TreeDrawer.get_three_row_numbers(row_number=segment_first)[1], column=cn2_column_th).border
+                    had_younger_sibling = old_border is not None and old_border.left is not None and old_border.left.style is not None
+
+                    if had_younger_sibling != self._tree_layout.has_younger_sibling(row_number=segment_first, depth_th=depth_th):
+                        edge_row_number_set.update(range(segment_first, segment_last + 1))
+
+            if 0 < len(edge_row_number_set):
+                edge_row_number_set_by_depth[depth_th] = edge_row_number_set
+
+
+        # 列ヘッダー。層が増えているかもしれない
+        self._on_header()
+
+
+        # 件の全体を描き直す
+        for row_number in full_row_number_list:
+            three_row_numbers = TreeDrawer.get_three_row_numbers(row_number=row_number)
+            self._clear_cells(three_row_numbers=three_row_numbers, column_th_list=range(1, max(old_max_column, self._tree_table.actual_length_of_nodes * 3) + 1))
+
+            self._curr_record = self._tree_table.record_at(row_number=row_number)
+            self._draw_record(row_number=row_number)
+
+
+        # 辺の列だけ描き直す
+        redrawn_row_number_set = set(full_row_number_list)
+
+        for depth_th, edge_row_number_set in edge_row_number_set_by_depth.items():
+            column_letter_list = TreeDrawer.get_three_column_names(depth_th=depth_th)
+            column_th_list = [xl.utils.column_index_from_string(column_letter) for column_letter in column_letter_list[:2]]
+
+            for row_number in sorted(edge_row_number_set):
+                three_row_numbers = TreeDrawer.get_three_row_numbers(row_number=row_number)
+                self._clear_cells(three_row_numbers=three_row_numbers, column_th_list=column_th_list)
+
+                self._curr_record = self._tree_table.record_at(row_number=row_number)
+                self._draw_edge(row_number=row_number, depth_th=depth_th, three_column_names=column_letter_list, three_row_numbers=three_row_numbers)
+
+            redrawn_row_number_set.update(edge_row_number_set)
+
+
+        # 末尾に増えた件の行の高さ
+        for row_number in range(old_len_records, len_records):
+            row1_th, row2_th, row3_th = TreeDrawer.get_three_row_numbers(row_number=row_number)
+            ws.row_dimensions[row1_th].height = 13
+            ws.row_dimensions[row2_th].height = 13
+            ws.row_dimensions[row3_th].height = 6
+
+        return sorted(redrawn_row_number_set)
+
+
+    def _clear_cells(self, three_row_numbers, column_th_list):
+        """セルの値と書式を消します"""
+
+        for row_th in three_row_numbers:
+            for column_th in column_th_list:
+                cell = self._ws.cell(row=row_th, column=column_th)
+                cell.value = None
+                cell.style = 'Normal'
+
+
     def _forward_cursor(self, next_record):
         """送り出し
 
@@ -157,6 +348,17 @@ class TreeDrawer():
         ws[f'A{row_th}'].fill = TreeDrawer._bgcolor_list[0]
 
 
+        # 統計
+        self._stats.count_cells(1, fill=TreeDrawer._bgcolor_list[0], font=TreeDrawer._fgcolor_list[0])    # A1
+        self._stats.count_cells(2, fill=TreeDrawer._bgcolor_list[0])                                        # B1, A2
+        self._stats.count_cells(1, fill=TreeDrawer._bgcolor_list[1], font=TreeDrawer._fgcolor_list[1])    # C1
+
+        for node_th in range(1, self._tree_table.actual_length_of_nodes):
+            flip = (node_th - 1) % 2
+            self._stats.count_cells(2, fill=TreeDrawer._bgcolor_list[flip])
+            self._stats.count_cells(1, fill=TreeDrawer._bgcolor_list[flip], font=TreeDrawer._fgcolor_list[flip])
+
+
     def _on_each_record(self, next_row_number, next_record):
         """先読みで最初の１回を空振りさせるので、２件目から本処理です"""
 
@@ -170,260 +372,257 @@ class TreeDrawer():
 
 
         else:
-            # 変数名短縮
-            ws = self._ws
-
-
-            # ３行目～６行目
-            # --------------
-            # データは３行目から、１かたまり３行を使って描画する
-            HEADER_HEIGHT = 3
-            RECORD_HEIGHT = 3
-            curr_row_number = next_row_number - 1
-            row1_th = curr_row_number * RECORD_HEIGHT + HEADER_HEIGHT
-            row2_th = curr_row_number * RECORD_HEIGHT + HEADER_HEIGHT + 1
-            row3_th = curr_row_number * RECORD_HEIGHT + HEADER_HEIGHT + 2
-            three_row_numbers = [row1_th, row2_th, row3_th]
-
-            # 行の高さ設定
-            # height の単位はポイント。昔のアメリカ人が椅子に座ってディスプレイを見たとき 1/72 インチに見える大きさが 1ポイント らしいが、そんなんワカラン。目視確認してほしい
-            ws.row_dimensions[row1_th].height = 13
-            ws.row_dimensions[row2_th].height = 13
-            ws.row_dimensions[row3_th].height = 6
+            self._draw_record(row_number=next_row_number - 1)
 
-            ws[f'A{row1_th}'].value = self._curr_record.no
-            ws[f'A{row1_th}'].fill = TreeDrawer._bgcolor_list[0]
-            ws[f'A{row2_th}'].fill = TreeDrawer._bgcolor_list[0]
-            ws[f'A{row3_th}'].fill = TreeDrawer._bgcolor_list[0]
-            # B列は空
 
+    @staticmethod
+    def get_three_row_numbers(row_number):
+        """レコードを描く３行の行番号（1から始まる）
 
-            def draw_edge(depth_th, three_column_names, three_row_numbers):
-                """
-                Parameters
-                ----------
-                depth_th : int
-                    第何層。根層は 0
-                """
+        Parameters
+        ----------
+        row_number : int
+            0から始まるレコードの行番号
+        """
 
-                # 罫線
-                #
-                #   style に入るもの： 'dashDot', 'dashDotDot', 'double', 'hair', 'dotted', 'mediumDashDotDot', 'dashed', 'mediumDashed', 'slantDashDot', 'thick', 'thin', 'medium', 'mediumDashDot'
-                #   色の参考： 📖 [Excels 56 ColorIndex Colors](https://www.excelsupersite.com/what-are-the-56-colorindex-colors-in-excel/)
-                #
-                BLACK = '000000'
-                side = Side(style='thick', color=BLACK)
-
-                # DEBUG_TIPS: 罫線に色を付けると、デバッグしやすいです
-                if True:
-                    red_side = Side(style='thick', color=BLACK)
-                    orange_side = Side(style='thick', color=BLACK)
-                    green_side = Side(style='thick', color=BLACK)
-                    blue_side = Side(style='thick', color=BLACK)
-                    cyan_side = Side(style='thick', color=BLACK)
-                else:
-                    red_side = Side(style='thick', color='FF0000')
-                    orange_side = Side(style='thick', color='FFCC00')
-                    green_side = Side(style='thick', color='00FF00')
-                    blue_side = Side(style='thick', color='0000FF')
-                    cyan_side = Side(style='thick', color='00FFFF')
-
-                # ─字  赤
-                border_to_parent_horizontal = Border(bottom=red_side)
-                under_border_to_child_horizontal = Border(bottom=red_side)
-                # │字  緑
-                leftside_border_to_vertical = Border(left=green_side)
-                # ┬字  青
-                border_to_parent_downward = Border(bottom=blue_side)
-                under_border_to_child_downward = Border(bottom=blue_side)
-                leftside_border_to_child_downward = Border(left=blue_side)
-                # ├字  青緑
-                l_letter_border_to_child_rightward = Border(left=cyan_side, bottom=cyan_side)
-                leftside_border_to_child_rightward = Border(left=cyan_side)
-                # └字  橙
-                l_letter_border_to_child_upward = Border(left=orange_side, bottom=orange_side)
-
-
-                nd = self._curr_record.node_at(depth_th=depth_th)
-
-                if nd is None or pd.isnull(nd.text):
-                    if self._debug_write:
-                        print(f"[{datetime.datetime.now()}] Pencil(Edge) {self._curr_record.no} record > {nth(depth_th)} layer  Empty cell")
-                    return
-
-
-                cn1 = three_column_names[0]
-                cn2 = three_column_names[1]
-                cn3 = three_column_names[2]
-                row1_th = three_row_numbers[0]
-                row2_th = three_row_numbers[1]
-                row3_th = three_row_numbers[2]
-
-
-                # 自件と前件を比較して、根から自ノードまで、ノードテキストが等しいか？
-                if TreeModel.is_same_path_as_avobe(
-                        curr_record=self._curr_record,
-                        prev_record=self._prev_record,
-                        depth_th=depth_th):
-
-                    if self._debug_write:
-                        print(f"[{datetime.datetime.now()}] Pencil(Edge) {self._curr_record.no} record > {nth(depth_th)} layer  │")
-                    
-                    # 垂直線
-                    #
-                    #   |    leftside_border
-                    # ..+..  
-                    #   |    leftside_border
-                    #   |    leftside_border
-                    #                        
-                    ws[f'{cn2}{row1_th}'].border = leftside_border_to_vertical
-                    ws[f'{cn2}{row2_th}'].border = leftside_border_to_vertical
-                    ws[f'{cn2}{row3_th}'].border = leftside_border_to_vertical
-                    return
-
-
-                # 子ノードへの接続は４種類の線がある
-                #
-                # (1) ─字
-                #   .    under_border
-                # ...__  
-                #   .    None
-                #   .    None
-                #
-                # (2) ┬字
-                #   .    under_border
-                # ..+__  
-                #   |    leftside_border
-                #   |    leftside_border
-                #
-                # (3) ├字
-                #   |    l_letter_border
-                # ..+__  
-                #   |    leftside_border
-                #   |    leftside_border
-                #
-                # (4) └字
-                #   |    l_letter_border
-                # ..+__  
-                #   .    None
-                #   .    None
-                #
-                kind = TreeModel.get_kind_of_edge(
-                        prev_record=self._prev_record,
-                        curr_record=self._curr_record,
-                        next_record=self._next_record,
-                        depth_th=depth_th)
-
-                if kind == '─字':
-                    ws[f'{cn1}{row1_th}'].border = border_to_parent_horizontal
-                    ws[f'{cn2}{row1_th}'].border = under_border_to_child_horizontal
-                    if self._debug_write:
-                        print(f"[{datetime.datetime.now()}] Pencil(Edge) {self._curr_record.no} record > {nth(depth_th)} layer  ─ {nd.edge_text}")
-                
-                elif kind == '┬字':
-                    ws[f'{cn1}{row1_th}'].border = border_to_parent_downward
-                    ws[f'{cn2}{row1_th}'].border = under_border_to_child_downward
-                    ws[f'{cn2}{row2_th}'].border = leftside_border_to_child_downward
-                    ws[f'{cn2}{row3_th}'].border = leftside_border_to_child_downward
-                    if self._debug_write:
-                        print(f"[{datetime.datetime.now()}] Pencil(Edge) {self._curr_record.no} record > {nth(depth_th)} layer  ┬ {nd.edge_text}")
-
-                elif kind == '├字':
-                    ws[f'{cn2}{row1_th}'].border = l_letter_border_to_child_rightward
-                    ws[f'{cn2}{row2_th}'].border = leftside_border_to_child_rightward
-                    ws[f'{cn2}{row3_th}'].border = leftside_border_to_child_rightward
-                    if self._debug_write:
-                        print(f"[{datetime.datetime.now()}] Pencil(Edge) {self._curr_record.no} record > {nth(depth_th)} layer  ├ {nd.edge_text}")
-
-                elif kind == '└字':
-                    ws[f'{cn2}{row1_th}'].border = l_letter_border_to_child_upward
-                    if self._debug_write:
-                        print(f"[{datetime.datetime.now()}] Pencil(Edge) {self._curr_record.no} record > {nth(depth_th)} layer  └ {nd.edge_text}")
-                
-                else:
-                    raise ValueError(f"{kind=}")
-                
-
-                # ２列目：エッジ・テキスト
-                ws[f'{cn2}{row1_th}'].value = nd.edge_text
-
-
-            def draw_node(depth_th, three_column_names, three_row_numbers):
-                """節を描きます
-
-                Parameters
-                ----------
-                node : TreeNode
-                    節
-                depth_th : int
-                    第何層。根層は 0
-                """
-
-                nd = self._curr_record.node_at(depth_th=depth_th)
-
-                if nd is None or pd.isnull(nd.text) or TreeModel.is_same_path_as_avobe(
-                        curr_record=self._curr_record,
-                        prev_record=self._prev_record,
-                        depth_th=depth_th):
-
-                    if self._debug_write:
-                        print(f"[{datetime.datetime.now()}] Pencil(Node) {self._curr_record.no} record > {nth(depth_th)} layer  Empty cell")
-
-                    return
-
-
-                cn3 = three_column_names[2]
-                row1_th = three_row_numbers[0]
-                row2_th = three_row_numbers[1]
-                row3_th = three_row_numbers[2]
-
-                # 背景色
-                #
-                #   色の参考： 📖 [Excels 56 ColorIndex Colors](https://www.excelsupersite.com/what-are-the-56-colorindex-colors-in-excel/)
-                #
-                node_bgcolor = PatternFill(patternType='solid', fgColor='FFFFCC')
+        # データは３行目から、１かたまり３行を使って描画する
+        HEADER_HEIGHT = 3
+        RECORD_HEIGHT = 3
+        row1_th = row_number * RECORD_HEIGHT + HEADER_HEIGHT
+        return [row1_th, row1_th + 1, row1_th + 2]
 
-                # 罫線、背景色
-                #
-                #   style に入るもの： 'dashDot', 'dashDotDot', 'double', 'hair', 'dotted', 'mediumDashDotDot', 'dashed', 'mediumDashed', 'slantDashDot', 'thick', 'thin', 'medium', 'mediumDashDot'
-                #
-                side = Side(style='thick', color='000000')
-                upside_node_border = Border(top=side, left=side, right=side)
-                downside_node_border = Border(bottom=side, left=side, right=side)
 
-                if self._debug_write:
-                    print(f"[{datetime.datetime.now()}] Pencil(Node) {self._curr_record.no} record > {nth(depth_th)} layer  □ {nd.text}")
-                
-                ws[f'{cn3}{row1_th}'].value = nd.text
-                ws[f'{cn3}{row1_th}'].fill = node_bgcolor
-                ws[f'{cn3}{row1_th}'].border = upside_node_border
-                ws[f'{cn3}{row2_th}'].fill = node_bgcolor
-                ws[f'{cn3}{row2_th}'].border = downside_node_border
-
-
-            # 第０層
-            # ------
-            depth_th = 0
-            if depth_th < self._tree_table.actual_length_of_nodes:
-                column_letter = xl.utils.get_column_letter(3)   # 'C'
-                draw_node(depth_th=depth_th, three_column_names=[None, None, column_letter], three_row_numbers=three_row_numbers)
-
-
-            COLUMN_WIDTH = 3
-
-            # 第１～最終層
-            # ------------
-            for depth_th in range(1, self._tree_table.actual_length_of_nodes):
-                head_column_th = depth_th * COLUMN_WIDTH + 1
-                if depth_th < self._tree_table.actual_length_of_nodes:
-                    # 第1層は 'D', 'E', 'F'、以降、後ろにずれていく
-                    column_letter_list = [
-                        xl.utils.get_column_letter(head_column_th),
-                        xl.utils.get_column_letter(head_column_th + 1),
-                        xl.utils.get_column_letter(head_column_th + 2),
-                    ]
-                    draw_edge(depth_th=depth_th, three_column_names=column_letter_list, three_row_numbers=three_row_numbers)
-                    draw_node(depth_th=depth_th, three_column_names=column_letter_list, three_row_numbers=three_row_numbers)
+    @staticmethod
+    def get_three_column_names(depth_th):
+        """その層を描く３列の列名。第0層（根）はノードの列 'C' だけ
+
+        Parameters
+        ----------
+        depth_th : int
+            第何層。根層は 0
+        """
+
+        if depth_th == 0:
+            return [None, None, xl.utils.get_column_letter(3)]  # 'C'
+
+        # 第1層は 'D', 'E', 'F'、以降、後ろにずれていく
+        COLUMN_WIDTH = 3
+        head_column_th = depth_th * COLUMN_WIDTH + 1
+        return [
+            xl.utils.get_column_letter(head_column_th),
+            xl.utils.get_column_letter(head_column_th + 1),
+            xl.utils.get_column_letter(head_column_th + 2),
+        ]
+
+
+    def _draw_record(self, row_number):
+        """自件を描きます
+
+        Parameters
+        ----------
+        row_number : int
+            0から始まる行番号
+        """
+
+        # 変数名短縮
+        ws = self._ws
+
+
+        # ３行目～６行目
+        # --------------
+        three_row_numbers = TreeDrawer.get_three_row_numbers(row_number=row_number)
+        row1_th, row2_th, row3_th = three_row_numbers
+
+        # 行の高さ設定
+        # height の単位はポイント。昔のアメリカ人が椅子に座ってディスプレイを見たとき 1/72 インチに見える大きさが 1ポイント らしいが、そんなんワカラン。目視確認してほしい
+        ws.row_dimensions[row1_th].height = 13
+        ws.row_dimensions[row2_th].height = 13
+        ws.row_dimensions[row3_th].height = 6
+
+        ws[f'A{row1_th}'].value = self._curr_record.no
+        ws[f'A{row1_th}'].fill = TreeDrawer._bgcolor_list[0]
+        ws[f'A{row2_th}'].fill = TreeDrawer._bgcolor_list[0]
+        ws[f'A{row3_th}'].fill = TreeDrawer._bgcolor_list[0]
+        self._stats.count_cells(3, fill=TreeDrawer._bgcolor_list[0])
+        # B列は空
+
+
+        # 第０層
+        # ------
+        depth_th = 0
+        if depth_th < self._tree_table.actual_length_of_nodes:
+            self._draw_node(row_number=row_number, depth_th=depth_th, three_column_names=TreeDrawer.get_three_column_names(depth_th=depth_th), three_row_numbers=three_row_numbers)
+
+
+        # 第１～最終層
+        # ------------
+        for depth_th in range(1, self._tree_table.actual_length_of_nodes):
+            column_letter_list = TreeDrawer.get_three_column_names(depth_th=depth_th)
+            self._draw_edge(row_number=row_number, depth_th=depth_th, three_column_names=column_letter_list, three_row_numbers=three_row_numbers)
+            self._draw_node(row_number=row_number, depth_th=depth_th, three_column_names=column_letter_list, three_row_numbers=three_row_numbers)
+
+        self._stats.count_records()
+
+
+    def _draw_edge(self, row_number, depth_th, three_column_names, three_row_numbers):
+        """辺を描きます
+
+        Parameters
+        ----------
+        row_number : int
+            0から始まる行番号
+        depth_th : int
+            第何層。根層は 0
+        """
+
+        # 変数名短縮
+        ws = self._ws
+
+        nd = self._curr_record.node_at(depth_th=depth_th)
+
+        if nd is None or is_blank(nd.text):
+            if self._debug_write:
+                print(f"[{datetime.datetime.now()}] Pencil(Edge) {self._curr_record.no} record > {nth(depth_th)} layer  Empty cell")
+            return
+
+
+        cn1 = three_column_names[0]
+        cn2 = three_column_names[1]
+        row1_th = three_row_numbers[0]
+        row2_th = three_row_numbers[1]
+        row3_th = three_row_numbers[2]
+
+
+        # 罫線の最終形
+        kind = self._tree_layout.get_kind_of_edge(row_number=row_number, depth_th=depth_th)
+
+        # 根から自ノードまで前件と同じで、弟もいない
+        if kind is None:
+            if self._debug_write:
+                print(f"[{datetime.datetime.now()}] Pencil(Edge) {self._curr_record.no} record > {nth(depth_th)} layer  No younger sibling")
+            return
+
+        # 根から自ノードまで前件と同じで、弟がいる
+        if kind == '│字':
+
+            if self._debug_write:
+                print(f"[{datetime.datetime.now()}] Pencil(Edge) {self._curr_record.no} record > {nth(depth_th)} layer  │")
+
+            # 垂直線
+            #
+            #   |    leftside_border
+            # ..+..
+            #   |    leftside_border
+            #   |    leftside_border
+            #
+            ws[f'{cn2}{row1_th}'].border = TreeDrawer._leftside_border
+            ws[f'{cn2}{row2_th}'].border = TreeDrawer._leftside_border
+            ws[f'{cn2}{row3_th}'].border = TreeDrawer._leftside_border
+            self._stats.count_cells(3, border=TreeDrawer._leftside_border)
+            return
+
+
+        # 子ノードへの接続は４種類の線がある
+        #
+        # (1) ─字
+        #   .    under_border
+        # ...__
+        #   .    None
+        #   .    None
+        #
+        # (2) ┬字
+        #   .    under_border
+        # ..+__
+        #   |    leftside_border
+        #   |    leftside_border
+        #
+        # (3) ├字
+        #   |    l_letter_border
+        # ..+__
+        #   |    leftside_border
+        #   |    leftside_border
+        #
+        # (4) └字
+        #   |    l_letter_border
+        # ..+__
+        #   .    None
+        #   .    None
+        #
+        if kind == '─字':
+            ws[f'{cn1}{row1_th}'].border = TreeDrawer._under_border
+            ws[f'{cn2}{row1_th}'].border = TreeDrawer._under_border
+            self._stats.count_cells(2, border=TreeDrawer._under_border)
+
+        elif kind == '┬字':
+            ws[f'{cn1}{row1_th}'].border = TreeDrawer._under_border
+            ws[f'{cn2}{row1_th}'].border = TreeDrawer._under_border
+            ws[f'{cn2}{row2_th}'].border = TreeDrawer._leftside_border
+            ws[f'{cn2}{row3_th}'].border = TreeDrawer._leftside_border
+            self._stats.count_cells(2, border=TreeDrawer._under_border)
+            self._stats.count_cells(2, border=TreeDrawer._leftside_border)
+
+        elif kind == '├字':
+            ws[f'{cn2}{row1_th}'].border = TreeDrawer._l_letter_border
+            ws[f'{cn2}{row2_th}'].border = TreeDrawer._leftside_border
+            ws[f'{cn2}{row3_th}'].border = TreeDrawer._leftside_border
+            self._stats.count_cells(1, border=TreeDrawer._l_letter_border)
+            self._stats.count_cells(2, border=TreeDrawer._leftside_border)
+
+        elif kind == '└字':
+            ws[f'{cn2}{row1_th}'].border = TreeDrawer._l_letter_border
+            self._stats.count_cells(1, border=TreeDrawer._l_letter_border)
+
+        else:
+            raise ValueError(f"{kind=}")
+
+        if self._debug_write:
+            print(f"[{datetime.datetime.now()}] Pencil(Edge) {self._curr_record.no} record > {nth(depth_th)} layer  {kind} {nd.edge_text}")
+
+
+        # ２列目：エッジ・テキスト
+        ws[f'{cn2}{row1_th}'].value = nd.edge_text
+
+
+    def _draw_node(self, row_number, depth_th, three_column_names, three_row_numbers):
+        """節を描きます
+
+        Parameters
+        ----------
+        row_number : int
+            0から始まる行番号
+        depth_th : int
+            第何層。根層は 0
+        """
+
+        # 変数名短縮
+        ws = self._ws
+
+        nd = self._curr_record.node_at(depth_th=depth_th)
+
+        if nd is None or is_blank(nd.text) or self._tree_layout.is_same_path_as_above(
+                row_number=row_number,
+                depth_th=depth_th):
+
+            if self._debug_write:
+                print(f"[{datetime.datetime.now()}] Pencil(Node) {self._curr_record.no} record > {nth(depth_th)} layer  Empty cell")
+
+            return
+
+
+        cn3 = three_column_names[2]
+        row1_th = three_row_numbers[0]
+        row2_th = three_row_numbers[1]
+
+        if self._debug_write:
+            print(f"[{datetime.datetime.now()}] Pencil(Node) {self._curr_record.no} record > {nth(depth_th)} layer  □ {nd.text}")
+
+        ws[f'{cn3}{row1_th}'].value = nd.text
+        ws[f'{cn3}{row1_th}'].fill = TreeDrawer._node_bgcolor
+        ws[f'{cn3}{row1_th}'].border = TreeDrawer._upside_node_border
+        ws[f'{cn3}{row2_th}'].fill = TreeDrawer._node_bgcolor
+        ws[f'{cn3}{row2_th}'].border = TreeDrawer._downside_node_border
+        self._stats.count_cells(1, fill=TreeDrawer._node_bgcolor, border=TreeDrawer._upside_node_border)
+        self._stats.count_cells(1, fill=TreeDrawer._node_bgcolor, border=TreeDrawer._downside_node_border)
 
 
 class TreeEraser():
@@ -466,15 +665,8 @@ class TreeEraser():
             # 罫線無し
             striked_border = None
         else:
-            # 罫線
-            #
-            #   style に入るもの： 'dashDot', 'dashDotDot', 'double', 'hair', 'dotted', 'mediumDashDotDot', 'dashed', 'mediumDashed', 'slantDashDot', 'thick', 'thin', 'medium', 'mediumDashDot'
-            #   色の参考： 📖 [Excels 56 ColorIndex Colors](https://www.excelsupersite.com/what-are-the-56-colorindex-colors-in-excel/)
-            #
-            # 見え消し用（デバッグに使う）
-            striked_side = Side(style='thick', color='DDDDDD')
-            # 見え消し用の罫線
-            striked_border = Border(left=striked_side)
+            # 見え消し用の罫線（デバッグに使う）
+            striked_border = StylePool.get_border(left=True, color='DDDDDD')
 
 
         # 変数名の短縮
@@ -572,3 +764,439 @@ class TreeEraser():
 
         if self._debug_write:
             print(f"[{datetime.datetime.now()}] Eraser {column_letter}{row_th} finished (EOL {ws.max_row})")
+
+
+class WriteOnlyTreeDrawer():
+    """書込み専用（write_only=True）のワークシートへ、樹形図を上の行から順に描画します。
+    セルは１度しか書けないので、罫線は TreeLayout で最終形を求めてから書きます。
+    TreeDrawer で描いて TreeEraser で消した後と同じ見た目になります"""
+
+
+    def __init__(self, tree_table, ws, config, debug_write=False, tree_layout=None, stats=None):
+        """初期化
+
+        Parameters
+        ----------
+        tree_table : TreeTable または TreeCsvReader
+            ツリーテーブル。 TreeCsvReader なら、ファイルを２周読みます
+        ws : openpyxl.worksheet._write_only.WriteOnlyWorksheet
+            書込み専用ワークシート
+        config : Config
+            構成
+        debug_write : bool
+            デバッグライト
+        tree_layout : TreeLayout
+            罫線の最終形。省略すると render() で作ります
+        stats : RenderStats
+            描画の統計。省略可
+        """
+        self._tree_table = tree_table
+        self._ws = ws
+        self._config = config
+        self._debug_write = debug_write
+        self._stats = stats if stats is not None else RenderStats()
+
+        # 列数。 A列（no）、 B列（空列）、 C列（根）、以降、１層につき３列
+        self._len_columns = 3 + (self._tree_table.actual_length_of_nodes - 1) * 3
+
+        self._tree_layout = tree_layout
+
+
+    def render(self):
+        """描画"""
+
+        # 列の幅、ウィンドウ枠の固定は、行を書き出す前に設定しておく必要がある。罫線の最終形もここで調べておく
+        self.render_header()
+
+        # 対象シートへの各行書出し
+        self._tree_table.for_each(on_each=self._on_each_record)
+
+
+    def render_header(self):
+        """列の幅、ウィンドウ枠の固定、列ヘッダーの行だけを書き出します"""
+        self._prepare_tree_layout()
+        self._on_header()
+
+
+    def _prepare_tree_layout(self):
+        """罫線の最終形が無ければ作ります"""
+
+        if self._tree_layout is not None:
+            return
+
+        if isinstance(self._tree_table, TreeTable):
+            self._tree_layout = TreeLayout.from_tree_table(tree_table=self._tree_table)
+
+        # データフレームが無ければ、レコードを１周読む
+        else:
+            self._tree_layout = TreeLayout.from_records(
+                    records=self._tree_table.iter_records(),
+                    length_of_nodes=self._tree_table.actual_length_of_nodes)
+
+
+    def render_rows(self, first_row_number):
+        """列ヘッダーは書かずに、レコードの行だけを書き出します。
+        テーブルを行で切り分けて、別々に書き出すときに使います
+
+        Parameters
+        ----------
+        first_row_number : int
+            tree_table の先頭の件が、切り分ける前のテーブルで何件目か。0から始まる。
+            tree_layout には、切り分ける前のテーブルのものを渡してください
+        """
+
+        def on_each(row_number, record):
+            self._on_each_record(row_number=first_row_number + row_number, record=record)
+
+        self._tree_table.for_each(on_each=on_each)
+
+
+    def _new_cell(self, value=None, fill=None, font=None, border=None):
+        self._stats.count_cells(1, fill=fill, font=font, border=border)
+
+        cell = WriteOnlyCell(self._ws, value=value)
+
+        if fill is not None:
+            cell.fill = fill
+
+        if font is not None:
+            cell.font = font
+
+        if border is not None:
+            cell.border = border
+
+        return cell
+
+
+    def _set_column_width(self, column_letter, width):
+        self._ws.column_dimensions[column_letter].width = width
+
+
+    def _append_row(self, row_th, row, height):
+        """１行書出し。行の高さは書き出したら忘れて、メモリーを使い続けないようにします"""
+        ws = self._ws
+
+        if height is not None:
+            ws.row_dimensions[row_th].height = height
+
+        ws.append(row)
+
+        if height is not None:
+            del ws.row_dimensions[row_th]
+
+
+    def _on_header(self):
+
+        # 変数名の短縮
+        ws = self._ws
+
+
+        # 列の幅設定
+        self._set_column_width('A', self._config.dictionary['no_width'])                        # no
+        self._set_column_width('B', self._config.dictionary['row_header_separator_width'])      # 空列
+        self._set_column_width('C', self._config.dictionary['node_width'])                      # 根
+
+        head_column_th = 4
+        for node_th in range(1, self._tree_table.actual_length_of_nodes):
+            self._set_column_width(xl.utils.get_column_letter(head_column_th    ), self._config.dictionary['parent_side_edge_width'])   # 第n層  親側辺
+            self._set_column_width(xl.utils.get_column_letter(head_column_th + 1), self._config.dictionary['child_side_edge_width'])    #        子側辺
+            self._set_column_width(xl.utils.get_column_letter(head_column_th + 2), self._config.dictionary['node_width'])               #        節
+            head_column_th += 3
+
+
+        # ウィンドウ枠の固定
+        ws.freeze_panes = 'B2'
+
+
+        # 第１行
+        # ------
+        # ヘッダー行にする
+        row = [None] * self._len_columns
+        row[0] = self._new_cell(value='No', fill=TreeDrawer._bgcolor_list[0], font=TreeDrawer._fgcolor_list[0])
+        # B列は空
+        row[1] = self._new_cell(fill=TreeDrawer._bgcolor_list[0])
+        row[2] = self._new_cell(value=self._get_column_title(depth_th=0), fill=TreeDrawer._bgcolor_list[1], font=TreeDrawer._fgcolor_list[1])
+
+        flip = 0
+        head_column_index = 3
+
+        for node_th in range(1, self._tree_table.actual_length_of_nodes):
+            row[head_column_index    ] = self._new_cell(fill=TreeDrawer._bgcolor_list[flip])
+            row[head_column_index + 1] = self._new_cell(fill=TreeDrawer._bgcolor_list[flip])
+            # 列名
+            row[head_column_index + 2] = self._new_cell(value=self._get_column_title(depth_th=node_th), fill=TreeDrawer._bgcolor_list[flip], font=TreeDrawer._fgcolor_list[flip])
+
+            flip = (flip + 1) % 2
+            head_column_index += 3
+
+        self._append_row(row_th=1, row=row, height=self._config.dictionary['header_height'])
+
+
+        # 第２行
+        # ------
+        self._on_column_header_separator()
+
+
+    def _get_column_title(self, depth_th):
+        """列ヘッダーに書く、層の名前"""
+
+        if depth_th == 0:
+            return 'Root'
+
+        return nth(depth_th)
+
+
+    def _on_column_header_separator(self):
+        """列ヘッダーの下の第２行。空行にします"""
+        self._append_row(row_th=2, row=[self._new_cell(fill=TreeDrawer._bgcolor_list[0])], height=self._config.dictionary['column_header_separator_height'])
+
+
+    def _on_each_record(self, row_number, record):
+        """１件を３行にして書き出します"""
+
+        # データは３行目から、１かたまり３行を使って描画する
+        HEADER_HEIGHT = 3
+        RECORD_HEIGHT = 3
+        row1_th = row_number * RECORD_HEIGHT + HEADER_HEIGHT
+
+        row1 = [None] * self._len_columns
+        row2 = [None] * self._len_columns
+        row3 = [None] * self._len_columns
+
+        row1[0] = self._new_cell(value=record.no, fill=TreeDrawer._bgcolor_list[0])
+        row2[0] = self._new_cell(fill=TreeDrawer._bgcolor_list[0])
+        row3[0] = self._new_cell(fill=TreeDrawer._bgcolor_list[0])
+        # B列は空
+
+        COLUMN_WIDTH = 3
+
+        for depth_th in range(0, self._tree_table.actual_length_of_nodes):
+            # 第0層は C列、第1層は D, E, F 列、以降、後ろにずれていく
+            node_column_index = depth_th * COLUMN_WIDTH + 2
+
+            if 0 < depth_th:
+                self._draw_edge(row_number=row_number, record=record, depth_th=depth_th, column_index=node_column_index - 2, three_rows=[row1, row2, row3])
+
+            self._draw_node(row_number=row_number, record=record, depth_th=depth_th, column_index=node_column_index, three_rows=[row1, row2, row3])
+
+        # 行の高さ設定
+        self._append_row(row_th=row1_th, row=row1, height=13)
+        self._append_row(row_th=row1_th + 1, row=row2, height=13)
+        self._append_row(row_th=row1_th + 2, row=row3, height=6)
+
+        self._stats.count_records()
+
+
+    def _draw_edge(self, row_number, record, depth_th, column_index, three_rows):
+        """辺を描きます
+
+        Parameters
+        ----------
+        column_index : int
+            親側辺の列の、0から始まる列番号
+        """
+
+        kind = self._tree_layout.get_kind_of_edge(row_number=row_number, depth_th=depth_th)
+
+        if self._debug_write:
+            print(f"[{datetime.datetime.now()}] Pencil(Edge) {record.no} record > {nth(depth_th)} layer  {kind}")
+
+        if kind is None:
+            return
+
+        row1, row2, row3 = three_rows
+        cn1 = column_index
+        cn2 = column_index + 1
+
+        # 垂直線
+        if kind == '│字':
+            row1[cn2] = self._new_cell(border=TreeDrawer._leftside_border)
+            row2[cn2] = self._new_cell(border=TreeDrawer._leftside_border)
+            row3[cn2] = self._new_cell(border=TreeDrawer._leftside_border)
+            return
+
+        edge_text = record.node_at(depth_th=depth_th).edge_text
+        if is_blank(edge_text):
+            edge_text = None
+
+        if kind == '─字':
+            row1[cn1] = self._new_cell(border=TreeDrawer._under_border)
+            row1[cn2] = self._new_cell(value=edge_text, border=TreeDrawer._under_border)
+
+        elif kind == '┬字':
+            row1[cn1] = self._new_cell(border=TreeDrawer._under_border)
+            row1[cn2] = self._new_cell(value=edge_text, border=TreeDrawer._under_border)
+            row2[cn2] = self._new_cell(border=TreeDrawer._leftside_border)
+            row3[cn2] = self._new_cell(border=TreeDrawer._leftside_border)
+
+        elif kind == '├字':
+            row1[cn2] = self._new_cell(value=edge_text, border=TreeDrawer._l_letter_border)
+            row2[cn2] = self._new_cell(border=TreeDrawer._leftside_border)
+            row3[cn2] = self._new_cell(border=TreeDrawer._leftside_border)
+
+        elif kind == '└字':
+            row1[cn2] = self._new_cell(value=edge_text, border=TreeDrawer._l_letter_border)
+
+        else:
+            raise ValueError(f"{kind=}")
+
+
+    def _draw_node(self, row_number, record, depth_th, column_index, three_rows):
+        """節を描きます
+
+        Parameters
+        ----------
+        column_index : int
+            節の列の、0から始まる列番号
+        """
+
+        nd = record.node_at(depth_th=depth_th)
+
+        if nd is None or is_blank(nd.text) or self._tree_layout.is_same_path_as_above(row_number=row_number, depth_th=depth_th):
+            return
+
+        if self._debug_write:
+            print(f"[{datetime.datetime.now()}] Pencil(Node) {record.no} record > {nth(depth_th)} layer  □ {nd.text}")
+
+        row1, row2, row3 = three_rows
+        row1[column_index] = self._new_cell(value=nd.text, fill=TreeDrawer._node_bgcolor, border=TreeDrawer._upside_node_border)
+        row2[column_index] = self._new_cell(fill=TreeDrawer._node_bgcolor, border=TreeDrawer._downside_node_border)
+
+
+class SpreadsheetMlTreeDrawer(WriteOnlyTreeDrawer):
+    """WriteOnlyTreeDrawer と同じ樹形図を、openpyxl を通さずに SpreadsheetML の行として書き出します。
+    書き出し先は SpreadsheetMlSheet です。セルの書式の番号は create_styles() の表で決まっているので、
+    別々のプロセスで書き出した行を、そのまま１枚のシートに繋げられます"""
+
+
+    @staticmethod
+    def create_styles():
+        """この描画で使う、セルの書式の表"""
+        return SpreadsheetMlStyles(cell_style_list=[
+            # 列ヘッダー、 no 列
+            (TreeDrawer._fgcolor_list[0], TreeDrawer._bgcolor_list[0], None),
+            (None, TreeDrawer._bgcolor_list[0], None),
+            (TreeDrawer._fgcolor_list[1], TreeDrawer._bgcolor_list[1], None),
+            (None, TreeDrawer._bgcolor_list[1], None),
+            # 節
+            (None, TreeDrawer._node_bgcolor, TreeDrawer._upside_node_border),
+            (None, TreeDrawer._node_bgcolor, TreeDrawer._downside_node_border),
+            # 辺
+            (None, None, TreeDrawer._under_border),
+            (None, None, TreeDrawer._leftside_border),
+            (None, None, TreeDrawer._l_letter_border),
+        ])
+
+
+    def iter_row_xml(self, len_records_per_chunk=1000):
+        """レコードの行の SpreadsheetML を len_records_per_chunk 件ずつ返すジェネレーター。
+        描いた行はすぐ返すので、件数が多くても行を溜め込みません
+
+        NOTE 列の幅、ウィンドウ枠の固定は、シートの XML の先頭に書くので、先に render_header() を呼んでおく必要があります
+
+        Examples
+        --------
+        tree_drawer.render_header()
+        wb.write_sheet(sheet_name=sheet_name, xml_iterable=sheet.iter_xml(row_xml_iterable=tree_drawer.iter_row_xml()))
+
+        Parameters
+        ----------
+        len_records_per_chunk : int
+            何件ごとに返すか
+
+        Returns
+        -------
+        row_xml : str
+            SpreadsheetML の行の文字列
+        """
+
+        for row_number, record in enumerate(self._tree_table.iter_records()):
+            self._on_each_record(row_number=row_number, record=record)
+
+            if (row_number + 1) % len_records_per_chunk == 0:
+                yield self._ws.pop_row_xml()
+
+        yield self._ws.pop_row_xml()
+
+
+    def _new_cell(self, value=None, fill=None, font=None, border=None):
+        self._stats.count_cells(1, fill=fill, font=font, border=border)
+        return self._ws.new_cell(value=value, fill=fill, font=font, border=border)
+
+
+    def _set_column_width(self, column_letter, width):
+        self._ws.set_column_width(column_letter, width)
+
+
+    def _append_row(self, row_th, row, height):
+        self._ws.append_row(row_th=row_th, row=row, height=height)
+
+
+class ShardTreeDrawer(SpreadsheetMlTreeDrawer):
+    """エクセルのシートに収まらない樹形図を切り分けた、１枚分（シャード）を描きます。
+    first_depth_th 層から len_depths 層だけを、 first_depth_th 層を根とみなして描きます。
+    第２行には、シャードの先頭の件の祖先（前のシャードから続いている道）を書きます"""
+
+
+    def __init__(self, tree_table, ws, config, tree_layout, first_depth_th=0, len_ancestors=0, debug_write=False, stats=None):
+        """初期化
+
+        Parameters
+        ----------
+        tree_table : TreeTable または TreeCsvReader のようなもの
+            シャードの件を、切り分ける前の形で返す iter_records() と、シャードの層の数の actual_length_of_nodes を持つもの
+        ws : SpreadsheetMlSheet
+            ワークシートの部品
+        config : Config
+            構成
+        tree_layout : TreeLayout
+            シャードの罫線の最終形。 TreeLayout.select() を参照
+        first_depth_th : int
+            根とみなす層
+        len_ancestors : int
+            第２行に書く、先頭の件の根からのノードの数
+        debug_write : bool
+            デバッグライト
+        stats : RenderStats
+            描画の統計。省略可
+        """
+        super().__init__(tree_table=tree_table, ws=ws, config=config, debug_write=debug_write, tree_layout=tree_layout, stats=stats)
+        self._first_depth_th = first_depth_th
+        self._len_ancestors = len_ancestors
+
+
+    @staticmethod
+    def get_ancestor_text(record, len_ancestors):
+        """根から len_ancestors 個のノードのテキストを ' > ' で繋げた道。例： 'Root > A > B'"""
+        return ' > '.join([str(record.node_at(depth_th=depth_th).text) for depth_th in range(0, len_ancestors)])
+
+
+    def _get_column_title(self, depth_th):
+        return super()._get_column_title(depth_th=self._first_depth_th + depth_th)
+
+
+    def _on_column_header_separator(self):
+        # 先頭の件を読むまで祖先が分からないので、第２行は _on_each_record() で書く
+        pass
+
+
+    def _on_each_record(self, row_number, record):
+
+        if row_number == 0:
+            ancestor_text = ShardTreeDrawer.get_ancestor_text(record=record, len_ancestors=self._len_ancestors)
+
+            row = [self._new_cell(fill=TreeDrawer._bgcolor_list[0]), self._new_cell(fill=TreeDrawer._bgcolor_list[0])]
+            if ancestor_text != '':
+                row.append(self._new_cell(value=ancestor_text, fill=TreeDrawer._bgcolor_list[0], font=TreeDrawer._fgcolor_list[0]))
+
+            self._append_row(row_th=2, row=row, height=self._config.dictionary['column_header_separator_height'])
+
+        # シャードの層だけにする
+        len_depths = self._tree_table.actual_length_of_nodes
+        if self._first_depth_th != 0 or len_depths < record.len_node_list:
+            record = TreeRecord(
+                    no=record.no,
+                    node_list=[record.node_at(depth_th=depth_th) for depth_th in range(self._first_depth_th, self._first_depth_th + len_depths)],
+                    length_of_nodes=len_depths)
+
+        super()._on_each_record(row_number=row_number, record=record)